@@ -1,9 +1,47 @@
 import pandas as pd
+import numpy as np
 import os
+from taxonomia_pedidos import clasificar_pedido, matriz_por_tipo
+from fuentes import cargar_registros, COLUMNA_FUENTE
+from persistencia import escribir, escribir_texto
+from resultados import guardar_tabla, obtener_almacen_dir, ESQUEMAS
+from instrumentacion import instrumentar
 
 
-def analizar_caracteristicas_clusters():
-    """Analizar características demográficas/geográficas de cada cluster"""
+def tabla_metadatos_comunidades(registros):
+    """Tabla por comunidad: fuente de origen, provincia y número de resoluciones
+
+    La fuente de origen es la primera donde aparece la comunidad (en el
+    orden del registro de fuentes) y la provincia, la primera no nula.
+    """
+
+    columna = 'NOMBRE DE LA ORGANIZACIÓN'
+
+    registros = registros.rename(columns={COLUMNA_FUENTE: 'archivo'})
+
+    if 'PROVINCIA' not in registros.columns:
+        registros['PROVINCIA'] = np.nan
+
+    origen = registros.drop_duplicates(columna)[[columna, 'archivo']]
+    provincia = (registros.dropna(subset=['PROVINCIA'])
+                 .drop_duplicates(columna)[[columna, 'PROVINCIA']]
+                 .rename(columns={'PROVINCIA': 'provincia'}))
+    n_resoluciones = registros.groupby(columna).size().rename('n_resoluciones').reset_index()
+
+    tabla = (origen.merge(provincia, on=columna, how='left')
+             .merge(n_resoluciones, on=columna, how='left'))
+
+    return tabla.set_index(columna)
+
+
+@instrumentar('analizar_clusters')
+def analizar_caracteristicas_clusters(clusters_df=None, registros=None, escritor=None):
+    """Analizar características demográficas/geográficas de cada cluster
+
+    clusters_df (matriz con la columna CLUSTER) y registros pueden pasarse
+    en memoria; si no, se leen de data/. escritor controla cómo se guardan
+    los resultados (ver persistencia.crear_escritor).
+    """
 
     print("ANÁLISIS DE CARACTERÍSTICAS POR CLUSTER")
     print("=" * 70)
@@ -13,130 +51,87 @@ def analizar_caracteristicas_clusters():
     proyecto_dir = os.path.dirname(script_dir)
     clusters_path = os.path.join(proyecto_dir, "data", "results", "comunidades_clusters.csv")
 
-    if not os.path.exists(clusters_path):
-        print("❌ Primero ejecuta clustering_comunidades.py")
-        return
-
-    clusters_df = pd.read_csv(clusters_path, index_col=0, encoding='utf-8-sig')
+    if clusters_df is None:
+        if not os.path.exists(clusters_path):
+            print("❌ Primero ejecuta clustering_comunidades.py")
+            return
 
-    # Cargar datos originales para obtener provincia/información adicional
-    processed_dir = os.path.join(proyecto_dir, "data", "processed")
-    archivo1 = os.path.join(processed_dir, "archivo1_preprocesado_final.csv")
-    archivo2 = os.path.join(processed_dir, "archivo2_preprocesado_final.csv")
+        clusters_df = pd.read_csv(clusters_path, index_col=0, encoding='utf-8-sig')
 
-    df1 = pd.read_csv(archivo1, encoding='utf-8-sig')
-    df2 = pd.read_csv(archivo2, encoding='utf-8-sig')
+    # Cargar registros preprocesados para obtener provincia/información adicional
+    if registros is None:
+        registros = cargar_registros(proyecto_dir)
 
-    # Crear diccionario de comunidad -> información
+    # Tabla columnar comunidad -> información
     print("\n1. EXTRACCIÓN DE INFORMACIÓN ADICIONAL...")
 
-    info_comunidades = {}
-
-    # Del archivo 1 (no tiene provincia)
-    for _, row in df1.iterrows():
-        comunidad = row['NOMBRE DE LA ORGANIZACIÓN']
-        if comunidad not in info_comunidades:
-            info_comunidades[comunidad] = {'archivo': 'Archivo 1'}
-
-    # Del archivo 2 (tiene provincia)
-    if 'PROVINCIA' in df2.columns:
-        for _, row in df2.iterrows():
-            comunidad = row['NOMBRE DE LA ORGANIZACIÓN']
-            provincia = row['PROVINCIA']
-            if comunidad not in info_comunidades:
-                info_comunidades[comunidad] = {'archivo': 'Archivo 2', 'provincia': provincia}
-            elif 'provincia' not in info_comunidades[comunidad]:
-                info_comunidades[comunidad]['provincia'] = provincia
+    info_comunidades = tabla_metadatos_comunidades(registros)
 
     print(f"   Información extraída para {len(info_comunidades)} comunidades")
 
-    # 2. ANALIZAR CLUSTERS
+    # 2. ANALIZAR CLUSTERS (un solo join y agregaciones por groupby/crosstab)
     print("\n2. ANÁLISIS POR CLUSTER:")
 
-    n_clusters = clusters_df['CLUSTER'].nunique()
+    perfil = clusters_df[['CLUSTER']].join(info_comunidades, how='left')
 
-    analisis_completo = []
+    tamanos = perfil.groupby('CLUSTER').size()
+    archivos = pd.crosstab(perfil['CLUSTER'], perfil['archivo'])
+    provincias = pd.crosstab(perfil['CLUSTER'], perfil['provincia'])
+    resoluciones = perfil.groupby('CLUSTER')['n_resoluciones'].sum()
 
-    for cluster_id in range(n_clusters):
-        comunidades_cluster = clusters_df[clusters_df['CLUSTER'] == cluster_id].index
+    pedidos_por_cluster = clusters_df.groupby('CLUSTER').sum()
 
-        print(f"\n   CLUSTER {cluster_id} ({len(comunidades_cluster)} comunidades):")
+    analisis_df = pd.DataFrame({
+        'cluster': tamanos.index,
+        'n_comunidades': tamanos.values,
+        'pedido_principal': pedidos_por_cluster.idxmax(axis=1).reindex(tamanos.index).values,
+        'frecuencia_principal': pedidos_por_cluster.max(axis=1).reindex(tamanos.index).values,
+        'n_resoluciones': resoluciones.reindex(tamanos.index).values
+    })
 
-        # Información de archivos
-        archivos = []
-        provincias = []
+    if not provincias.empty:
+        provincias = provincias.reindex(tamanos.index, fill_value=0)
+        con_provincia = (provincias.sum(axis=1) > 0).values
+        analisis_df['provincia_comun'] = np.where(con_provincia, provincias.idxmax(axis=1).values, None)
+        analisis_df['n_provincias'] = np.where(con_provincia, (provincias > 0).sum(axis=1).values, np.nan)
 
-        for comunidad in comunidades_cluster:
-            if comunidad in info_comunidades:
-                info = info_comunidades[comunidad]
-                archivos.append(info.get('archivo', 'Desconocido'))
-                if 'provincia' in info:
-                    provincias.append(info['provincia'])
+    for _, info in analisis_df.iterrows():
+        cluster_id = info['cluster']
+        n = info['n_comunidades']
 
-        # Estadísticas
-        if archivos:
-            archivo1_count = archivos.count('Archivo 1')
-            archivo2_count = archivos.count('Archivo 2')
-            print(f"   - Del Archivo 1: {archivo1_count} ({archivo1_count / len(archivos) * 100:.0f}%)")
-            print(f"   - Del Archivo 2: {archivo2_count} ({archivo2_count / len(archivos) * 100:.0f}%)")
+        print(f"\n   CLUSTER {cluster_id} ({n} comunidades):")
 
-        if provincias:
-            provincia_counts = pd.Series(provincias).value_counts()
-            if len(provincia_counts) > 0:
-                print(f"   - Provincia más común: {provincia_counts.index[0]} ({provincia_counts.iloc[0]})")
+        conteo_archivos = archivos.loc[cluster_id] if cluster_id in archivos.index else pd.Series(dtype=int)
+        total_info = conteo_archivos.sum()
+        if total_info > 0:
+            for archivo in archivos.columns:
+                count = conteo_archivos.get(archivo, 0)
+                print(f"   - Del {archivo}: {count} ({count / total_info * 100:.0f}%)")
 
-        # Pedidos del cluster
-        pedidos_cluster = clusters_df.loc[comunidades_cluster].drop('CLUSTER', axis=1)
-        pedidos_frecuentes = pedidos_cluster.sum().sort_values(ascending=False)
+        if pd.notna(info.get('provincia_comun')):
+            print(f"   - Provincia más común: {info['provincia_comun']} "
+                  f"({provincias.loc[cluster_id, info['provincia_comun']]})")
 
         print(f"   - Pedidos principales:")
-        for i, (pedido, count) in enumerate(pedidos_frecuentes.head(2).items(), 1):
-            porcentaje = count / len(comunidades_cluster) * 100
+        top_pedidos = pedidos_por_cluster.loc[cluster_id].nlargest(2)
+        for i, (pedido, count) in enumerate(top_pedidos.items(), 1):
+            porcentaje = count / n * 100
             print(f"     {i}. {pedido[:30]}... ({porcentaje:.0f}% del cluster)")
 
-        # Guardar análisis
-        cluster_info = {
-            'cluster': cluster_id,
-            'n_comunidades': len(comunidades_cluster),
-            'pedido_principal': pedidos_frecuentes.index[0] if len(pedidos_frecuentes) > 0 else 'N/A',
-            'frecuencia_principal': pedidos_frecuentes.iloc[0] if len(pedidos_frecuentes) > 0 else 0
-        }
-
-        if provincias:
-            cluster_info['provincia_comun'] = pd.Series(provincias).mode()[0]
-            cluster_info['n_provincias'] = len(set(provincias))
-
-        analisis_completo.append(cluster_info)
-
     # 3. IDENTIFICAR PATRONES
     print("\n3. PATRONES IDENTIFICADOS:")
 
-    # Crear DataFrame de análisis
-    analisis_df = pd.DataFrame(analisis_completo)
-
-    # Agrupar por tipo de pedido principal
+    # Agrupar por tipo de pedido principal (clasificado una sola vez)
     print("\n   Agrupación por tipo de trámite:")
 
-    tipos_pedidos = {
-        'PERSONERIA': 'Legalización',
-        'REGISTRO DE DIRECTIVA': 'Gestión interna',
-        'INCLUSIÓN': 'Membresía',
-        'INCLUSION': 'Membresía',
-        'REFORMA': 'Actualización',
-        'EXCLUSIÓN': 'Membresía',
-        'EXCLUSION': 'Membresía'
-    }
+    analisis_df['tipo_tramite'] = analisis_df['pedido_principal'].map(clasificar_pedido)
 
     for _, row in analisis_df.iterrows():
-        pedido = str(row['pedido_principal']).upper()
-        tipo = 'Otros'
-
-        for key, value in tipos_pedidos.items():
-            if key in pedido:
-                tipo = value
-                break
+        print(f"   Cluster {row['cluster']}: {row['tipo_tramite']} ({row['n_comunidades']} comunidades)")
 
-        print(f"   Cluster {row['cluster']}: {tipo} ({row['n_comunidades']} comunidades)")
+    # Perfil por tipo: proporción de comunidades de cada cluster con al menos un pedido de cada tipo
+    tipos_comunidad = matriz_por_tipo(clusters_df.drop('CLUSTER', axis=1))
+    perfil_tipos = tipos_comunidad.groupby(clusters_df['CLUSTER']).mean()
 
     # 4. RESUMEN EJECUTIVO
     print("\n4. RESUMEN EJECUTIVO:")
@@ -146,17 +141,7 @@ def analizar_caracteristicas_clusters():
     print(f"   Total clusters identificados: {len(analisis_df)}")
 
     # Distribución por tipo de trámite
-    tipo_counts = {}
-    for _, row in analisis_df.iterrows():
-        pedido = str(row['pedido_principal']).upper()
-        tipo = 'Otros'
-
-        for key, value in tipos_pedidos.items():
-            if key in pedido:
-                tipo = value
-                break
-
-        tipo_counts[tipo] = tipo_counts.get(tipo, 0) + row['n_comunidades']
+    tipo_counts = analisis_df.groupby('tipo_tramite', sort=False)['n_comunidades'].sum().to_dict()
 
     print(f"\n   Distribución por tipo de trámite:")
     for tipo, count in tipo_counts.items():
@@ -169,40 +154,66 @@ def analizar_caracteristicas_clusters():
 
     # Guardar análisis detallado
     analisis_path = os.path.join(results_dir, "analisis_caracteristicas_clusters.csv")
-    analisis_df.to_csv(analisis_path, encoding='utf-8-sig')
+    escribir(escritor, analisis_df.to_csv, analisis_path, encoding='utf-8-sig')
+
+    # Guardar perfil por tipo de trámite
+    perfil_tipos_path = os.path.join(results_dir, "perfil_tipos_clusters.csv")
+    escribir(escritor, perfil_tipos.to_csv, perfil_tipos_path, encoding='utf-8-sig')
 
     # Guardar resumen ejecutivo
     resumen_path = os.path.join(results_dir, "resumen_analisis_clusters.txt")
-    with open(resumen_path, 'w', encoding='utf-8') as f:
-        f.write("ANÁLISIS DE CARACTERÍSTICAS DE CLUSTERS\n")
-        f.write("=" * 50 + "\n\n")
-
-        f.write("RESUMEN EJECUTIVO:\n")
-        f.write(f"- Total clusters: {len(analisis_df)}\n")
-        f.write(f"- Total comunidades: {total_comunidades}\n")
-        f.write(
-            f"- Comunidades con información de provincia: {sum('provincia_comun' in row for row in analisis_completo)}\n\n")
-
-        f.write("DISTRIBUCIÓN POR TIPO DE TRÁMITE:\n")
-        for tipo, count in tipo_counts.items():
-            f.write(f"- {tipo}: {count} comunidades ({count / total_comunidades * 100:.0f}%)\n")
-
-        f.write("\nDETALLE POR CLUSTER:\n")
-        for info in analisis_completo:
-            f.write(f"\nCluster {info['cluster']}:\n")
-            f.write(f"  Comunidades: {info['n_comunidades']}\n")
-            f.write(f"  Pedido principal: {info['pedido_principal'][:50]}...\n")
-            f.write(f"  Frecuencia: {info['frecuencia_principal']}/{info['n_comunidades']}\n")
-            if 'provincia_comun' in info:
-                f.write(f"  Provincia común: {info['provincia_comun']}\n")
+    lineas = ["ANÁLISIS DE CARACTERÍSTICAS DE CLUSTERS\n",
+              "=" * 50 + "\n\n",
+              "RESUMEN EJECUTIVO:\n",
+              f"- Total clusters: {len(analisis_df)}\n",
+              f"- Total comunidades: {total_comunidades}\n",
+              f"- Comunidades con información de provincia: "
+              f"{analisis_df.get('provincia_comun', pd.Series(dtype='string')).notna().sum()}\n\n",
+              "DISTRIBUCIÓN POR TIPO DE TRÁMITE:\n"]
+    for tipo, count in tipo_counts.items():
+        lineas.append(f"- {tipo}: {count} comunidades ({count / total_comunidades * 100:.0f}%)\n")
+
+    lineas.append("\nDETALLE POR CLUSTER:\n")
+    for _, info in analisis_df.iterrows():
+        lineas.append(f"\nCluster {info['cluster']}:\n")
+        lineas.append(f"  Comunidades: {info['n_comunidades']}\n")
+        lineas.append(f"  Pedido principal: {info['pedido_principal'][:50]}...\n")
+        lineas.append(f"  Frecuencia: {info['frecuencia_principal']}/{info['n_comunidades']}\n")
+        if pd.notna(info.get('provincia_comun')):
+            lineas.append(f"  Provincia común: {info['provincia_comun']}\n")
+    escribir(escritor, escribir_texto, resumen_path, lineas)
+
+    # Almacén de resultados: lo que leen los informes y gráficos, sin analizar texto
+    distribucion = pd.DataFrame({'tipo_tramite': list(tipo_counts.keys()),
+                                 'n_comunidades': list(tipo_counts.values())})
+    distribucion['porcentaje'] = distribucion['n_comunidades'] / total_comunidades * 100
+    perfil_tipos_largo = (perfil_tipos.rename_axis(index='cluster', columns='tipo_tramite')
+                          .stack().rename('proporcion').reset_index())
+
+    perfiles = analisis_df.reindex(columns=list(ESQUEMAS['perfiles_clusters']))
+    escribir(escritor, guardar_tabla, 'perfiles_clusters', perfiles)
+    escribir(escritor, guardar_tabla, 'perfil_tipos_clusters', perfil_tipos_largo)
+    escribir(escritor, guardar_tabla, 'distribucion_tipos_tramite', distribucion)
+
+    provincias_largo = (provincias.rename_axis(index='cluster', columns='provincia').stack()
+                        .rename('n_comunidades').reset_index())
+    escribir(escritor, guardar_tabla, 'provincias_clusters', provincias_largo[provincias_largo['n_comunidades'] > 0])
+
+    metadatos = perfil.rename_axis('comunidad').reset_index().rename(columns={'CLUSTER': 'cluster'})
+    metadatos['n_pedidos'] = clusters_df.drop('CLUSTER', axis=1).sum(axis=1).to_numpy()
+    escribir(escritor, guardar_tabla, 'metadatos_comunidades', metadatos)
 
     print(f"   Análisis guardado en: {analisis_path}")
+    print(f"   Perfil por tipo guardado en: {perfil_tipos_path}")
     print(f"   Resumen guardado en: {resumen_path}")
+    print(f"   Tablas estructuradas guardadas en: {obtener_almacen_dir()}")
 
     print("\n" + "=" * 70)
     print("✅ ANÁLISIS COMPLETADO")
     print("=" * 70)
 
+    return analisis_df
+
 
 if __name__ == "__main__":
     analizar_caracteristicas_clusters()
\ No newline at end of file
@@ -1,10 +1,18 @@
 import pandas as pd
 import numpy as np
 import os
+from persistencia import escribir, escribir_texto
+from instrumentacion import instrumentar
 
 
-def analizar_matriz_detalladamente():
-    """Analizar la matriz en detalle para ver si sirve para clustering"""
+@instrumentar('analizar_matriz')
+def analizar_matriz_detalladamente(matriz=None, escritor=None):
+    """Analizar la matriz en detalle para ver si sirve para clustering
+
+    La matriz puede pasarse en memoria; si no, se lee de
+    matriz_clustering_final.csv. escritor controla cómo se guarda el
+    análisis (ver persistencia.crear_escritor).
+    """
 
     print("ANÁLISIS DETALLADO DE LA MATRIZ DE CLUSTERING")
     print("=" * 70)
@@ -14,11 +22,12 @@ def analizar_matriz_detalladamente():
     proyecto_dir = os.path.dirname(script_dir)
     matriz_path = os.path.join(proyecto_dir, "data", "results", "matriz_clustering_final.csv")
 
-    if not os.path.exists(matriz_path):
-        print("❌ No se encuentra la matriz")
-        return
+    if matriz is None:
+        if not os.path.exists(matriz_path):
+            print("❌ No se encuentra la matriz")
+            return
 
-    matriz = pd.read_csv(matriz_path, index_col=0, encoding='utf-8-sig')
+        matriz = pd.read_csv(matriz_path, index_col=0, encoding='utf-8-sig')
 
     print(f"\n1. DIMENSIONES DE LA MATRIZ:")
     print(f"   Comunidades: {matriz.shape[0]}")
@@ -131,22 +140,20 @@ def analizar_matriz_detalladamente():
     results_dir = os.path.join(proyecto_dir, "data", "results")
     analisis_path = os.path.join(results_dir, "analisis_matriz_detallado.txt")
 
-    with open(analisis_path, 'w', encoding='utf-8') as f:
-        f.write("ANÁLISIS DETALLADO DE LA MATRIZ\n")
-        f.write("=" * 50 + "\n\n")
-
-        f.write(f"Comunidades totales: {matriz.shape[0]}\n")
-        f.write(f"Pedidos únicos: {matriz.shape[1]}\n")
-        f.write(f"Densidad: {(matriz.sum().sum() / (matriz.shape[0] * matriz.shape[1]) * 100):.4f}%\n\n")
-
-        f.write("DISTRIBUCIÓN DE PEDIDOS POR COMUNIDAD:\n")
-        for i in range(1, 11):
-            count = (pedidos_por_comunidad == i).sum()
-            if count > 0:
-                f.write(f"  {i} pedido(s): {count} comunidades ({count / matriz.shape[0] * 100:.1f}%)\n")
+    lineas = ["ANÁLISIS DETALLADO DE LA MATRIZ\n",
+              "=" * 50 + "\n\n",
+              f"Comunidades totales: {matriz.shape[0]}\n",
+              f"Pedidos únicos: {matriz.shape[1]}\n",
+              f"Densidad: {(matriz.sum().sum() / (matriz.shape[0] * matriz.shape[1]) * 100):.4f}%\n\n",
+              "DISTRIBUCIÓN DE PEDIDOS POR COMUNIDAD:\n"]
+    for i in range(1, 11):
+        count = (pedidos_por_comunidad == i).sum()
+        if count > 0:
+            lineas.append(f"  {i} pedido(s): {count} comunidades ({count / matriz.shape[0] * 100:.1f}%)\n")
 
-        f.write(f"\nComunidades con 2+ pedidos: {mas_de_1}\n")
-        f.write(f"Porcentaje de pares que comparten: {porcentaje_compartido:.1f}%\n")
+    lineas.append(f"\nComunidades con 2+ pedidos: {mas_de_1}\n")
+    lineas.append(f"Porcentaje de pares que comparten: {porcentaje_compartido:.1f}%\n")
+    escribir(escritor, escribir_texto, analisis_path, lineas)
 
     print(f"   Análisis guardado en: {analisis_path}")
 
@@ -0,0 +1,113 @@
+import time
+import numpy as np
+
+
+def rango_k_por_defecto(n_muestras, k_min=2):
+    """Rango amplio de K en función del número de comunidades"""
+
+    k_max = max(10, int(2 * np.sqrt(n_muestras)))
+    return k_min, max(k_min, min(k_max, n_muestras - 1))
+
+
+def buscar_mejor_k(evaluar, k_min=2, k_max=10, n_grilla=8, paciencia=3,
+                   max_ajustes=None, tiempo_max=None, verbose=True):
+    """Búsqueda adaptativa de K: grilla gruesa, refinamiento y parada temprana
+
+    evaluar(k) debe ajustar el modelo y devolver su score (mayor es mejor) o
+    None si el ajuste no es válido. Cada K se evalúa como máximo una vez.
+
+    1. Grilla gruesa geométrica entre k_min y k_max. Se detiene cuando el
+       score cae `paciencia` veces seguidas por debajo del mejor.
+    2. Refinamiento alrededor del mejor K: sub-grillas cada vez más finas
+       entre sus vecinos hasta evaluar todos los K adyacentes.
+
+    El presupuesto se limita con max_ajustes (número de ajustes) y/o
+    tiempo_max (segundos). Devuelve un diccionario con el mejor K, su score,
+    todos los scores evaluados y el motivo de parada.
+    """
+
+    inicio = time.perf_counter()
+    scores = {}
+    estado = {'motivo': 'completado'}
+
+    def presupuesto_agotado():
+        if max_ajustes is not None and len(scores) >= max_ajustes:
+            estado['motivo'] = f'límite de {max_ajustes} ajustes'
+            return True
+        if tiempo_max is not None and time.perf_counter() - inicio >= tiempo_max:
+            estado['motivo'] = f'límite de {tiempo_max}s'
+            return True
+        return False
+
+    def score_de(k):
+        if k not in scores:
+            score = evaluar(k)
+            scores[k] = -1 if score is None else score
+        return scores[k]
+
+    def mejor():
+        return max(scores, key=lambda k: (scores[k], -k))
+
+    # 1. GRILLA GRUESA
+    grilla = sorted({int(k) for k in np.geomspace(k_min, k_max, n_grilla).round()})
+    caidas = 0
+    anterior = None
+
+    for k in grilla:
+        if presupuesto_agotado():
+            break
+
+        score = score_de(k)
+
+        if anterior is not None and score < anterior and score < scores[mejor()]:
+            caidas += 1
+        else:
+            caidas = 0
+        anterior = score
+
+        if caidas >= paciencia:
+            estado['motivo'] = f'score en caída durante {paciencia} K consecutivos'
+            break
+
+    if not scores:
+        return {'mejor_k': None, 'mejor_score': -1, 'scores': scores,
+                'ajustes': 0, 'motivo': estado['motivo']}
+
+    if verbose:
+        print(f"   Grilla gruesa: {sorted(scores)} → mejor K={mejor()}")
+
+    # 2. REFINAMIENTO ALREDEDOR DEL MEJOR K
+    while not presupuesto_agotado():
+        k_actual = mejor()
+        evaluados = sorted(scores)
+        posicion = evaluados.index(k_actual)
+
+        izquierda = evaluados[posicion - 1] if posicion > 0 else k_actual
+        derecha = evaluados[posicion + 1] if posicion < len(evaluados) - 1 else k_actual
+
+        candidatos = {int(k) for k in np.linspace(izquierda, derecha, 5).round()}
+        candidatos.update({k_actual - 1, k_actual + 1})
+        candidatos = [k for k in sorted(candidatos)
+                      if izquierda <= k <= derecha and k_min <= k <= k_max and k not in scores]
+
+        if not candidatos:
+            break
+
+        for k in candidatos:
+            if presupuesto_agotado():
+                break
+            score_de(k)
+
+    k_final = mejor()
+
+    if verbose:
+        print(f"   Refinamiento: {len(scores)} ajustes en total "
+              f"({time.perf_counter() - inicio:.1f}s, {estado['motivo']})")
+
+    return {
+        'mejor_k': k_final,
+        'mejor_score': scores[k_final],
+        'scores': dict(sorted(scores.items())),
+        'ajustes': len(scores),
+        'motivo': estado['motivo']
+    }
@@ -0,0 +1,93 @@
+import re
+import unicodedata
+from functools import lru_cache
+import pandas as pd
+
+# Variantes conocidas -> forma canónica (sobre texto ya en mayúsculas y sin tildes)
+SINONIMOS_PEDIDOS = {
+    'EXCLUCION': 'EXCLUSION',
+    'REGITRO': 'REGISTRO',
+    'INCLUSION/EXCLUSION': 'INCLUSION Y EXCLUSION',
+    'PERSONALIDAD JURIDICA': 'PERSONERIA JURIDICA',
+    'REGISTRO DE LA DIRECTIVA': 'REGISTRO DE DIRECTIVA',
+    'REFORMA DEL ESTATUTO': 'REFORMA DE ESTATUTO',
+    'REFORMA Y MEJORAMIENTO DE LOS ESTATUTOS': 'REFORMA Y MEJORAMIENTO DEL ESTATUTO'
+}
+
+SEPARADOR = ' | '
+
+
+def quitar_tildes(texto):
+    """Plegado de acentos: 'EXCLUSIÓN' -> 'EXCLUSION' (la Ñ se conserva)"""
+
+    texto = texto.replace('Ñ', '\0').replace('ñ', '\1')
+    texto = ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+    return texto.replace('\0', 'Ñ').replace('\1', 'ñ')
+
+
+def crear_canonicalizador(sinonimos=None):
+    """Crear una función canonicalizadora memoizada para una tabla de sinónimos
+
+    La función resultante aplica, en orden: mayúsculas, plegado de
+    acentos, normalización de puntuación y espacios (conservando el
+    separador ' | ' de PEDIDO_UNIFICADO y pegando '/' y '-' a sus
+    vecinos: 'SGDPN- SGDPN-2023-0385-E' -> 'SGDPN-SGDPN-2023-0385-E') y
+    reemplazo de sinónimos por frase completa. Cada texto crudo distinto se procesa una sola vez.
+    """
+
+    sinonimos = SINONIMOS_PEDIDOS if sinonimos is None else sinonimos
+    claves = sorted(sinonimos, key=len, reverse=True)
+    patron_sinonimos = None
+    if claves:
+        patron_sinonimos = re.compile(r'(?<![\w/])(' + '|'.join(re.escape(c) for c in claves) + r')(?![\w/])')
+
+    @lru_cache(maxsize=None)
+    def canonicalizar(texto):
+        if pd.isna(texto):
+            return texto
+
+        texto = quitar_tildes(str(texto).upper())
+
+        partes = []
+        for parte in texto.split('|'):
+            # Puntuación decorativa fuera; se conservan '-' (códigos SGDPN) y '/' (Y/O)
+            parte = re.sub(r'[^\w\s/\-]', ' ', parte)
+            parte = re.sub(r'\s*/\s*', '/', parte)
+            parte = re.sub(r'\s*-\s*', '-', parte)
+            parte = re.sub(r'\s+', ' ', parte).strip()
+
+            if patron_sinonimos is not None:
+                parte = patron_sinonimos.sub(lambda m: sinonimos[m.group(1)], parte)
+            partes.append(parte)
+
+        return SEPARADOR.join(p for p in partes if p)
+
+    return canonicalizar
+
+
+canonicalizar_pedido = crear_canonicalizador()
+
+
+def canonicalizar_serie(serie, canonicalizador=canonicalizar_pedido):
+    """Canonicalizar una columna procesando sólo sus valores distintos"""
+
+    unicos = pd.unique(serie)
+    mapa = {valor: canonicalizador(valor) for valor in unicos}
+    return serie.map(mapa)
+
+
+def auditoria_canonicalizacion(crudos, canonicos):
+    """Tabla de auditoría: qué variantes crudas se fusionaron en cada pedido canónico"""
+
+    pares = pd.DataFrame({'PEDIDO_CANONICO': canonicos.values, 'PEDIDO_ORIGINAL': crudos.values})
+
+    auditoria = (pares.groupby(['PEDIDO_CANONICO', 'PEDIDO_ORIGINAL'], dropna=False)
+                 .size().rename('n_registros').reset_index())
+
+    resumen = auditoria.groupby('PEDIDO_CANONICO').agg(
+        n_variantes=('PEDIDO_ORIGINAL', 'nunique'),
+        n_registros=('n_registros', 'sum'),
+        variantes=('PEDIDO_ORIGINAL', lambda v: ' || '.join(map(repr, v)))
+    ).reset_index()
+
+    return resumen.sort_values(['n_variantes', 'n_registros'], ascending=False)
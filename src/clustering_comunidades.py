@@ -3,10 +3,31 @@ import numpy as np
 import os
 from sklearn.cluster import KMeans
 from sklearn.metrics import silhouette_score
+from reduccion_dimensional import reducir_svd
+from busqueda_k import buscar_mejor_k, rango_k_por_defecto
+from persistencia import escribir, escribir_texto
+from resultados import guardar_tabla, tabla_valores
+from proyeccion import calcular_proyeccion, guardar_proyeccion
+from instrumentacion import instrumentar, medir
 
 
-def clustering_comunidades():
-    """Realizar clustering solo con comunidades que tienen múltiples pedidos"""
+@instrumentar('clustering_comunidades')
+def clustering_comunidades(matriz=None, n_componentes=None, k_max=None, max_ajustes=None, tiempo_max=None,
+                           escritor=None):
+    """Realizar clustering solo con comunidades que tienen múltiples pedidos
+
+    Si se indica n_componentes, K-Means se ajusta sobre un embedding
+    TruncatedSVD de la matriz dispersa; el Silhouette se sigue midiendo
+    sobre la matriz binaria original para que los scores sean comparables.
+
+    El número de clusters se elige con una búsqueda adaptativa entre 2 y
+    k_max (por defecto crece con el número de comunidades), limitada por
+    max_ajustes y/o tiempo_max.
+
+    La matriz puede pasarse en memoria; si no, se lee de
+    matriz_clustering_final.csv. escritor controla cómo se guardan los
+    resultados (ver persistencia.crear_escritor).
+    """
 
     print("CLUSTERING DE COMUNIDADES CON MÚLTIPLES PEDIDOS")
     print("=" * 70)
@@ -16,7 +37,8 @@ def clustering_comunidades():
     proyecto_dir = os.path.dirname(script_dir)
     matriz_path = os.path.join(proyecto_dir, "data", "results", "matriz_clustering_final.csv")
 
-    matriz = pd.read_csv(matriz_path, index_col=0, encoding='utf-8-sig')
+    if matriz is None:
+        matriz = pd.read_csv(matriz_path, index_col=0, encoding='utf-8-sig')
 
     # 1. FILTRAR: Solo comunidades con 2+ pedidos
     print("\n1. FILTRANDO COMUNIDADES...")
@@ -33,47 +55,58 @@ def clustering_comunidades():
     print("\n2. PREPARANDO DATOS...")
     X = matriz_filtrada.values
 
-    # 3. PROBAR DIFERENTES NÚMEROS DE CLUSTERS
+    if n_componentes:
+        X_ajuste, varianza = reducir_svd(matriz_filtrada, n_componentes)
+        print(f"   Reducción SVD: {X.shape[1]} → {X_ajuste.shape[1]} dimensiones "
+              f"({varianza.sum() * 100:.1f}% varianza)")
+    else:
+        X_ajuste = X
+
+    # 3. BÚSQUEDA ADAPTATIVA DEL NÚMERO DE CLUSTERS
     print("\n3. BUSCANDO MEJOR NÚMERO DE CLUSTERS...")
 
-    inertias = []
-    silhouette_scores = []
-    ks = range(2, 11)
+    if k_max is None:
+        _, k_max = rango_k_por_defecto(X.shape[0])
+
+    inertias = {}
+    etiquetas = {}
 
-    for k in ks:
+    def evaluar_kmeans(k):
         kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-        kmeans.fit(X)
+        with medir('kmeans_fit', k=k, datos=X_ajuste):
+            labels = kmeans.fit_predict(X_ajuste)
+
+        inertias[k] = kmeans.inertia_
+        etiquetas[k] = labels
 
-        inertias.append(kmeans.inertia_)
+        if len(np.unique(labels)) > 1:
+            with medir('silhouette', k=k, datos=X):
+                return silhouette_score(X, labels)
+        return 0
 
-        if k > 1:
-            labels = kmeans.labels_
-            if len(np.unique(labels)) > 1:
-                score = silhouette_score(X, labels)
-                silhouette_scores.append(score)
-            else:
-                silhouette_scores.append(0)
+    busqueda = buscar_mejor_k(evaluar_kmeans, k_min=2, k_max=k_max,
+                              max_ajustes=max_ajustes, tiempo_max=tiempo_max)
 
     # Mostrar resultados
-    print(f"\n   Resultados por número de clusters:")
-    for i, k in enumerate(ks):
-        print(f"   K={k}: Inercia={inertias[i]:.0f}, Silhouette={silhouette_scores[i]:.3f}")
+    print(f"\n   Resultados por número de clusters (K entre 2 y {k_max}):")
+    for k, score in busqueda['scores'].items():
+        print(f"   K={k}: Inercia={inertias[k]:.0f}, Silhouette={score:.3f}")
 
-    # Encontrar mejor K
-    mejor_k_idx = np.argmax(silhouette_scores)
-    mejor_k = ks[mejor_k_idx]
+    # Mejor K
+    mejor_k = busqueda['mejor_k']
+    mejor_score = busqueda['mejor_score']
 
     print(f"\n   MEJOR K encontrado: {mejor_k} clusters")
-    print(f"   Score Silhouette: {silhouette_scores[mejor_k_idx]:.3f}")
+    print(f"   Score Silhouette: {mejor_score:.3f}")
 
-    # 4. APLICAR K-MEANS CON EL MEJOR K
+    # 4. APLICAR K-MEANS CON EL MEJOR K (reutiliza el ajuste de la búsqueda)
     print(f"\n4. APLICANDO K-MEANS CON {mejor_k} CLUSTERS...")
-    kmeans_final = KMeans(n_clusters=mejor_k, random_state=42, n_init=10)
-    cluster_labels = kmeans_final.fit_predict(X)
+    cluster_labels = etiquetas[mejor_k]
 
     # Agregar labels a la matriz
     matriz_resultados = matriz_filtrada.copy()
     matriz_resultados['CLUSTER'] = cluster_labels
+    matriz_resultados.attrs.update({'mejor_k': mejor_k, 'silhouette': mejor_score})
 
     # 5. ANALIZAR LOS CLUSTERS
     print(f"\n5. ANÁLISIS DE LOS {mejor_k} CLUSTERS:")
@@ -119,21 +152,34 @@ def clustering_comunidades():
     results_dir = os.path.join(proyecto_dir, "data", "results")
 
     resultados_path = os.path.join(results_dir, "comunidades_clusters.csv")
-    matriz_resultados.to_csv(resultados_path, encoding='utf-8-sig')
+    escribir(escritor, matriz_resultados.to_csv, resultados_path, encoding='utf-8-sig')
 
     resumen_path = os.path.join(results_dir, "resumen_clusters.txt")
-    with open(resumen_path, 'w', encoding='utf-8') as f:
-        f.write("RESUMEN DE CLUSTERING DE COMUNIDADES\n")
-        f.write("=" * 50 + "\n\n")
-        f.write(f"Total comunidades analizadas: {matriz_filtrada.shape[0]}\n")
-        f.write(f"Número óptimo de clusters: {mejor_k}\n")
-        f.write(f"Score Silhouette: {silhouette_scores[mejor_k_idx]:.3f}\n\n")
-
-        f.write("DETALLE DE CLUSTERS:\n")
-        for info in clusters_info:
-            f.write(f"\nCLUSTER {info['cluster']} ({info['comunidades']} comunidades):\n")
-            for pedido, count in info['pedidos_comunes'].items():
-                f.write(f"  - {pedido[:50]}...: {count} comunidades\n")
+    lineas = ["RESUMEN DE CLUSTERING DE COMUNIDADES\n",
+              "=" * 50 + "\n\n",
+              f"Total comunidades analizadas: {matriz_filtrada.shape[0]}\n",
+              f"Número óptimo de clusters: {mejor_k}\n",
+              f"Score Silhouette: {mejor_score:.3f}\n\n",
+              "DETALLE DE CLUSTERS:\n"]
+    for info in clusters_info:
+        lineas.append(f"\nCLUSTER {info['cluster']} ({info['comunidades']} comunidades):\n")
+        for pedido, count in info['pedidos_comunes'].items():
+            lineas.append(f"  - {pedido[:50]}...: {count} comunidades\n")
+    escribir(escritor, escribir_texto, resumen_path, lineas)
+
+    # Asignaciones y métricas en el almacén de resultados
+    asignaciones = pd.DataFrame({'comunidad': matriz_resultados.index, 'cluster': cluster_labels})
+    escribir(escritor, guardar_tabla, 'asignaciones_clusters', asignaciones)
+    escribir(escritor, guardar_tabla, 'metricas_clustering', tabla_valores({
+        'n_comunidades': matriz_filtrada.shape[0],
+        'n_clusters': mejor_k,
+        'silhouette': mejor_score
+    }, 'metrica'))
+
+    # Proyección 2D con las etiquetas, para los gráficos de dispersión (se calcula una vez)
+    with medir('proyeccion_2d', datos=matriz_filtrada):
+        proyeccion, varianza_2d = calcular_proyeccion(matriz_resultados)
+    guardar_proyeccion(proyeccion, varianza_2d, escritor)
 
     print(f"   Resultados guardados en: {resultados_path}")
     print(f"   Resumen guardado en: {resumen_path}")
@@ -1,12 +1,44 @@
 import pandas as pd
 import numpy as np
 import os
-from sklearn.cluster import KMeans, DBSCAN, AgglomerativeClustering
+from sklearn.cluster import KMeans, DBSCAN
 from sklearn.metrics import silhouette_score, davies_bouldin_score, calinski_harabasz_score
-
-
-def comparar_algoritmos_clustering():
-    """Comparar diferentes algoritmos de clustering"""
+from reduccion_dimensional import reducir_svd
+from busqueda_k import buscar_mejor_k, rango_k_por_defecto
+from jerarquico_escalable import (preparar_jerarquico_escalable, jerarquico_escalable,
+                                  linkage_jerarquico, cortar_linkage, UMBRAL_JERARQUICO_DENSO)
+from comunidades_grafo import grafo_pedidos_compartidos, detectar_comunidades
+from espectral import vectores_espectrales, espectral_por_k
+from persistencia import escribir, escribir_texto
+from resultados import guardar_tabla
+from instrumentacion import instrumentar, medir
+
+
+@instrumentar('comparar_algoritmos')
+def comparar_algoritmos_clustering(matriz=None, n_componentes=None, k_max=None, max_ajustes=None, tiempo_max=None,
+                                   jerarquico_knn=None, usar_birch=False,
+                                   min_compartidos=1, top_k_grafo=20, escritor=None):
+    """Comparar diferentes algoritmos de clustering
+
+    Con n_componentes, K-Means y Jerárquico se ajustan sobre el embedding
+    TruncatedSVD; todas las métricas se calculan sobre la matriz original.
+    K se elige con la búsqueda adaptativa de busqueda_k (k_max, max_ajustes
+    y tiempo_max limitan el presupuesto de cada algoritmo).
+
+    Con jerarquico_knn (número de vecinos) el Jerárquico usa Ward con
+    restricción de conectividad kNN Jaccard, opcionalmente sobre subclusters
+    BIRCH; se activa solo con más de UMBRAL_JERARQUICO_DENSO comunidades.
+
+    Louvain trabaja sobre el grafo de pedidos compartidos (umbral
+    min_compartidos y poda top_k_grafo aristas por comunidad).
+
+    El Espectral calcula una sola vez los autovectores de la afinidad
+    Jaccard kNN y corta cada K de la búsqueda a partir de ellos.
+
+    La matriz puede pasarse en memoria; si no, se lee de
+    matriz_clustering_final.csv. escritor controla cómo se guarda la
+    comparación (ver persistencia.crear_escritor).
+    """
 
     print("COMPARACIÓN DE ALGORITMOS DE CLUSTERING")
     print("=" * 70)
@@ -16,7 +48,8 @@ def comparar_algoritmos_clustering():
     proyecto_dir = os.path.dirname(script_dir)
     matriz_path = os.path.join(proyecto_dir, "data", "results", "matriz_clustering_final.csv")
 
-    matriz = pd.read_csv(matriz_path, index_col=0, encoding='utf-8-sig')
+    if matriz is None:
+        matriz = pd.read_csv(matriz_path, index_col=0, encoding='utf-8-sig')
 
     # Filtrar comunidades con 2+ pedidos
     pedidos_por_comunidad = matriz.sum(axis=1)
@@ -25,27 +58,38 @@ def comparar_algoritmos_clustering():
 
     print(f"\nDatos: {matriz_filtrada.shape[0]} comunidades, {matriz_filtrada.shape[1]} pedidos")
 
+    if n_componentes:
+        X_reducido, varianza = reducir_svd(matriz_filtrada, n_componentes)
+        print(f"Reducción SVD: {X_reducido.shape[1]} componentes ({varianza.sum() * 100:.1f}% varianza)")
+    else:
+        X_reducido = X
+
+    if k_max is None:
+        _, k_max = rango_k_por_defecto(X.shape[0])
+
     resultados = []
 
     # 1. K-MEANS (ya lo hiciste, pero vamos a documentar mejor)
     print("\n1. K-MEANS:")
-    mejor_kmeans_score = -1
-    mejor_kmeans_k = 0
 
-    for k in range(2, 11):
+    def evaluar_kmeans(k):
         kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-        labels = kmeans.fit_predict(X)
+        with medir('kmeans_fit', k=k, datos=X_reducido):
+            labels = kmeans.fit_predict(X_reducido)
 
         if len(np.unique(labels)) > 1:
-            silhouette = silhouette_score(X, labels)
+            with medir('silhouette', k=k, datos=X):
+                silhouette = silhouette_score(X, labels)
             davies = davies_bouldin_score(X, labels)
             calinski = calinski_harabasz_score(X, labels)
 
-            if silhouette > mejor_kmeans_score:
-                mejor_kmeans_score = silhouette
-                mejor_kmeans_k = k
-
             print(f"   K={k}: Silhouette={silhouette:.3f}, Davies={davies:.3f}, Calinski={calinski:.0f}")
+            return silhouette
+
+    busqueda_kmeans = buscar_mejor_k(evaluar_kmeans, k_min=2, k_max=k_max,
+                                     max_ajustes=max_ajustes, tiempo_max=tiempo_max)
+    mejor_kmeans_k = busqueda_kmeans['mejor_k']
+    mejor_kmeans_score = busqueda_kmeans['mejor_score']
 
     resultados.append({
         'algoritmo': 'K-Means',
@@ -68,12 +112,14 @@ def comparar_algoritmos_clustering():
     for eps in eps_values:
         for min_samples in min_samples_values:
             dbscan = DBSCAN(eps=eps, min_samples=min_samples)
-            labels = dbscan.fit_predict(X)
+            with medir('dbscan_fit', eps=eps, min_samples=min_samples, datos=X):
+                labels = dbscan.fit_predict(X)
 
             n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
 
             if n_clusters > 1:
-                silhouette = silhouette_score(X, labels)
+                with medir('silhouette', k=n_clusters, datos=X):
+                    silhouette = silhouette_score(X, labels)
 
                 if silhouette > mejor_dbscan_score:
                     mejor_dbscan_score = silhouette
@@ -94,19 +140,37 @@ def comparar_algoritmos_clustering():
     # 3. CLUSTERING JERÁRQUICO
     print("\n3. CLUSTERING JERÁRQUICO:")
 
-    mejor_hier_score = -1
-    mejor_hier_k = 0
-
-    for k in range(2, 11):
-        hierarchical = AgglomerativeClustering(n_clusters=k)
-        labels = hierarchical.fit_predict(X)
+    if jerarquico_knn is None and X.shape[0] > UMBRAL_JERARQUICO_DENSO:
+        jerarquico_knn = 10
+
+    modelo_escalable = None
+    if jerarquico_knn:
+        modelo_escalable = preparar_jerarquico_escalable(matriz_filtrada, n_vecinos=jerarquico_knn,
+                                                         usar_birch=usar_birch,
+                                                         caracteristicas=X_reducido)
+        print(f"   Modo escalable: conectividad kNN Jaccard (k={jerarquico_knn})"
+              f"{' + subclusters BIRCH' if usar_birch else ''}")
+        arbol = modelo_escalable['linkage']
+    else:
+        # Árbol Ward completo una sola vez (cacheado en disco); cada K es un corte
+        with medir('jerarquico_linkage', datos=X_reducido):
+            arbol = linkage_jerarquico(X_reducido)
+
+    def evaluar_jerarquico(k):
+        with medir('jerarquico_fit', k=k, datos=X_reducido):
+            if modelo_escalable is not None:
+                labels = jerarquico_escalable(modelo_escalable, k)
+            else:
+                labels = cortar_linkage(arbol, k)
 
         if len(np.unique(labels)) > 1:
-            silhouette = silhouette_score(X, labels)
+            with medir('silhouette', k=k, datos=X):
+                return silhouette_score(X, labels)
 
-            if silhouette > mejor_hier_score:
-                mejor_hier_score = silhouette
-                mejor_hier_k = k
+    busqueda_hier = buscar_mejor_k(evaluar_jerarquico, k_min=2, k_max=k_max,
+                                   max_ajustes=max_ajustes, tiempo_max=tiempo_max)
+    mejor_hier_k = busqueda_hier['mejor_k']
+    mejor_hier_score = busqueda_hier['mejor_score']
 
     print(f"   Mejor K={mejor_hier_k}, Silhouette={mejor_hier_score:.3f}")
 
@@ -118,7 +182,78 @@ def comparar_algoritmos_clustering():
         'desventajas': 'Computacionalmente costoso, sensible a outliers'
     })
 
-    # 4. COMPARACIÓN FINAL
+    # 4. DETECCIÓN DE COMUNIDADES EN GRAFO (LOUVAIN)
+    print("\n4. COMUNIDADES EN GRAFO (LOUVAIN):")
+
+    with medir('grafo_pedidos', datos=matriz_filtrada):
+        grafo = grafo_pedidos_compartidos(matriz_filtrada, min_compartidos=min_compartidos, top_k=top_k_grafo)
+    print(f"   Grafo: {grafo.shape[0]} nodos, {grafo.nnz // 2} aristas")
+
+    mejor_grafo_score = -1
+    mejor_grafo_params = {}
+
+    for resolucion in [0.5, 1.0, 1.5, 2.0]:
+        with medir('louvain_fit', resolucion=resolucion, aristas=grafo.nnz // 2):
+            labels = detectar_comunidades(grafo, resolucion=resolucion)
+        n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
+
+        # Las comunidades aisladas (-1) son ruido: el Silhouette se mide sin ellas
+        asignadas = labels != -1
+        if 1 < n_clusters < asignadas.sum():
+            with medir('silhouette', k=n_clusters, datos=X):
+                silhouette = silhouette_score(X[asignadas], labels[asignadas])
+            print(f"   Resolución={resolucion}: {n_clusters} comunidades "
+                  f"({(~asignadas).sum()} aisladas), Silhouette={silhouette:.3f}")
+
+            if silhouette > mejor_grafo_score:
+                mejor_grafo_score = silhouette
+                mejor_grafo_params = {'resolucion': resolucion, 'n_clusters': n_clusters}
+
+    if mejor_grafo_score > -1:
+        print(f"   Mejor: resolución={mejor_grafo_params['resolucion']}, "
+              f"Clusters: {mejor_grafo_params['n_clusters']}, Silhouette={mejor_grafo_score:.3f}")
+
+        resultados.append({
+            'algoritmo': 'Louvain (grafo)',
+            'clusters': mejor_grafo_params['n_clusters'],
+            'silhouette': mejor_grafo_score,
+            'ventajas': 'Usa directamente la red de pedidos compartidos, no requiere K',
+            'desventajas': 'Comunidades aisladas quedan como ruido, depende del umbral de aristas'
+        })
+
+    # 5. CLUSTERING ESPECTRAL
+    print("\n5. CLUSTERING ESPECTRAL:")
+
+    with medir('vectores_espectrales', datos=matriz_filtrada):
+        vectores = vectores_espectrales(matriz_filtrada, n_vectores=k_max)
+    print(f"   Autovectores calculados: {vectores.shape[1]} (afinidad Jaccard kNN)")
+
+    def evaluar_espectral(k):
+        if k > vectores.shape[1]:
+            return None
+        with medir('espectral_fit', k=k, datos=vectores):
+            labels = espectral_por_k(vectores, k)
+
+        if len(np.unique(labels)) > 1:
+            with medir('silhouette', k=k, datos=X):
+                return silhouette_score(X, labels)
+
+    busqueda_espectral = buscar_mejor_k(evaluar_espectral, k_min=2, k_max=min(k_max, vectores.shape[1]),
+                                        max_ajustes=max_ajustes, tiempo_max=tiempo_max)
+    mejor_espectral_k = busqueda_espectral['mejor_k']
+    mejor_espectral_score = busqueda_espectral['mejor_score']
+
+    print(f"   Mejor K={mejor_espectral_k}, Silhouette={mejor_espectral_score:.3f}")
+
+    resultados.append({
+        'algoritmo': 'Espectral',
+        'mejor_k': mejor_espectral_k,
+        'silhouette': mejor_espectral_score,
+        'ventajas': 'Aprovecha la estructura de co-ocurrencia, un solo cálculo de autovectores para todos los K',
+        'desventajas': 'Depende del número de vecinos del grafo de afinidad'
+    })
+
+    # 6. COMPARACIÓN FINAL
     print("\n" + "=" * 70)
     print("COMPARACIÓN FINAL DE ALGORITMOS")
     print("=" * 70)
@@ -143,6 +278,10 @@ def comparar_algoritmos_clustering():
             print("Buen equilibrio velocidad-calidad")
         elif resultado['algoritmo'] == 'DBSCAN':
             print("Mejor para datos con outliers")
+        elif resultado['algoritmo'] == 'Louvain (grafo)':
+            print("Mejor para estructura de red")
+        elif resultado['algoritmo'] == 'Espectral':
+            print("Mejor para estructura de co-ocurrencia")
         else:
             print("Mejor para visualización jerárquica")
 
@@ -152,21 +291,37 @@ def comparar_algoritmos_clustering():
     results_dir = os.path.join(proyecto_dir, "data", "results")
     comparacion_path = os.path.join(results_dir, "comparacion_algoritmos.txt")
 
-    with open(comparacion_path, 'w', encoding='utf-8') as f:
-        f.write("COMPARACIÓN DE ALGORITMOS DE CLUSTERING\n")
-        f.write("=" * 50 + "\n\n")
-
-        f.write("RESUMEN:\n")
-        f.write(f"- Mejor algoritmo: {mejor_algoritmo}\n")
-        f.write(f"- Score Silhouette: {mejor_score:.3f}\n")
-        f.write(f"- Comunidades analizadas: {matriz_filtrada.shape[0]}\n\n")
-
-        f.write("DETALLE POR ALGORITMO:\n")
-        for resultado in resultados:
-            f.write(f"\n{resultado['algoritmo']}:\n")
-            f.write(f"  Score Silhouette: {resultado['silhouette']:.3f}\n")
-            f.write(f"  Ventajas: {resultado['ventajas']}\n")
-            f.write(f"  Desventajas: {resultado['desventajas']}\n")
+    lineas = ["COMPARACIÓN DE ALGORITMOS DE CLUSTERING\n",
+              "=" * 50 + "\n\n",
+              "RESUMEN:\n",
+              f"- Mejor algoritmo: {mejor_algoritmo}\n",
+              f"- Score Silhouette: {mejor_score:.3f}\n",
+              f"- Comunidades analizadas: {matriz_filtrada.shape[0]}\n\n",
+              "DETALLE POR ALGORITMO:\n"]
+    for resultado in resultados:
+        lineas.append(f"\n{resultado['algoritmo']}:\n")
+        lineas.append(f"  Score Silhouette: {resultado['silhouette']:.3f}\n")
+        lineas.append(f"  Ventajas: {resultado['ventajas']}\n")
+        lineas.append(f"  Desventajas: {resultado['desventajas']}\n")
+    escribir(escritor, escribir_texto, comparacion_path, lineas)
+
+    metricas = pd.DataFrame([{
+        'algoritmo': resultado['algoritmo'],
+        'n_clusters': resultado.get('mejor_k', resultado.get('clusters')),
+        'silhouette': resultado['silhouette'],
+        'ventajas': resultado['ventajas'],
+        'desventajas': resultado['desventajas']
+    } for resultado in resultados])
+    escribir(escritor, guardar_tabla, 'metricas_algoritmos', metricas)
+
+    # Árbol jerárquico para el dendrograma (dendrograma.py lo dibuja sin reajustar)
+    escribir(escritor, guardar_tabla, 'linkage_jerarquico',
+             pd.DataFrame(arbol, columns=['hijo_1', 'hijo_2', 'distancia', 'n_hojas']))
+    # Con subclusters BIRCH cada hoja del árbol agrupa varias comunidades
+    comunidades_hoja = (modelo_escalable['tamanos'] if modelo_escalable and modelo_escalable['usar_birch']
+                        else np.ones(len(arbol) + 1, dtype=np.int64))
+    escribir(escritor, guardar_tabla, 'hojas_jerarquico',
+             pd.DataFrame({'hoja': np.arange(len(comunidades_hoja)), 'n_comunidades': comunidades_hoja}))
 
     print(f"\n📄 Comparación guardada en: {comparacion_path}")
 
@@ -0,0 +1,73 @@
+import numpy as np
+import networkx as nx
+from scipy import sparse
+from reduccion_dimensional import a_matriz_dispersa
+from grafo_similitud import intersecciones_por_bloque, top_k_por_fila
+
+
+def grafo_pedidos_compartidos(matriz, min_compartidos=1, top_k=None, tam_bloque=4096):
+    """Grafo disperso ponderado por número de pedidos compartidos
+
+    Los conteos X·Xᵀ se calculan por bloques de filas; en cada bloque se
+    aplica el umbral min_compartidos y la poda top_k antes de acumular, de
+    modo que nunca hay un bucle por arista en Python. Devuelve una matriz
+    CSR simétrica sin diagonal.
+    """
+
+    X = a_matriz_dispersa(matriz)
+    X.data[:] = 1
+    n = X.shape[0]
+
+    if top_k is not None:
+        # Con poda top-k conviene el producto denso por bloque + argpartition
+        filas, columnas, pesos = [], [], []
+        for inicio, fin, conteos in intersecciones_por_bloque(X):
+            conteos[np.arange(fin - inicio), np.arange(inicio, fin)] = 0
+            conteos[conteos < min_compartidos] = 0
+
+            f, c, v = top_k_por_fila(conteos, inicio, top_k)
+            filas.append(f)
+            columnas.append(c)
+            pesos.append(v)
+
+        grafo = sparse.csr_matrix((np.concatenate(pesos), (np.concatenate(filas), np.concatenate(columnas))),
+                                  shape=(n, n))
+        return grafo.maximum(grafo.T).tocsr()
+
+    X_t = X.T.tocsc()
+    bloques = []
+    for inicio in range(0, n, tam_bloque):
+        fin = min(inicio + tam_bloque, n)
+
+        conteos = (X[inicio:fin] @ X_t).tocoo()
+        mascara = (conteos.data >= min_compartidos) & (conteos.row + inicio != conteos.col)
+        bloques.append(sparse.csr_matrix((conteos.data[mascara], (conteos.row[mascara], conteos.col[mascara])),
+                                         shape=(fin - inicio, n)))
+
+    grafo = sparse.vstack(bloques).tocsr()
+    return grafo.maximum(grafo.T).tocsr()
+
+
+def detectar_comunidades(grafo, resolucion=1.0, min_tamano=2, random_state=42):
+    """Detección de comunidades por modularidad (Louvain de networkx)
+
+    Devuelve un array de etiquetas por nodo, numeradas por tamaño
+    decreciente. Los grupos con menos de min_tamano nodos (por ejemplo,
+    comunidades aisladas) reciben la etiqueta -1, como el ruido de DBSCAN.
+    """
+
+    G = nx.from_scipy_sparse_array(grafo, edge_attribute='weight')
+    grupos = nx.community.louvain_communities(G, weight='weight',
+                                              resolution=resolucion,
+                                              seed=random_state)
+    grupos = sorted(grupos, key=len, reverse=True)
+
+    labels = np.full(grafo.shape[0], -1)
+    etiqueta = 0
+    for grupo in grupos:
+        if len(grupo) < min_tamano:
+            continue
+        labels[list(grupo)] = etiqueta
+        etiqueta += 1
+
+    return labels
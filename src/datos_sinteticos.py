@@ -0,0 +1,361 @@
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from canonicalizacion import quitar_tildes
+from fuentes import cargar_registro_fuentes, construir_pedido, unir_fuentes
+
+# Pedidos reales más frecuentes de Archivo 1 (ASUNTO, TIPO DE SERVICIO) y su peso relativo
+PEDIDOS_CABEZA = [
+    ('REGISTRO DE DIRECTIVA', 'Registro y actualización de Directiva', 0.630),
+    ('PERSONERIA JURIDICA', 'Personería jurídica a organizaciones sin fines de lucro', 0.070),
+    ('PERSONERIA JURIDICA', 'Personería jurídica de las comunas y comunidades', 0.040),
+    ('INCLUSIÓN DE SOCIOS', 'Registro de inclusión y/o exclusión de miembros', 0.030),
+    ('REFORMA DE ESTATUTO', 'Reforma y mejoramiento del Estatuto', 0.028),
+    ('EXCLUSIÓN DE SOCIOS', 'Registro de inclusión y/o exclusión de miembros', 0.012),
+    ('PERSONERIA JURIDICA', 'Registro y otorgamiento de personería jurídica a organizaciones sin fines de lucro', 0.012),
+    ('REFORMA DE ESTATUTO', 'Reforma y Mejoramiento de los Estatutos', 0.010),
+]
+
+# Piezas para la cola larga de pedidos poco frecuentes
+ASUNTOS_COLA = ['DISOLUCIÓN', 'LIQUIDACIÓN', 'CAMBIO DE DENOMINACIÓN', 'CERTIFICACIÓN', 'REINGRESO DE SOCIOS',
+                'RECTIFICACIÓN', 'REVOCATORIA', 'ACLARATORIA', 'REGISTRO DE DIRECTIVA', 'INCLUSIÓN DE SOCIOS']
+TIPOS_COLA = ['Registro y actualización de Directiva', 'Reforma y codificación del Estatuto',
+              'Personería jurídica de fundaciones', 'Personería jurídica de Pueblos y Nacionalidades',
+              'Registro de inclusión y/o exclusión de miembros o socios', 'Otros']
+
+PREFIJOS_ORGANIZACION = ['COMUNIDAD', 'COMUNIDAD', 'CENTRO SHUAR', 'ASOCIACIÓN', 'FUNDACIÓN', 'COMUNA',
+                         'ORGANIZACIÓN', 'PUEBLO', 'CORPORACIÓN', 'COMITÉ']
+CONECTORES = ['', '', 'DE', 'SAN', 'SANTA', 'DE MUJERES', 'KICHWA', 'AGRÍCOLA']
+SILABAS = ['SA', 'AN', 'TA', 'CO', 'CHA', 'YA', 'KU', 'RA', 'PA', 'LLA', 'MA', 'NI', 'TO', 'CA', 'HUA',
+           'QUI', 'RÍ', 'MÁ', 'NÚ', 'ZA', 'LO', 'PI', 'GUA', 'SHI', 'WA', 'NA', 'TU', 'CE', 'BO', 'ÑA']
+
+PROVINCIAS = ['AZUAY', 'BOLIVAR', 'CAÑAR', 'CARCHI', 'CHIMBORAZO', 'COTOPAXI', 'EL ORO', 'ESMERALDAS',
+              'GALÁPAGOS', 'GUAYAS', 'IMBABURA', 'LOJA', 'LOS RIOS', 'MANABÍ', 'MORONA SANTIAGO', 'NAPO',
+              'ORELLANA', 'PASTAZA', 'PICHINCHA', 'SANTA ELENA', 'SANTO DOMINGO DE LOS TSÁCHILAS',
+              'SUCUMBIOS', 'TUNGURAHUA', 'ZAMORA CHINCHIPE', 'DESISTIMIENTO']
+
+APROBADORES = ['Luis Fernando Sarango Macas', 'Ángel Chela Llumiguano', 'GUILLERMO ZAPATIER']
+
+# Columnas originales de cada libro (con los espacios finales de los Excel reales)
+COLUMNAS_ARCHIVO1 = ['Nro. RESOLUCIÓN', 'FECHA DE EMISIÓN ', 'ASUNTO', 'NOMBRE DE LA ORGANIZACIÓN',
+                     'TIPO DE SERVICIO ', 'TIPO DE SERVICIO ESPECIFÍCO', 'APROBADO POR']
+COLUMNAS_ARCHIVO2 = ['Nro. ', 'Nro. RESOLUCIÓN', 'FECHA DE EMISIÓN ', 'SOLICITUD', 'FECHA SOLICITUD',
+                     'NOMBRE DE LA ORGANIZACIÓN', 'PROVINCIA']
+
+MAX_FILAS_EXCEL = 1_048_576
+
+
+def pesos_zipf(n, exponente):
+    """Probabilidades proporcionales a 1/rango^exponente"""
+
+    pesos = 1.0 / np.arange(1, n + 1) ** exponente
+    return pesos / pesos.sum()
+
+
+def catalogo_pedidos(n_pedidos, exponente=1.1):
+    """Catálogo (ASUNTO, TIPO DE SERVICIO) con cabeza real y cola de ley de potencias
+
+    Los pedidos de PEDIDOS_CABEZA conservan su peso observado; el resto de
+    la masa se reparte con pesos Zipf entre combinaciones de la cola larga.
+    """
+
+    cabeza = PEDIDOS_CABEZA[:n_pedidos]
+    cola = [(asunto, tipo) for tipo in TIPOS_COLA for asunto in ASUNTOS_COLA
+            if (asunto, tipo) not in {(a, t) for a, t, _ in cabeza}]
+
+    n_cola = max(n_pedidos - len(cabeza), 0)
+    # Si la cola combinatoria no alcanza, se numeran asuntos adicionales
+    cola += [(f"{ASUNTOS_COLA[i % len(ASUNTOS_COLA)]} {i // len(ASUNTOS_COLA) + 1}",
+              TIPOS_COLA[i % len(TIPOS_COLA)]) for i in range(max(n_cola - len(cola), 0))]
+    cola = cola[:n_cola]
+
+    peso_cabeza = np.array([p for _, _, p in cabeza])
+    peso_cola = (1 - peso_cabeza.sum()) * pesos_zipf(n_cola, exponente) if n_cola else np.array([])
+    if not n_cola:
+        peso_cabeza = peso_cabeza / peso_cabeza.sum()
+
+    catalogo = pd.DataFrame([(a, t) for a, t, _ in cabeza] + cola, columns=['ASUNTO', 'TIPO DE SERVICIO'])
+    catalogo['PESO'] = np.concatenate([peso_cabeza, peso_cola])
+    return catalogo
+
+
+def generar_nombres(n, rng, n_palabras=None):
+    """n nombres de organización distintos: prefijo + conector + 1 a 3 palabras inventadas"""
+
+    # Vocabulario de palabras de 2 a 4 sílabas; crece con n para que haya pocas colisiones
+    n_palabras = n_palabras or max(3000, n // 20)
+    longitudes = rng.integers(2, 5, size=n_palabras)
+    indices = rng.integers(0, len(SILABAS), size=(n_palabras, 4))
+    vocabulario = np.array([''.join(SILABAS[j] for j in fila[:l]) for fila, l in zip(indices, longitudes)],
+                           dtype=object)
+
+    nombres = pd.Series(dtype=object)
+    faltan = n
+    while faltan > 0:
+        m = int(faltan * 1.1) + 10
+        prefijo = np.array(PREFIJOS_ORGANIZACION, dtype=object)[rng.integers(0, len(PREFIJOS_ORGANIZACION), m)]
+        conector = np.array(CONECTORES, dtype=object)[rng.integers(0, len(CONECTORES), m)]
+        palabras = vocabulario[rng.integers(0, n_palabras, size=(m, 3))]
+        n_usadas = rng.integers(1, 4, size=m)
+
+        nombre = pd.Series(prefijo + ' ' + conector + ' ' + palabras[:, 0])
+        nombre = nombre.where(n_usadas < 2, nombre + ' ' + palabras[:, 1])
+        nombre = nombre.where(n_usadas < 3, nombre + ' ' + palabras[:, 2])
+        nombre = nombre.str.replace('  ', ' ', regex=False)
+
+        nombres = pd.concat([nombres, nombre], ignore_index=True).drop_duplicates()
+        faltan = n - len(nombres)
+
+    return nombres.iloc[:n].to_numpy(dtype=object)
+
+
+def variante_nombre(nombre, tipo):
+    """Variante de escritura de un nombre, como las que aparecen en los libros reales"""
+
+    if tipo == 1:
+        return quitar_tildes(nombre)
+    if tipo == 2:
+        primera, _, resto = nombre.partition(' ')
+        return f'{primera} "{resto}"' if resto else nombre
+    if tipo == 3:
+        return '  '.join(nombre.split(' ')) + ' '
+    if tipo == 4:
+        # Errata: dos letras contiguas intercambiadas en la última palabra
+        i = nombre.rfind(' ') + 1
+        if len(nombre) - i < 3:
+            return nombre
+        return nombre[:i] + nombre[i + 1] + nombre[i] + nombre[i + 2:]
+    if tipo == 5:
+        return nombre.title()
+    return nombre
+
+
+N_TIPOS_VARIANTE = 5
+
+
+def aplicar_variantes(codigos, nombres, prob_variantes, rng):
+    """Nombres por fila con variantes de escritura en una fracción de las filas
+
+    Cada par (organización, tipo de variante) distinto se genera una sola
+    vez y se expande a las filas, para que el coste no dependa del número
+    de filas sino del de organizaciones.
+    """
+
+    tipos = np.where(rng.random(len(codigos)) < prob_variantes,
+                     rng.integers(1, N_TIPOS_VARIANTE + 1, len(codigos)), 0)
+    claves = codigos.astype(np.int64) * (N_TIPOS_VARIANTE + 1) + tipos
+    unicas, inversa = np.unique(claves, return_inverse=True)
+
+    textos = np.array([variante_nombre(nombres[c // (N_TIPOS_VARIANTE + 1)], c % (N_TIPOS_VARIANTE + 1))
+                       for c in unicas], dtype=object)
+    return textos[inversa]
+
+
+def codigos_secuenciales(prefijo, anios, sufijo, ancho):
+    """Códigos 'PREFIJO-AÑO-NNNN-SUFIJO' con un contador por año"""
+
+    anios = pd.Series(anios)
+    contador = anios.groupby(anios).cumcount() + 1
+    return (prefijo + '-' + anios.astype(str) + '-' + contador.astype(str).str.zfill(ancho) + '-' + sufijo).to_numpy()
+
+
+def fechas_aleatorias(n, rng, inicio='2022-01-01', fin='2025-09-30'):
+    """Fechas uniformes entre inicio y fin (sin hora)"""
+
+    inicio, fin = pd.Timestamp(inicio), pd.Timestamp(fin)
+    dias = rng.integers(0, (fin - inicio).days + 1, n)
+    return (inicio + pd.to_timedelta(dias, unit='D')).to_numpy()
+
+
+def anular(df, columnas, prob_nulos, rng):
+    """Vaciar al azar una fracción prob_nulos de cada columna"""
+
+    for col in columnas:
+        mascara = rng.random(len(df)) < prob_nulos
+        if mascara.any():
+            df[col] = df[col].mask(mascara)
+
+
+def duplicar_filas(df, prob_duplicados, rng):
+    """Reemplazar una fracción de filas por copias de otras (misma resolución)"""
+
+    n_dup = int(round(len(df) * prob_duplicados))
+    if n_dup == 0 or len(df) < 2:
+        return df
+
+    destino = rng.choice(len(df), n_dup, replace=False)
+    origen = rng.integers(0, len(df), n_dup)
+    indice = np.arange(len(df))
+    indice[destino] = origen
+    return df.iloc[indice].reset_index(drop=True)
+
+
+def generar_datos_sinteticos(n_filas=10_000, fraccion_archivo1=0.85, organizaciones_por_fila=0.8,
+                             n_pedidos=150, exponente_pedidos=1.1, exponente_organizaciones=0.8,
+                             prob_variantes=0.05, prob_duplicados=0.01, prob_nulos=0.003,
+                             random_state=42):
+    """Generar dos libros con el esquema de Archivo 1 y Archivo 2
+
+    La popularidad de los pedidos sigue la cabeza real ("REGISTRO DE
+    DIRECTIVA" con ~63 % de las resoluciones) más una cola de ley de
+    potencias; la actividad de las organizaciones también es de tipo Zipf,
+    de modo que unas pocas acumulan muchos trámites y la mayoría uno solo.
+    Una fracción prob_variantes de los nombres se escribe con otra grafía
+    (sin tildes, comillas, espacios, erratas, mayúsculas), prob_duplicados
+    de las filas repiten una resolución y prob_nulos de las celdas de texto
+    quedan vacías.
+
+    Todo se genera con operaciones vectorizadas sobre arrays, así que el
+    tamaño puede ir de 10³ a 10⁷ filas. Devuelve (df1, df2) con los nombres
+    de columna originales de los Excel.
+    """
+
+    rng = np.random.default_rng(random_state)
+
+    n1 = int(round(n_filas * fraccion_archivo1))
+    n2 = n_filas - n1
+    n_organizaciones = max(int(n_filas * organizaciones_por_fila), 1)
+
+    # Organizaciones con actividad Zipf (la permutación evita que el orden alfabético marque la actividad)
+    nombres = generar_nombres(n_organizaciones, rng)
+    probabilidad_org = pesos_zipf(n_organizaciones, exponente_organizaciones)[rng.permutation(n_organizaciones)]
+    codigos = rng.choice(n_organizaciones, size=n_filas, p=probabilidad_org)
+    nombre_fila = aplicar_variantes(codigos, nombres, prob_variantes, rng)
+
+    emision = fechas_aleatorias(n_filas, rng)
+    anios = pd.DatetimeIndex(emision).year.to_numpy()
+    ancho = max(4, len(str(n_filas)))
+    resoluciones = codigos_secuenciales('SGDPN-DRCPN', anios, 'R', ancho)
+
+    # Archivo 1: pedidos del catálogo
+    catalogo = catalogo_pedidos(n_pedidos, exponente_pedidos)
+    pedido = rng.choice(len(catalogo), size=n1, p=catalogo['PESO'].to_numpy())
+    tipos = catalogo['TIPO DE SERVICIO'].to_numpy()[pedido]
+    df1 = pd.DataFrame({
+        'Nro. RESOLUCIÓN': resoluciones[:n1],
+        'FECHA DE EMISIÓN ': emision[:n1],
+        'ASUNTO': catalogo['ASUNTO'].to_numpy()[pedido],
+        'NOMBRE DE LA ORGANIZACIÓN': nombre_fila[:n1],
+        'TIPO DE SERVICIO ': tipos,
+        'TIPO DE SERVICIO ESPECIFÍCO': tipos,
+        'APROBADO POR': np.array(APROBADORES, dtype=object)[rng.choice(len(APROBADORES), n1, p=[0.95, 0.035, 0.015])]
+    }, columns=COLUMNAS_ARCHIVO1)
+
+    # Archivo 2: solicitudes con código propio y fecha anterior a la resolución
+    retraso = pd.to_timedelta(rng.integers(10, 300, n2), unit='D')
+    solicitud = pd.DatetimeIndex(emision[n1:]) - retraso
+    df2 = pd.DataFrame({
+        'Nro. ': np.arange(1, n2 + 1),
+        'Nro. RESOLUCIÓN': resoluciones[n1:],
+        'FECHA DE EMISIÓN ': emision[n1:],
+        'SOLICITUD': codigos_secuenciales('SGDPN-SGDPN', solicitud.year.to_numpy(), 'E', ancho),
+        'FECHA SOLICITUD': solicitud.to_numpy(),
+        'NOMBRE DE LA ORGANIZACIÓN': nombre_fila[n1:],
+        'PROVINCIA': np.array(PROVINCIAS, dtype=object)[rng.choice(len(PROVINCIAS), n2,
+                                                                   p=pesos_zipf(len(PROVINCIAS), 0.7))]
+    }, columns=COLUMNAS_ARCHIVO2)
+
+    df1 = duplicar_filas(df1, prob_duplicados, rng)
+    df2 = duplicar_filas(df2, prob_duplicados, rng)
+    anular(df1, ['ASUNTO', 'NOMBRE DE LA ORGANIZACIÓN', 'TIPO DE SERVICIO ', 'APROBADO POR'], prob_nulos, rng)
+    anular(df2, ['SOLICITUD', 'FECHA SOLICITUD', 'NOMBRE DE LA ORGANIZACIÓN', 'PROVINCIA'], prob_nulos, rng)
+
+    return df1, df2
+
+
+def obtener_sinteticos_dir(etiqueta):
+    """Directorio data/sinteticos/<etiqueta>/"""
+
+    proyecto_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sinteticos_dir = os.path.join(proyecto_dir, "data", "sinteticos", etiqueta)
+    os.makedirs(sinteticos_dir, exist_ok=True)
+    return sinteticos_dir
+
+
+def guardar_datos_sinteticos(df1, df2, etiqueta=None, formato='auto'):
+    """Guardar los libros sintéticos y un registro de fuentes para leerlos
+
+    formato 'xlsx' reproduce los Excel reales (Archivo 1 con el encabezado
+    en la fila 5); 'csv' es mucho más rápido y no tiene el límite de filas
+    de Excel. Con 'auto' se usa xlsx hasta 10⁵ filas y csv por encima.
+
+    Devuelve la ruta del registro (fuentes.json), utilizable como
+    registro_fuentes en preprocesamiento_completo.
+    """
+
+    etiqueta = etiqueta or f"n{len(df1) + len(df2)}"
+    if formato == 'auto':
+        formato = 'xlsx' if len(df1) + len(df2) <= 100_000 else 'csv'
+    if formato == 'xlsx' and max(len(df1) + 5, len(df2) + 1) > MAX_FILAS_EXCEL:
+        raise ValueError(f"Excel admite como máximo {MAX_FILAS_EXCEL} filas por hoja; use formato='csv'")
+
+    sinteticos_dir = obtener_sinteticos_dir(etiqueta)
+    archivo1 = f"archivo1_sintetico.{formato}"
+    archivo2 = f"archivo2_sintetico.{formato}"
+
+    if formato == 'xlsx':
+        df1.to_excel(os.path.join(sinteticos_dir, archivo1), index=False, startrow=4)
+        df2.to_excel(os.path.join(sinteticos_dir, archivo2), index=False)
+    else:
+        df1.to_csv(os.path.join(sinteticos_dir, archivo1), index=False, encoding='utf-8-sig')
+        df2.to_csv(os.path.join(sinteticos_dir, archivo2), index=False, encoding='utf-8-sig')
+
+    # Mismo registro que data/fuentes.json, apuntando a los archivos sintéticos
+    fuentes = cargar_registro_fuentes()
+    for fuente, archivo, header in zip(fuentes, [archivo1, archivo2], [4 if formato == 'xlsx' else 0, 0]):
+        fuente['patron'] = f"sinteticos/{etiqueta}/{archivo}"
+        fuente['header'] = header
+        fuente['engine'] = None
+        fuente['hojas'] = 0
+
+    registro_path = os.path.join(sinteticos_dir, "fuentes.json")
+    with open(registro_path, 'w', encoding='utf-8') as f:
+        json.dump({'fuentes': fuentes}, f, indent=2, ensure_ascii=False)
+
+    return registro_path
+
+
+def registros_sinteticos(n_filas=10_000, **parametros):
+    """Almacén combinado sintético con el esquema de registros_preprocesados.csv
+
+    Atajo para medir las etapas posteriores al preprocesamiento sin pasar
+    por Excel: columnas en mayúsculas, sin filas sin organización ni
+    resoluciones repetidas, valores por defecto, PEDIDO_UNIFICADO y FUENTE.
+    """
+
+    df1, df2 = generar_datos_sinteticos(n_filas, **parametros)
+
+    tablas = []
+    for fuente, df in zip(cargar_registro_fuentes(), [df1, df2]):
+        df.columns = [col.strip().upper() for col in df.columns]
+        df = df.dropna(subset=['NOMBRE DE LA ORGANIZACIÓN'])
+        df = df.drop_duplicates(subset=['NRO. RESOLUCIÓN'], keep='first').copy()
+        df['NOMBRE DE LA ORGANIZACIÓN'] = df['NOMBRE DE LA ORGANIZACIÓN'].str.upper().str.split().str.join(' ')
+        df = df.fillna({col: valor for col, valor in fuente['rellenar'].items() if col in df.columns})
+        construir_pedido(df, fuente)
+        tablas.append((fuente, df))
+
+    return unir_fuentes(tablas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generar libros sintéticos con el esquema de SGDPN")
+    parser.add_argument('--filas', type=int, default=10_000, help="número total de resoluciones")
+    parser.add_argument('--formato', choices=['auto', 'xlsx', 'csv'], default='auto')
+    parser.add_argument('--etiqueta', default=None, help="subdirectorio de data/sinteticos/")
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"1. GENERANDO {args.filas:,} RESOLUCIONES SINTÉTICAS...")
+    df1, df2 = generar_datos_sinteticos(args.filas, random_state=args.semilla)
+    print(f"   Archivo 1: {df1.shape}")
+    print(f"   Archivo 2: {df2.shape}")
+    print(f"   Organizaciones distintas: {pd.concat([df1, df2])['NOMBRE DE LA ORGANIZACIÓN'].nunique():,}")
+    print(f"   Pedido más frecuente: {df1['ASUNTO'].value_counts(normalize=True).head(1).to_dict()}")
+
+    print("\n2. GUARDANDO...")
+    registro_path = guardar_datos_sinteticos(df1, df2, etiqueta=args.etiqueta, formato=args.formato)
+    print(f"   Registro de fuentes: {registro_path}")
+    print(f"\n✅ Para procesarlos: preprocesamiento_completo(registro_fuentes='{registro_path}')")
@@ -0,0 +1,147 @@
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+import pandas as pd
+from canonicalizacion import quitar_tildes
+
+# Palabras que no distinguen a una organización de otra ("COMUNA X" == "X")
+PALABRAS_GENERICAS = {'COMUNA', 'COMUNIDAD', 'DE', 'DEL', 'LA', 'LAS', 'LOS', 'EL', 'Y'}
+
+
+def clave_nombre(nombre):
+    """Clave de comparación: sin tildes, sin puntuación y sin palabras genéricas"""
+
+    texto = quitar_tildes(str(nombre).upper())
+    texto = re.sub(r'[^\w\s]', ' ', texto)
+    palabras = texto.split()
+
+    distintivas = [p for p in palabras if p not in PALABRAS_GENERICAS]
+    return ' '.join(distintivas or palabras)
+
+
+def clave_fonetica(clave):
+    """Código fonético simplificado para español de las dos primeras palabras"""
+
+    texto = ''.join(clave.split()[:2])
+    for patron, reemplazo in [(r'QU', 'K'), (r'C([EI])', r'S\1'), (r'C', 'K'), (r'Z', 'S'),
+                              (r'V', 'B'), (r'LL', 'Y'), (r'H', ''), (r'W', 'U'), (r'(.)\1+', r'\1')]:
+        texto = re.sub(patron, reemplazo, texto)
+    return texto
+
+
+def ngramas(texto, n=4):
+    """Conjunto de n-gramas de caracteres (sin espacios)"""
+
+    texto = texto.replace(' ', '')
+    if len(texto) <= n:
+        return {texto}
+    return {texto[i:i + n] for i in range(len(texto) - n + 1)}
+
+
+def claves_bloqueo(claves, n_claves=3, n=4):
+    """Claves de bloqueo por nombre: su código fonético y sus n-gramas más raros
+
+    Dos nombres sólo se comparan si comparten alguna clave. Usar los
+    n-gramas menos frecuentes del registro mantiene los bloques pequeños.
+    """
+
+    gramas = {clave: ngramas(clave, n) for clave in claves}
+    frecuencia = Counter(g for conjunto in gramas.values() for g in conjunto)
+
+    bloqueo = {}
+    for clave, conjunto in gramas.items():
+        raros = sorted(conjunto, key=lambda g: (frecuencia[g], g))[:n_claves]
+        bloqueo[clave] = [f'F:{clave_fonetica(clave)}'] + [f'G:{g}' for g in raros]
+    return bloqueo
+
+
+def deduplicar_nombres(nombres, umbral=0.95, n_claves=3, max_bloque=200):
+    """Vincular variantes de un mismo nombre de organización
+
+    1. Cada nombre distinto se reduce a su clave de comparación.
+    2. Se generan bloques por clave fonética y n-gramas raros; los bloques
+       con más de max_bloque claves se descartan por poco informativos.
+    3. Dentro de cada bloque se comparan las claves con SequenceMatcher y
+       se guardan los pares con similitud >= umbral.
+    4. Las claves se recorren de más a menos registros: cada clave aún
+       libre funda un grupo y se le unen las claves libres similares a
+       ella. Todo miembro alcanza el umbral frente a la clave canónica del
+       grupo; no hay fusiones en cadena (A~B, B~C no une A con C).
+
+    Devuelve (mapa, fusiones): mapa asigna a cada nombre original su
+    ID_ORGANIZACION y nombre canónico (el más frecuente de la clave
+    canónica); fusiones es la tabla revisable de grupos con más de una
+    variante, con la similitud de cada una frente al canónico.
+    """
+
+    conteo_nombres = pd.Series(nombres).dropna().value_counts()
+    clave_por_nombre = {nombre: clave_nombre(nombre) for nombre in conteo_nombres.index}
+    claves = sorted(set(clave_por_nombre.values()))
+
+    # Bloqueo
+    bloques = defaultdict(list)
+    for clave, lista in claves_bloqueo(claves, n_claves).items():
+        for clave_bloque in lista:
+            bloques[clave_bloque].append(clave)
+
+    # Comparación dentro de bloques
+    similares = defaultdict(dict)
+    comparados = set()
+    for miembros in bloques.values():
+        if len(miembros) < 2 or len(miembros) > max_bloque:
+            continue
+        for i, a in enumerate(miembros):
+            for b in miembros[i + 1:]:
+                par = (a, b) if a < b else (b, a)
+                if par in comparados:
+                    continue
+                comparados.add(par)
+
+                matcher = SequenceMatcher(None, a, b)
+                if matcher.real_quick_ratio() < umbral or matcher.quick_ratio() < umbral:
+                    continue
+                ratio = matcher.ratio()
+                if ratio >= umbral:
+                    similares[a][b] = ratio
+                    similares[b][a] = ratio
+
+    # Grupos: cada clave libre, de más a menos registros, funda uno con sus similares libres
+    registros_por_clave = conteo_nombres.groupby(conteo_nombres.index.map(clave_por_nombre)).sum()
+    orden = sorted(claves, key=lambda clave: (-registros_por_clave[clave], clave))
+
+    canonica = {}
+    similitud = {}
+    for clave in orden:
+        if clave in canonica:
+            continue
+        canonica[clave] = clave
+        similitud[clave] = 1.0
+        for otra, ratio in similares[clave].items():
+            if otra not in canonica:
+                canonica[otra] = clave
+                similitud[otra] = ratio
+
+    # Nombre canónico e ID
+    tabla = pd.DataFrame({'NOMBRE_ORIGINAL': conteo_nombres.index,
+                          'n_registros': conteo_nombres.values})
+    tabla['clave'] = tabla['NOMBRE_ORIGINAL'].map(clave_por_nombre)
+    tabla['grupo'] = tabla['clave'].map(canonica)
+    tabla['similitud'] = tabla['clave'].map(similitud)
+
+    tabla['es_canonica'] = tabla['clave'] == tabla['grupo']
+    tabla = tabla.sort_values(['grupo', 'es_canonica', 'n_registros', 'NOMBRE_ORIGINAL'],
+                              ascending=[True, False, False, True])
+    tabla['NOMBRE_CANONICO'] = tabla.groupby('grupo')['NOMBRE_ORIGINAL'].transform('first')
+
+    ids = {grupo: f'ORG-{i:05d}' for i, grupo in enumerate(tabla['grupo'].unique(), 1)}
+    tabla['ID_ORGANIZACION'] = tabla['grupo'].map(ids)
+
+    tabla['n_variantes'] = tabla.groupby('grupo')['NOMBRE_ORIGINAL'].transform('size')
+    fusiones = tabla[tabla['n_variantes'] > 1][['ID_ORGANIZACION', 'NOMBRE_CANONICO', 'NOMBRE_ORIGINAL',
+                                                'n_registros', 'similitud']]
+    mapa = tabla.set_index('NOMBRE_ORIGINAL')[['ID_ORGANIZACION', 'NOMBRE_CANONICO']]
+
+    print(f"   Nombres distintos: {len(conteo_nombres)} → organizaciones: {len(ids)} "
+          f"({len(comparados)} comparaciones en {sum(2 <= len(m) <= max_bloque for m in bloques.values())} bloques)")
+
+    return mapa, fusiones
@@ -0,0 +1,148 @@
+import os
+import numpy as np
+from scipy.cluster.hierarchy import dendrogram
+from renderizado import plt, colores_clusters, configurar_estilo, guardar_figura
+from jerarquico_escalable import raices_corte
+from resultados import cargar_tabla_si_existe
+from instrumentacion import instrumentar
+
+# Hojas dibujadas como máximo: por encima, el árbol se trunca a sus últimas fusiones
+MAX_HOJAS_DENDROGRAMA = 40
+
+COLOR_SOBRE_CORTE = '#999999'
+
+
+def altura_corte(Z, n_clusters):
+    """Altura entre la última fusión que se conserva y la primera que se deshace al cortar en n_clusters"""
+
+    n = Z.shape[0] + 1
+    n_fusiones = n - min(max(n_clusters, 1), n)
+    abajo = Z[n_fusiones - 1, 2] if n_fusiones > 0 else 0.0
+    arriba = Z[n_fusiones, 2] if n_fusiones < n - 1 else abajo
+    return (abajo + arriba) / 2
+
+
+def comunidades_por_nodo(Z, hojas=None):
+    """Comunidades bajo cada nodo del árbol (hojas y fusiones)
+
+    hojas es la tabla hojas_jerarquico del almacén; sin ella cada hoja
+    cuenta como una comunidad. Con subclusters BIRCH la columna n_hojas del
+    linkage cuenta subclusters, no comunidades.
+    """
+
+    n = Z.shape[0] + 1
+    comunidades = np.ones(2 * n - 1, dtype=np.int64)
+    if hojas is not None:
+        comunidades[:n] = hojas.sort_values('hoja')['n_comunidades'].to_numpy()
+    for i, (a, b) in enumerate(Z[:, :2].astype(np.int64)):
+        comunidades[n + i] = comunidades[a] + comunidades[b]
+    return comunidades
+
+
+def figura_dendrograma(arbol, ruta, n_clusters, max_hojas=MAX_HOJAS_DENDROGRAMA, hojas=None):
+    """Dendrograma truncado del modelo jerárquico, coloreado por el corte en n_clusters
+
+    arbol es la tabla linkage_jerarquico del almacén y hojas la tabla
+    hojas_jerarquico (ambas escritas por comparar_algoritmos.py): sólo se
+    dibuja, nunca se vuelve a ajustar. Con más de max_hojas hojas se
+    muestran las últimas max_hojas fusiones (truncate_mode='lastp') con el
+    número de comunidades de cada hoja, así que el coste no depende de n.
+    Devuelve None si no hay árbol.
+    """
+
+    if arbol is None or arbol.empty:
+        return None
+
+    Z = arbol[['hijo_1', 'hijo_2', 'distancia', 'n_hojas']].to_numpy(dtype=np.float64)
+    n = Z.shape[0] + 1
+    n_clusters = int(min(max(n_clusters, 1), n))
+
+    # Hojas que agrupan varias comunidades (subclusters BIRCH) se rotulan con su número
+    comunidades = comunidades_por_nodo(Z, hojas)
+    agrupadas = bool((comunidades[:n] > 1).any())
+
+    def rotulo_hoja(nodo):
+        return f'({comunidades[nodo]})' if nodo >= n or agrupadas else str(nodo)
+
+    # Color de cada rama: el de su cluster por debajo del corte, gris por encima
+    etiquetas = raices_corte(Z, n_clusters)
+    paleta = colores_clusters(n_clusters)
+
+    def color_rama(nodo):
+        return paleta[etiquetas[nodo]] if etiquetas[nodo] >= 0 else COLOR_SOBRE_CORTE
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+
+    p = max(max_hojas, n_clusters)
+    dibujo = dendrogram(Z,
+                        truncate_mode='lastp' if n > p else None,
+                        p=p,
+                        leaf_label_func=rotulo_hoja,
+                        link_color_func=color_rama,
+                        leaf_rotation=90,
+                        leaf_font_size=8,
+                        ax=ax)
+
+    # Las hojas (comunidades o grupos truncados) llevan el color de su cluster
+    for etiqueta, hoja in zip(ax.get_xticklabels(), dibujo['leaves']):
+        etiqueta.set_color(paleta[etiquetas[hoja]])
+
+    ax.axhline(altura_corte(Z, n_clusters), color='gray', linestyle='--', linewidth=1,
+               label=f'Corte en {n_clusters} clusters')
+
+    ax.set_title('Dendrograma del Clustering Jerárquico (Ward)',
+                 fontweight='bold',
+                 pad=20)
+    total = f'{comunidades[:n].sum()} comunidades' + (f' en {n} subclusters' if agrupadas else '')
+    if n > p:
+        detalle = f'últimas {p} fusiones; entre paréntesis, comunidades por hoja'
+    else:
+        detalle = 'entre paréntesis, comunidades por hoja' if agrupadas else 'comunidades'
+    ax.set_xlabel(f'{total} ({detalle})', fontweight='bold')
+    ax.set_ylabel('Distancia de fusión (Ward)', fontweight='bold')
+    ax.grid(axis='x', visible=False)
+    ax.legend(loc='upper right')
+
+    plt.tight_layout()
+
+    guardar_figura(fig, ruta)
+    print(f"   Dendrograma guardado: {ruta}")
+    return ruta
+
+
+def k_jerarquico():
+    """K elegido para el modelo jerárquico en la comparación de algoritmos (None si no hay)"""
+
+    metricas = cargar_tabla_si_existe('metricas_algoritmos')
+    if metricas is None:
+        return None
+    jerarquico = metricas.loc[metricas['algoritmo'] == 'Jerárquico', 'n_clusters'].dropna()
+    return int(jerarquico.iloc[0]) if len(jerarquico) else None
+
+
+@instrumentar('dendrograma')
+def dibujar_dendrograma(n_clusters=None, visualizaciones_dir=None):
+    """Dibujar el dendrograma del modelo jerárquico a partir del almacén de resultados"""
+
+    print("DENDROGRAMA DEL MODELO JERÁRQUICO")
+    print("=" * 70)
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    proyecto_dir = os.path.dirname(script_dir)
+    results_dir = visualizaciones_dir or os.path.join(proyecto_dir, "data", "results", "visualizaciones")
+    os.makedirs(results_dir, exist_ok=True)
+
+    arbol = cargar_tabla_si_existe('linkage_jerarquico')
+    hojas = cargar_tabla_si_existe('hojas_jerarquico')
+    n_clusters = n_clusters or k_jerarquico()
+    if arbol is None or n_clusters is None:
+        print("❌ Primero ejecuta comparar_algoritmos.py")
+        return None
+
+    configurar_estilo()
+    return figura_dendrograma(arbol, os.path.join(results_dir, "dendrograma_jerarquico.png"), n_clusters,
+                              hojas=hojas)
+
+
+if __name__ == "__main__":
+    dibujar_dendrograma()
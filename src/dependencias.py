@@ -0,0 +1,31 @@
+import os
+import ast
+
+
+def modulos_locales(script, src_dir, vistos=None):
+    """Script y módulos de src/ que importa, recursivamente
+
+    Lo usan pipeline.py (firma de cada etapa) y renderizado.py (clave de
+    caché de cada figura) para saber qué código invalida un resultado.
+    """
+
+    vistos = set() if vistos is None else vistos
+    ruta = os.path.join(src_dir, script)
+    if ruta in vistos or not os.path.exists(ruta):
+        return vistos
+    vistos.add(ruta)
+
+    with open(ruta, encoding='utf-8') as f:
+        arbol = ast.parse(f.read())
+
+    for nodo in ast.walk(arbol):
+        if isinstance(nodo, ast.ImportFrom) and nodo.module:
+            nombres = [nodo.module]
+        elif isinstance(nodo, ast.Import):
+            nombres = [alias.name for alias in nodo.names]
+        else:
+            continue
+        for nombre in nombres:
+            modulos_locales(f"{nombre.split('.')[0]}.py", src_dir, vistos)
+
+    return vistos
@@ -150,14 +150,15 @@ def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     proyecto_dir = os.path.dirname(script_dir)
     data_dir = os.path.join(proyecto_dir, "data")
+    originales_dir = os.path.join(data_dir, "datos_originles")
 
     # Verificar existencia de archivos
-    archivo1 = os.path.join(data_dir, "matriz_datos_abiertos_septiembre_final.xls")
-    archivo2 = os.path.join(data_dir,
+    archivo1 = os.path.join(originales_dir, "matriz_datos_abiertos_septiembre_final.xls")
+    archivo2 = os.path.join(originales_dir,
                             "2022-2025_RESOLUCIONES COMUNAS, COMUNIDADES, ORGANIZACIONES DE PUEBLOS Y NACIONALIDADES (1).xlsx")
 
     if not os.path.exists(archivo1) or not os.path.exists(archivo2):
-        print("Error: No se encuentran los archivos necesarios en la carpeta 'data'")
+        print("Error: No se encuentran los archivos necesarios en la carpeta 'data/datos_originles'")
         return
 
     # Analizar archivo 1
@@ -0,0 +1,105 @@
+import os
+import warnings
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import eigsh, lobpcg
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import normalize
+from reduccion_dimensional import a_matriz_dispersa, huella_matriz, obtener_cache_dir
+from grafo_similitud import knn_jaccard, simetrizar
+
+# Por encima de este número de comunidades se usa LOBPCG en lugar de ARPACK
+UMBRAL_LOBPCG = 20_000
+
+# Norma máxima del residuo ||M·v - λ·v|| para aceptar los autovectores de LOBPCG
+TOLERANCIA_LOBPCG = 1e-4
+
+
+def afinidad_normalizada(matriz, n_vecinos=15):
+    """Afinidad Jaccard kNN simétrica normalizada D^-1/2 · A · D^-1/2 (dispersa)"""
+
+    afinidad = simetrizar(knn_jaccard(matriz, n_vecinos=n_vecinos))
+
+    grados = np.asarray(afinidad.sum(axis=1)).ravel()
+    grados[grados == 0] = 1
+    d_inv = sparse.diags(1 / np.sqrt(grados))
+
+    return (d_inv @ afinidad @ d_inv).tocsr()
+
+
+def residuos_espectrales(M, valores, vectores):
+    """Norma del residuo ||M·v - λ·v|| de cada par autovalor-autovector"""
+
+    return np.linalg.norm(M @ vectores - vectores * valores, axis=0)
+
+
+def autovectores_lobpcg(M, n_vectores, rng, tol=TOLERANCIA_LOBPCG, maxiter=500):
+    """Autovectores de mayor autovalor con LOBPCG, o None si no converge
+
+    LOBPCG sólo avisa cuando agota maxiter; aquí se comprueban los residuos
+    de lo que devuelve para que el llamador pueda recurrir a ARPACK.
+    """
+
+    inicial = rng.standard_normal((M.shape[0], n_vectores))
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            valores, vectores = lobpcg(M, inicial, largest=True, tol=tol, maxiter=maxiter)
+    except np.linalg.LinAlgError:
+        return None
+
+    residuos = residuos_espectrales(M, valores, vectores)
+    if not np.all(np.isfinite(residuos)) or residuos.max() > tol:
+        print(f"   ⚠️  LOBPCG no convergió en {maxiter} iteraciones "
+              f"(residuo máximo {np.nanmax(residuos):.1e}); se usa ARPACK")
+        return None
+    return valores, vectores
+
+
+def vectores_espectrales(matriz, n_vectores=10, n_vecinos=15, random_state=42, usar_cache=True):
+    """Autovectores principales de la afinidad normalizada, cacheados en disco
+
+    Equivalen a los de menor autovalor del Laplaciano normalizado, pero el
+    Laplaciano nunca se densifica: se usa ARPACK (eigsh) o, para grafos muy
+    grandes, LOBPCG sobre la matriz dispersa (si no converge se repite con
+    ARPACK). Los vectores se devuelven
+    ordenados por autovalor decreciente, de modo que una sola
+    descomposición sirve para cortar cualquier K <= n_vectores.
+    """
+
+    X = a_matriz_dispersa(matriz)
+    n = X.shape[0]
+    n_vectores = min(n_vectores, n - 2)
+
+    cache_path = None
+    if usar_cache:
+        clave = f"{huella_matriz(X)[:16]}_{n_vectores}_{n_vecinos}_{random_state}"
+        cache_path = os.path.join(obtener_cache_dir(), f"espectral_{clave}.npz")
+
+        if os.path.exists(cache_path):
+            return np.load(cache_path)['vectores']
+
+    M = afinidad_normalizada(X, n_vecinos)
+    rng = np.random.default_rng(random_state)
+
+    resultado = autovectores_lobpcg(M, n_vectores, rng) if n > UMBRAL_LOBPCG else None
+    if resultado is not None:
+        valores, vectores = resultado
+    else:
+        v0 = rng.standard_normal(n)
+        valores, vectores = eigsh(M, k=n_vectores, which='LA', v0=v0)
+
+    vectores = vectores[:, np.argsort(valores)[::-1]]
+
+    if cache_path is not None:
+        np.savez_compressed(cache_path, vectores=vectores)
+
+    return vectores
+
+
+def espectral_por_k(vectores, n_clusters, random_state=42):
+    """Cortar K clusters a partir de los primeros K autovectores"""
+
+    embedding = normalize(vectores[:, :n_clusters])
+    kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10)
+    return kmeans.fit_predict(embedding)
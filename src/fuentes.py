@@ -0,0 +1,127 @@
+import os
+import glob
+import json
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+COLUMNA_FUENTE = 'FUENTE'
+
+
+def cargar_registro_fuentes(ruta=None):
+    """Leer el registro de fuentes (data/fuentes.json por defecto)
+
+    Cada fuente declara: nombre, patron (glob relativo a data/), header,
+    engine, hojas (índice, nombre, lista o "todas"), columnas (renombrado
+    al esquema común), pedido (columnas que forman PEDIDO_UNIFICADO),
+    rellenar (valor por defecto de cada columna) y, opcionalmente, salida
+    (CSV individual en data/processed/).
+    """
+
+    if ruta is None:
+        proyecto_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ruta = os.path.join(proyecto_dir, "data", "fuentes.json")
+
+    with open(ruta, encoding='utf-8') as f:
+        registro = json.load(f)
+
+    fuentes = registro['fuentes']
+    for fuente in fuentes:
+        fuente.setdefault('header', 0)
+        fuente.setdefault('engine', None)
+        fuente.setdefault('hojas', 0)
+        fuente.setdefault('columnas', {})
+        fuente.setdefault('rellenar', {})
+        fuente.setdefault('salida', None)
+
+    return fuentes
+
+
+def tareas_de_lectura(fuentes, data_dir):
+    """Lista de (índice de fuente, ruta, hoja) a leer, una por archivo y hoja"""
+
+    tareas = []
+    for i, fuente in enumerate(fuentes):
+        for ruta in sorted(glob.glob(os.path.join(data_dir, fuente['patron']))):
+            hojas = fuente['hojas']
+            if ruta.lower().endswith('.csv'):
+                hojas = [0]
+            elif hojas == 'todas':
+                hojas = pd.ExcelFile(ruta, engine=fuente['engine']).sheet_names
+            elif not isinstance(hojas, list):
+                hojas = [hojas]
+
+            tareas.extend((i, ruta, hoja) for hoja in hojas)
+    return tareas
+
+
+def leer_hoja(ruta, hoja, header, engine, columnas):
+    """Leer una hoja con nombres de columna normalizados al esquema común
+
+    Los archivos .csv (p. ej. los libros sintéticos grandes) se leen como
+    una sola hoja.
+    """
+
+    if ruta.lower().endswith('.csv'):
+        df = pd.read_csv(ruta, header=header, encoding='utf-8-sig')
+    else:
+        df = pd.read_excel(ruta, sheet_name=hoja, header=header, engine=engine)
+    df.columns = [str(col).strip().upper() for col in df.columns]
+    return df.rename(columns=columnas)
+
+
+def ingerir_fuentes(fuentes, data_dir, max_workers=None):
+    """Leer todas las hojas de todas las fuentes en paralelo
+
+    Cada (archivo, hoja) se analiza en un proceso distinto; los resultados
+    se concatenan por fuente en el orden del registro. Devuelve una lista
+    de (fuente, DataFrame) con las fuentes que tienen al menos un archivo.
+    """
+
+    tareas = tareas_de_lectura(fuentes, data_dir)
+    argumentos = [(ruta, hoja, fuentes[i]['header'], fuentes[i]['engine'], fuentes[i]['columnas'])
+                  for i, ruta, hoja in tareas]
+
+    if len(tareas) > 1:
+        max_workers = max_workers or min(len(tareas), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            tablas = list(executor.map(leer_hoja, *zip(*argumentos)))
+    else:
+        tablas = [leer_hoja(*args) for args in argumentos]
+
+    por_fuente = {}
+    for (i, ruta, hoja), tabla in zip(tareas, tablas):
+        por_fuente.setdefault(i, []).append(tabla)
+
+    return [(fuentes[i], pd.concat(por_fuente[i], ignore_index=True))
+            for i in sorted(por_fuente)]
+
+
+def construir_pedido(df, fuente, separador=' | '):
+    """Crear PEDIDO_UNIFICADO uniendo las columnas declaradas por la fuente"""
+
+    columnas = fuente['pedido']
+    if not all(col in df.columns for col in columnas):
+        return False
+
+    pedido = df[columnas[0]].astype(str)
+    for col in columnas[1:]:
+        pedido = pedido + separador + df[col].astype(str)
+    df['PEDIDO_UNIFICADO'] = pedido
+    return True
+
+
+def unir_fuentes(tablas):
+    """Concatenar las fuentes procesadas en un solo almacén con columna FUENTE"""
+
+    return pd.concat([df.assign(**{COLUMNA_FUENTE: fuente['nombre']}) for fuente, df in tablas],
+                     ignore_index=True)
+
+
+def cargar_registros(proyecto_dir=None):
+    """Leer el almacén combinado de registros preprocesados"""
+
+    if proyecto_dir is None:
+        proyecto_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    ruta = os.path.join(proyecto_dir, "data", "processed", "registros_preprocesados.csv")
+    return pd.read_csv(ruta, encoding='utf-8-sig')
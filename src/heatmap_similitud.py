@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.cluster.hierarchy import linkage, leaves_list
+from reduccion_dimensional import a_matriz_dispersa, reducir_svd
+from grafo_similitud import intersecciones_por_bloque
+
+# Resolución por defecto de la imagen agregada (bloques por lado)
+RESOLUCION_HEATMAP = 1000
+
+
+def orden_dendrograma(X, max_patrones=2000):
+    """Orden de hojas de un dendrograma (enlace promedio, Jaccard) para las filas de X
+
+    Las filas idénticas se agrupan antes, así que el coste depende del
+    número de patrones de pedidos distintos y no del de comunidades. Si
+    hay más de max_patrones, se ordena por la primera componente SVD.
+    """
+
+    n = X.shape[0]
+    if n <= 2:
+        return np.arange(n)
+
+    # Patrón de cada fila: los índices de sus pedidos
+    X = sparse.csr_matrix(X)
+    X.sort_indices()
+    claves = [X.indices[X.indptr[i]:X.indptr[i + 1]].tobytes() for i in range(n)]
+    _, representantes, inversa = np.unique(np.array(claves, dtype=object), return_index=True,
+                                          return_inverse=True)
+    inversa = inversa.ravel()
+
+    if len(representantes) > max_patrones:
+        componente, _ = reducir_svd(X, n_componentes=1)
+        return np.argsort(componente[:, 0], kind='stable')
+
+    patrones = X[representantes].toarray().astype(bool)
+
+    if len(patrones) > 2:
+        rango_patron = np.empty(len(patrones), dtype=np.int64)
+        rango_patron[leaves_list(linkage(patrones, method='average', metric='jaccard'))] = np.arange(len(patrones))
+    else:
+        rango_patron = np.arange(len(patrones))
+
+    return np.argsort(rango_patron[inversa], kind='stable')
+
+
+def orden_por_cluster(matriz, labels, max_patrones=2000):
+    """Permutación de las comunidades: por cluster y, dentro de cada uno, por dendrograma
+
+    Devuelve (orden, limites) con limites = posiciones donde empieza cada
+    cluster en el orden, más el total al final.
+    """
+
+    X = a_matriz_dispersa(matriz)
+    labels = np.asarray(labels)
+
+    orden, limites = [], [0]
+    for cluster_id in np.unique(labels):
+        miembros = np.flatnonzero(labels == cluster_id)
+        orden.append(miembros[orden_dendrograma(X[miembros], max_patrones)])
+        limites.append(limites[-1] + len(miembros))
+
+    return np.concatenate(orden), np.array(limites)
+
+
+def bordes_bloques(n, resolucion=RESOLUCION_HEATMAP):
+    """Límites de los bloques de filas consecutivas (a lo sumo resolucion bloques)"""
+
+    return np.unique(np.linspace(0, n, min(n, resolucion) + 1).astype(np.int64))
+
+
+def similitud_agregada(matriz, resolucion=RESOLUCION_HEATMAP, agregacion='media'):
+    """Pedidos en común entre comunidades, agregados en bloques de resolucion × resolucion
+
+    Las filas deben venir ya ordenadas. Con agregacion='media' el valor de
+    cada bloque es la media exacta de Xᵢ·Xⱼ (i ≠ j) sobre sus pares, que
+    se obtiene de las sumas de filas por bloque: el coste es
+    O(nnz + resolucion² · pedidos) y nunca se forma la matriz n × n.
+    Con 'max' se recorre la similitud por bloques de filas
+    (grafo_similitud.intersecciones_por_bloque): la memoria sigue acotada
+    pero el tiempo es O(n²).
+
+    Si n ≤ resolucion cada bloque es una comunidad y el resultado es la
+    similitud exacta. Devuelve (imagen, bordes).
+    """
+
+    X = a_matriz_dispersa(matriz)
+    n = X.shape[0]
+    bordes = bordes_bloques(n, resolucion)
+    n_bloques = len(bordes) - 1
+    bloque_de_fila = np.repeat(np.arange(n_bloques), np.diff(bordes))
+
+    if agregacion == 'media':
+        pertenencia = sparse.csr_matrix((np.ones(n, dtype=np.float32), (bloque_de_fila, np.arange(n))),
+                                        shape=(n_bloques, n))
+        sumas = (pertenencia @ X).toarray().astype(np.float64)
+        imagen = sumas @ sumas.T
+
+        # Quitar la similitud de cada comunidad consigo misma (diagonal de la matriz completa)
+        propios = np.bincount(bloque_de_fila, weights=np.asarray(X.multiply(X).sum(axis=1)).ravel(),
+                              minlength=n_bloques)
+        imagen[np.diag_indices(n_bloques)] -= propios
+
+        tamanos = np.diff(bordes).astype(np.float64)
+        pares = np.outer(tamanos, tamanos)
+        pares[np.diag_indices(n_bloques)] = tamanos * (tamanos - 1)
+        imagen = np.divide(imagen, pares, out=np.zeros_like(imagen), where=pares > 0)
+
+    elif agregacion == 'max':
+        imagen = np.zeros((n_bloques, n_bloques))
+        for inicio, fin, bloque in intersecciones_por_bloque(X):
+            bloque[np.arange(fin - inicio), np.arange(inicio, fin)] = 0
+            por_columna = np.maximum.reduceat(bloque, bordes[:-1], axis=1)
+            np.maximum.at(imagen, bloque_de_fila[inicio:fin], por_columna)
+
+    else:
+        raise ValueError(f"Agregación desconocida: {agregacion} (use 'media' o 'max')")
+
+    return imagen, bordes
+
+
+def heatmap_por_cluster(clusters_df, resolucion=RESOLUCION_HEATMAP, agregacion='media'):
+    """Imagen agregada de similitud de toda la población, ordenada por cluster
+
+    Devuelve un dict con la imagen, los bordes de sus bloques, los límites
+    de cada cluster (en comunidades) y los identificadores de cluster.
+    """
+
+    matriz = clusters_df.drop('CLUSTER', axis=1)
+    labels = clusters_df['CLUSTER'].to_numpy()
+
+    orden, limites = orden_por_cluster(matriz, labels)
+    X = a_matriz_dispersa(matriz)[orden]
+    imagen, bordes = similitud_agregada(X, resolucion=resolucion, agregacion=agregacion)
+
+    return {
+        'imagen': imagen,
+        'bordes': bordes,
+        'limites': limites,
+        'clusters': np.unique(labels),
+        'orden': pd.Index(clusters_df.index[orden])
+    }
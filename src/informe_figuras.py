@@ -0,0 +1,72 @@
+import os
+import time
+import argparse
+import pandas as pd
+from renderizado import configurar_estilo, renderizar_figuras
+from visualización import tareas_visualizacion
+from dendrograma import k_jerarquico
+from visualización_comunidades_compartidas import tareas_compartidas
+from resultados import cargar_tabla_si_existe
+from instrumentacion import instrumentar
+
+
+@instrumentar('informe_figuras')
+def generar_informe_figuras(clusters_df=None, visualizaciones_dir=None, max_workers=None, forzar=False):
+    """Generar todas las figuras del informe en un solo lote, sin pantalla
+
+    Reúne las figuras de visualización.py y de
+    visualización_comunidades_compartidas.py (distribución, tamaño, pedidos
+    principales, tipos de trámite, dendrograma, similitud, red e idénticas) y las dibuja
+    en paralelo, una por proceso de trabajo. Pensado para ejecuciones
+    desatendidas (cron): nunca abre ventanas y libera cada figura al
+    guardarla. Sólo se dibujan las figuras cuyos datos o parámetros
+    cambiaron desde la última ejecución (ver manifiesto_figuras.json),
+    salvo con forzar=True.
+    """
+
+    print("GENERACIÓN DEL INFORME DE FIGURAS")
+    print("=" * 70)
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    proyecto_dir = os.path.dirname(script_dir)
+    clusters_path = os.path.join(proyecto_dir, "data", "results", "comunidades_clusters.csv")
+
+    if clusters_df is None:
+        clusters_df = pd.read_csv(clusters_path, index_col=0, encoding='utf-8-sig')
+
+    distribucion = cargar_tabla_si_existe('distribucion_tipos_tramite')
+    arbol = cargar_tabla_si_existe('linkage_jerarquico')
+    hojas_arbol = cargar_tabla_si_existe('hojas_jerarquico')
+
+    results_dir = visualizaciones_dir or os.path.join(proyecto_dir, "data", "results", "visualizaciones")
+    os.makedirs(results_dir, exist_ok=True)
+
+    configurar_estilo()
+    tareas = (tareas_visualizacion(clusters_df, results_dir, distribucion, arbol, k_jerarquico(), hojas_arbol)
+              + tareas_compartidas(clusters_df, results_dir))
+
+    print(f"\n1. Dibujando {len(tareas)} figuras en paralelo...")
+    inicio = time.perf_counter()
+    figuras = renderizar_figuras(tareas, max_workers=max_workers, forzar=forzar)
+    total = time.perf_counter() - inicio
+
+    print("\n2. RESUMEN:")
+    for nombre, figura in figuras.items():
+        destino = os.path.basename(figura['ruta']) if figura['ruta'] else 'sin datos, omitida'
+        estado = ' (en caché)' if figura['en_cache'] else ''
+        print(f"   {nombre:<22} {figura['tiempo_s']:>7.2f}s  {destino}{estado}")
+
+    suma = sum(figura['tiempo_s'] for figura in figuras.values())
+    print(f"\n✅ {len(figuras)} figuras en {total:.2f}s (secuencial: {suma:.2f}s)")
+    print(f"📊 Gráficos generados en: {results_dir}")
+
+    return figuras
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generar todas las figuras del informe sin pantalla")
+    parser.add_argument('--workers', type=int, default=None, help="procesos de dibujo simultáneos")
+    parser.add_argument('--force', action='store_true', help="dibujar todas las figuras aunque no hayan cambiado")
+    args = parser.parse_args()
+
+    generar_informe_figuras(max_workers=args.workers, forzar=args.force)
@@ -0,0 +1,227 @@
+import os
+import io
+import sys
+import json
+import time
+import pstats
+import cProfile
+import platform
+import threading
+import tracemalloc
+import functools
+import itertools
+from datetime import datetime
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+VERSION_REPORTE = 1
+
+# Secciones a perfilar con cProfile + tracemalloc, separadas por comas (p. ej. "clustering_comunidades")
+PERFILAR = {n.strip() for n in os.environ.get('SGDPN_PERFILAR', '').split(',') if n.strip()}
+
+_mediciones = []
+_lock = threading.Lock()
+_local = threading.local()
+_contador = itertools.count()
+
+
+def rss_pico_mb():
+    """Pico de memoria residente del proceso en MB (None si no está disponible)
+
+    Es el máximo del proceso entero desde su inicio y nunca baja: para
+    atribuir memoria a una sección, use el rss_incremento_mb de medir().
+    """
+
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return pico / (1024 ** 2) if sys.platform == 'darwin' else pico / 1024
+
+
+def forma(obj):
+    """Forma de una entrada para el reporte: shape, len o None"""
+
+    if hasattr(obj, 'shape'):
+        return list(obj.shape)
+    if hasattr(obj, '__len__') and not isinstance(obj, (str, bytes)):
+        return [len(obj)]
+    return None
+
+
+def _pila():
+    if not hasattr(_local, 'pila'):
+        _local.pila = []
+    return _local.pila
+
+
+@contextmanager
+def medir(nombre, **contexto):
+    """Medir una sección: tiempo de reloj, tiempo de CPU y memoria pico
+
+    Los valores de contexto con .shape o len se guardan como forma. Si el
+    nombre está en SGDPN_PERFILAR, la sección se ejecuta además con
+    cProfile y tracemalloc y el detalle se incluye en el reporte.
+    """
+
+    pila = _pila()
+    registro = {
+        'nombre': nombre,
+        'orden': next(_contador),
+        'padre': pila[-1] if pila else None,
+        'nivel': len(pila),
+        'inicio': datetime.now().isoformat(timespec='seconds')
+    }
+    for clave, valor in contexto.items():
+        dimensiones = forma(valor)
+        registro[clave] = dimensiones if dimensiones is not None else valor
+
+    perfil = None
+    if nombre in PERFILAR:
+        perfil = cProfile.Profile()
+        tracemalloc.start()
+        perfil.enable()
+
+    pila.append(nombre)
+    rss_inicial = rss_pico_mb()
+    cpu_inicial = time.process_time()
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        registro['tiempo_s'] = round(time.perf_counter() - inicio, 6)
+        registro['cpu_s'] = round(time.process_time() - cpu_inicial, 6)
+        rss_final = rss_pico_mb()
+        if rss_final is not None:
+            registro['rss_pico_mb'] = round(rss_final, 1)
+            registro['rss_incremento_mb'] = round(rss_final - rss_inicial, 1)
+        pila.pop()
+
+        if perfil is not None:
+            perfil.disable()
+            _, pico_python = tracemalloc.get_traced_memory()
+            asignaciones = tracemalloc.take_snapshot().statistics('lineno')[:10]
+            tracemalloc.stop()
+
+            salida = io.StringIO()
+            pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(15)
+            registro['perfil'] = {
+                'memoria_python_pico_mb': round(pico_python / 1024 ** 2, 2),
+                'asignaciones': [str(a) for a in asignaciones],
+                'cprofile': salida.getvalue().splitlines()
+            }
+            perfil.dump_stats(os.path.join(obtener_reportes_dir(), f"perfil_{nombre}.prof"))
+
+        with _lock:
+            _mediciones.append(registro)
+
+
+def instrumentar(nombre):
+    """Decorador de etapa: mide la función y, si es la más externa, guarda el reporte"""
+
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            entradas = {f"arg{i}": forma(valor) for i, valor in enumerate(args) if hasattr(valor, 'shape')}
+            entradas.update({clave: forma(valor) for clave, valor in kwargs.items() if hasattr(valor, 'shape')})
+            externa = not _pila()
+
+            with medir(nombre, entradas=entradas):
+                resultado = funcion(*args, **kwargs)
+
+            if externa:
+                ruta = guardar_reporte(nombre)
+                print(f"\n⏱️  Reporte de ejecución guardado en: {ruta}")
+            return resultado
+        return envoltura
+    return decorador
+
+
+def obtener_reportes_dir():
+    """Directorio data/results/reportes/ para los reportes de ejecución"""
+
+    proyecto_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    reportes_dir = os.path.join(proyecto_dir, "data", "results", "reportes")
+    os.makedirs(reportes_dir, exist_ok=True)
+    return reportes_dir
+
+
+def mediciones():
+    """Copia de las mediciones acumuladas en este proceso"""
+
+    with _lock:
+        return list(_mediciones)
+
+
+def mediciones_desde(orden):
+    """Mediciones de este proceso iniciadas a partir de un número de orden"""
+
+    with _lock:
+        return sorted((m for m in _mediciones if m['orden'] >= orden), key=lambda m: m['orden'])
+
+
+def incorporar_mediciones(registros):
+    """Añadir mediciones tomadas en otro proceso, colgando de la sección actual
+
+    Se renumeran en el orden de este proceso y se anidan bajo la sección
+    abierta en el hilo que las incorpora (p. ej. figuras dibujadas en
+    procesos de trabajo).
+    """
+
+    pila = _pila()
+    nivel_base = min((m['nivel'] for m in registros), default=0)
+    with _lock:
+        for m in sorted(registros, key=lambda m: m['orden']):
+            m = dict(m, orden=next(_contador), nivel=m['nivel'] - nivel_base + len(pila))
+            if m['nivel'] == len(pila):
+                m['padre'] = pila[-1] if pila else None
+            _mediciones.append(m)
+
+
+def guardar_reporte(nombre='ejecucion', limpiar=True):
+    """Guardar las mediciones acumuladas como reporte JSON y devolver la ruta
+
+    Se escriben dos archivos: <nombre>_<fecha>.json (histórico) y
+    <nombre>_ultimo.json (siempre el más reciente).
+    """
+
+    with _lock:
+        registros = sorted(_mediciones, key=lambda m: m['orden'])
+        if limpiar:
+            _mediciones.clear()
+
+    reporte = {
+        'version': VERSION_REPORTE,
+        'nombre': nombre,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'mediciones': registros
+    }
+
+    reportes_dir = obtener_reportes_dir()
+    ruta = os.path.join(reportes_dir, f"{nombre}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    for destino in (ruta, os.path.join(reportes_dir, f"{nombre}_ultimo.json")):
+        temporal = destino + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(temporal, destino)
+
+    return ruta
+
+
+def resumen_reporte(reporte, nivel_max=1):
+    """Líneas de texto con el tiempo, CPU y memoria de cada sección (hasta nivel_max)"""
+
+    lineas = [f"{'SECCIÓN':<40} {'TIEMPO':>9} {'CPU':>9} {'RSS PICO':>10}"]
+    for m in reporte['mediciones']:
+        if m['nivel'] > nivel_max:
+            continue
+        rss = f"{m['rss_pico_mb']:.0f} MB" if m.get('rss_pico_mb') is not None else 'N/A'
+        lineas.append(f"{'  ' * m['nivel'] + m['nombre']:<40} {m['tiempo_s']:>8.2f}s {m['cpu_s']:>8.2f}s {rss:>10}")
+    return lineas
@@ -0,0 +1,242 @@
+import os
+import hashlib
+import heapq
+import numpy as np
+from scipy import sparse
+from scipy.cluster.hierarchy import linkage
+from sklearn.cluster import AgglomerativeClustering, Birch
+from reduccion_dimensional import a_matriz_dispersa, reducir_svd, huella_matriz, obtener_cache_dir
+from grafo_similitud import knn_jaccard, simetrizar, conectar_componentes
+
+# A partir de este número de comunidades el Ward sin restricciones (O(n²)) deja de ser viable
+UMBRAL_JERARQUICO_DENSO = 10_000
+
+
+def grafo_conectividad(matriz, n_vecinos=10):
+    """Restricción de conectividad: grafo kNN Jaccard simétrico y conexo"""
+
+    X = a_matriz_dispersa(matriz)
+    grafo = simetrizar(knn_jaccard(X, n_vecinos=n_vecinos))
+
+    # Ordenar componentes por la primera dirección SVD para encadenar las más parecidas
+    # (un embedding auxiliar de 2 componentes: no merece una entrada en la caché de disco)
+    embedding, _ = reducir_svd(X, n_componentes=2, usar_cache=False)
+    grafo, n_componentes = conectar_componentes(grafo, embedding[:, 0])
+
+    grafo.data[:] = 1
+    return grafo, n_componentes
+
+
+def coste_aristas(tamanos, posiciones, origen, destino):
+    """Aumento de inercia Ward de fusionar cada par (origen, destino)"""
+
+    diferencia = posiciones[origen] - posiciones[destino]
+    return (tamanos[origen] * tamanos[destino] / (tamanos[origen] + tamanos[destino])
+            * np.einsum('ij,ij->i', diferencia, diferencia))
+
+
+def ward_ponderado(centros, pesos, conectividad):
+    """Ward con restricción de conectividad sobre puntos que ya resumen varias comunidades
+
+    Cada punto (p. ej. un subcluster BIRCH) entra con su centro y su número
+    de comunidades, de modo que el coste de fusionar A y B es el aumento de
+    inercia nA·nB / (nA + nB) · ||cA - cB||², como si se fusionaran las
+    comunidades originales. Sólo se fusionan vecinos del grafo, que debe ser
+    conexo. La distancia es sqrt(2 · coste), la misma escala que Ward en
+    scipy y sklearn; la última columna cuenta puntos, no comunidades.
+    """
+
+    centros = np.asarray(centros, dtype=np.float64)
+    m = centros.shape[0]
+
+    tamanos = np.zeros(2 * m - 1)
+    tamanos[:m] = pesos
+    posiciones = np.zeros((2 * m - 1, centros.shape[1]))
+    posiciones[:m] = centros
+    puntos = np.ones(2 * m - 1)
+    activo = np.zeros(2 * m - 1, dtype=bool)
+    activo[:m] = True
+
+    grafo = sparse.triu(conectividad, k=1).tocoo()
+    vecinos = [set() for _ in range(2 * m - 1)]
+    for a, b in zip(grafo.row.tolist(), grafo.col.tolist()):
+        vecinos[a].add(b)
+        vecinos[b].add(a)
+
+    costes = coste_aristas(tamanos, posiciones, grafo.row, grafo.col)
+    aristas = list(zip(costes.tolist(), grafo.row.tolist(), grafo.col.tolist()))
+    heapq.heapify(aristas)
+
+    Z = np.zeros((m - 1, 4))
+    for i in range(m - 1):
+        # Descartar aristas cuyos extremos ya se fusionaron
+        while aristas and not (activo[aristas[0][1]] and activo[aristas[0][2]]):
+            heapq.heappop(aristas)
+        if not aristas:
+            raise ValueError("El grafo de conectividad no es conexo: no se puede completar el árbol Ward")
+        valor, a, b = heapq.heappop(aristas)
+
+        nuevo = m + i
+        tamanos[nuevo] = tamanos[a] + tamanos[b]
+        posiciones[nuevo] = (tamanos[a] * posiciones[a] + tamanos[b] * posiciones[b]) / tamanos[nuevo]
+        puntos[nuevo] = puntos[a] + puntos[b]
+        activo[[a, b]] = False
+        activo[nuevo] = True
+        Z[i] = (a, b, np.sqrt(2 * valor), puntos[nuevo])
+
+        vecinos[nuevo] = (vecinos[a] | vecinos[b]) - {a, b}
+        for v in vecinos[nuevo]:
+            vecinos[v] -= {a, b}
+            vecinos[v].add(nuevo)
+        vecinos[a] = vecinos[b] = None
+
+        if vecinos[nuevo]:
+            otros = np.fromiter(vecinos[nuevo], dtype=np.int64)
+            costes = coste_aristas(tamanos, posiciones, np.full(len(otros), nuevo), otros)
+            for v, c in zip(otros.tolist(), costes.tolist()):
+                heapq.heappush(aristas, (c, nuevo, v))
+
+    return Z
+
+
+def linkage_jerarquico(caracteristicas, conectividad=None, usar_cache=True, pesos=None):
+    """Árbol Ward completo en formato de enlace de scipy, calculado una vez y cacheado en disco
+
+    Sin conectividad es el Ward clásico (O(n²), sólo por debajo de
+    UMBRAL_JERARQUICO_DENSO); con conectividad sólo se fusionan vecinos del
+    grafo. Cada fila es (hijo 1, hijo 2, distancia, hojas) y las fusiones van
+    en el orden en que se hicieron, así que un corte en K clusters es
+    deshacer las K - 1 últimas (cortar_linkage), sin volver a ajustar.
+
+    Con pesos (número de comunidades de cada fila) se usa ward_ponderado,
+    que exige conectividad.
+    """
+
+    cache_path = None
+    if usar_cache:
+        h = hashlib.sha1(huella_matriz(caracteristicas).encode('ascii'))
+        if conectividad is not None:
+            h.update(huella_matriz(conectividad).encode('ascii'))
+        if pesos is not None:
+            h.update(np.ascontiguousarray(pesos, dtype=np.float64).tobytes())
+        cache_path = os.path.join(obtener_cache_dir(), f"linkage_{h.hexdigest()[:16]}.npy")
+
+        if os.path.exists(cache_path):
+            return np.load(cache_path)
+
+    datos = caracteristicas.toarray() if hasattr(caracteristicas, 'toarray') else np.asarray(caracteristicas)
+    n = datos.shape[0]
+
+    if pesos is not None:
+        if conectividad is None:
+            raise ValueError("El Ward ponderado requiere un grafo de conectividad")
+        Z = ward_ponderado(datos, pesos, conectividad)
+    elif conectividad is None:
+        Z = linkage(datos, method='ward')
+    else:
+        arbol = AgglomerativeClustering(n_clusters=None, distance_threshold=0, linkage='ward',
+                                        connectivity=conectividad, compute_full_tree=True)
+        arbol.fit(datos)
+
+        # Hojas bajo cada fusión (los hijos >= n son fusiones anteriores)
+        hojas = np.ones(2 * n - 1)
+        for i, (a, b) in enumerate(arbol.children_):
+            hojas[n + i] = hojas[a] + hojas[b]
+        Z = np.column_stack([arbol.children_, arbol.distances_, hojas[n:]]).astype(np.float64)
+
+    if cache_path is not None:
+        np.save(cache_path, Z)
+    return Z
+
+
+def raices_corte(Z, n_clusters):
+    """Cluster de cada nodo del árbol al cortarlo en n_clusters (-1 para los nodos por encima del corte)"""
+
+    n = Z.shape[0] + 1
+    n_fusiones = n - min(max(n_clusters, 1), n)
+
+    raiz = np.full(2 * n - 1, -1, dtype=np.int64)
+    # Las fusiones que sobreviven al corte, de la última a la primera: cada hijo hereda la raíz de su padre
+    for i in range(n_fusiones - 1, -1, -1):
+        nodo = n + i
+        if raiz[nodo] < 0:
+            raiz[nodo] = nodo
+        raiz[int(Z[i, 0])] = raiz[nodo]
+        raiz[int(Z[i, 1])] = raiz[nodo]
+
+    hojas_sueltas = raiz[:n] < 0
+    raiz[:n][hojas_sueltas] = np.flatnonzero(hojas_sueltas)
+
+    # Renumerar las raíces como 0..K-1 en el orden de su primera hoja
+    asignado = raiz >= 0
+    _, primeras, codigos = np.unique(raiz[asignado], return_index=True, return_inverse=True)
+    orden = np.argsort(np.argsort(primeras))
+    etiquetas = np.full(2 * n - 1, -1, dtype=np.int64)
+    etiquetas[asignado] = orden[codigos.ravel()]
+    return etiquetas
+
+
+def cortar_linkage(Z, n_clusters):
+    """Etiquetas de las hojas al cortar el árbol en n_clusters, en O(n)"""
+
+    n = Z.shape[0] + 1
+    return raices_corte(Z, n_clusters)[:n]
+
+
+def preparar_jerarquico_escalable(matriz, n_vecinos=10, usar_birch=False, umbral_birch=0.5,
+                                  caracteristicas=None):
+    """Preparar el modo jerárquico escalable (Ward con restricción kNN)
+
+    La memoria pasa de O(n²) a O(n·k): sólo se consideran fusiones entre
+    comunidades vecinas en el grafo Jaccard. Con usar_birch=True las
+    comunidades se resumen primero en subclusters BIRCH y la aglomeración
+    se hace sobre sus centros, con el grafo Jaccard entre los pedidos de
+    cada subcluster y un Ward ponderado por su número de comunidades.
+
+    Devuelve un diccionario con el grafo (o los subclusters) y el árbol
+    Ward completo, para cortarlo en cada K con jerarquico_escalable().
+    """
+
+    X = a_matriz_dispersa(matriz)
+
+    # Ward requiere características densas: la matriz o un embedding SVD
+    if caracteristicas is None:
+        caracteristicas = X.toarray()
+
+    modelo = {'caracteristicas': caracteristicas, 'usar_birch': usar_birch}
+
+    if usar_birch:
+        birch = Birch(threshold=umbral_birch, n_clusters=None)
+        # Sólo los subclusters que reciben alguna comunidad (un Ward con peso 0 no está definido)
+        usados, modelo['subclusters'] = np.unique(birch.fit_predict(caracteristicas), return_inverse=True)
+        modelo['centros'] = birch.subcluster_centers_[usados]
+        modelo['tamanos'] = np.bincount(modelo['subclusters'])
+
+        # Mismo grafo Jaccard que sin BIRCH, entre los pedidos que reúne cada subcluster
+        n_centros = len(modelo['centros'])
+        pertenencia = sparse.csr_matrix((np.ones(X.shape[0]), (modelo['subclusters'], np.arange(X.shape[0]))),
+                                        shape=(n_centros, X.shape[0]))
+        pedidos_subclusters = (pertenencia @ X).tocsr()
+        pedidos_subclusters.data[:] = 1
+        modelo['conectividad'], modelo['n_componentes'] = grafo_conectividad(pedidos_subclusters, n_vecinos)
+
+        # El árbol se construye sobre los centros, ponderando cada uno por sus comunidades
+        modelo['linkage'] = linkage_jerarquico(modelo['centros'], modelo['conectividad'],
+                                               pesos=modelo['tamanos'])
+    else:
+        modelo['conectividad'], modelo['n_componentes'] = grafo_conectividad(X, n_vecinos)
+
+        # El árbol completo se construye una sola vez; cada K es un corte
+        modelo['linkage'] = linkage_jerarquico(caracteristicas, modelo['conectividad'])
+
+    return modelo
+
+
+def jerarquico_escalable(modelo, n_clusters):
+    """Etiquetas de cluster para las comunidades originales"""
+
+    labels = cortar_linkage(modelo['linkage'], n_clusters)
+
+    if modelo['usar_birch']:
+        return labels[modelo['subclusters']]
+    return labels
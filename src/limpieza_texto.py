@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+# Columnas de texto libre que se limpian en el preprocesamiento
+COLUMNAS_TEXTO = ['NOMBRE DE LA ORGANIZACIÓN', 'ASUNTO', 'SOLICITUD', 'TIPO DE SERVICIO',
+                  'TIPO DE SERVICIO ESPECIFÍCO']
+
+
+def limpiar_texto(serie):
+    """Mayúsculas, sin espacios al borde y espacios internos colapsados
+
+    La limpieza se aplica con el accesor .str sólo sobre los valores
+    distintos (pd.factorize) y el resultado se reexpande con los códigos,
+    de modo que el costo depende del número de textos distintos y no del
+    número de filas. Los nulos se conservan.
+    """
+
+    codigos, unicos = pd.factorize(serie)
+    if len(unicos) == 0:
+        return serie
+
+    limpios = (pd.Series(unicos, dtype=object).astype(str)
+               .str.upper()
+               .str.strip()
+               .str.replace(r'\s+', ' ', regex=True))
+
+    # El código -1 (nulo) apunta al np.nan agregado al final
+    valores = np.append(limpios.to_numpy(dtype=object), np.nan)[codigos]
+    return pd.Series(valores, index=serie.index, name=serie.name, dtype=object)
+
+
+def limpiar_columnas(df, columnas=None):
+    """Limpiar en el lugar las columnas de texto presentes en df; devuelve las limpiadas"""
+
+    columnas = COLUMNAS_TEXTO if columnas is None else columnas
+    limpiadas = [col for col in columnas if col in df.columns]
+
+    for col in limpiadas:
+        df[col] = limpiar_texto(df[col])
+
+    return limpiadas
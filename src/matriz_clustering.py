@@ -1,10 +1,21 @@
 import pandas as pd
 import numpy as np
 import os
+from taxonomia_pedidos import tabla_tipos_pedido
+from fuentes import cargar_registros, COLUMNA_FUENTE
+from persistencia import escribir, escribir_texto
+from resultados import guardar_tabla, tabla_valores
+from instrumentacion import instrumentar, medir
 
 
-def crear_matriz_clustering():
-    """Crear matriz binaria comunidades vs pedidos para clustering"""
+@instrumentar('matriz_clustering')
+def crear_matriz_clustering(registros=None, escritor=None):
+    """Crear matriz binaria comunidades vs pedidos para clustering
+
+    Si se pasan los registros en memoria (por ejemplo, desde una sesión)
+    no se relee el CSV combinado; escritor controla cómo se guardan los
+    resultados (ver persistencia.crear_escritor).
+    """
 
     print("CREACIÓN DE MATRIZ PARA CLUSTERING")
     print("=" * 60)
@@ -12,59 +23,47 @@ def crear_matriz_clustering():
     # Rutas
     script_dir = os.path.dirname(os.path.abspath(__file__))
     proyecto_dir = os.path.dirname(script_dir)
-    processed_dir = os.path.join(proyecto_dir, "data", "processed")
 
-    # Cargar datos preprocesados
+    # Cargar datos preprocesados (almacén combinado de todas las fuentes)
     print("\n1. Cargando datos preprocesados...")
-    df1 = pd.read_csv(os.path.join(processed_dir, "archivo1_preprocesado_final.csv"),
-                      encoding='utf-8-sig')
-    df2 = pd.read_csv(os.path.join(processed_dir, "archivo2_preprocesado_final.csv"),
-                      encoding='utf-8-sig')
+    if registros is None:
+        registros = cargar_registros(proyecto_dir)
+    por_fuente = dict(tuple(registros.groupby(COLUMNA_FUENTE, sort=False)))
 
-    print(f"   Archivo 1: {df1.shape}")
-    print(f"   Archivo 2: {df2.shape}")
+    for fuente, df in por_fuente.items():
+        print(f"   {fuente}: {df.shape}")
 
     # 1. Extraer todas las comunidades únicas
     print("\n2. Extrayendo comunidades únicas...")
-    comunidades1 = set(df1['NOMBRE DE LA ORGANIZACIÓN'].unique())
-    comunidades2 = set(df2['NOMBRE DE LA ORGANIZACIÓN'].unique())
-    todas_comunidades = sorted(list(comunidades1.union(comunidades2)))
+    comunidades = {fuente: set(df['NOMBRE DE LA ORGANIZACIÓN'].unique()) for fuente, df in por_fuente.items()}
+    todas_comunidades = sorted(set().union(*comunidades.values()))
 
     print(f"   Total comunidades únicas: {len(todas_comunidades)}")
-    print(f"   - Solo en Archivo 1: {len(comunidades1 - comunidades2)}")
-    print(f"   - Solo en Archivo 2: {len(comunidades2 - comunidades1)}")
-    print(f"   - En ambos archivos: {len(comunidades1.intersection(comunidades2))}")
+    for fuente, conjunto in comunidades.items():
+        otras = set().union(*(c for f, c in comunidades.items() if f != fuente))
+        print(f"   - Solo en {fuente}: {len(conjunto - otras)}")
+    print(f"   - En todas las fuentes: {len(set.intersection(*comunidades.values()))}")
 
     # 2. Extraer todos los pedidos únicos
     print("\n3. Extrayendo pedidos únicos...")
-    pedidos1 = set(df1['PEDIDO_UNIFICADO'].unique())
-    pedidos2 = set(df2['PEDIDO_UNIFICADO'].unique())
-    todos_pedidos = sorted(list(pedidos1.union(pedidos2)))
+    pedidos = {fuente: set(df['PEDIDO_UNIFICADO'].unique()) for fuente, df in por_fuente.items()}
+    todos_pedidos = sorted(set().union(*pedidos.values()))
 
     print(f"   Total pedidos únicos: {len(todos_pedidos)}")
-    print(f"   - Solo en Archivo 1: {len(pedidos1 - pedidos2)}")
-    print(f"   - Solo en Archivo 2: {len(pedidos2 - pedidos1)}")
-    print(f"   - En ambos archivos: {len(pedidos1.intersection(pedidos2))}")
+    for fuente, conjunto in pedidos.items():
+        otras = set().union(*(p for f, p in pedidos.items() if f != fuente))
+        print(f"   - Solo en {fuente}: {len(conjunto - otras)}")
+    print(f"   - En todas las fuentes: {len(set.intersection(*pedidos.values()))}")
 
-    # 3. Crear matriz binaria
+    # 3. Crear matriz binaria a partir de los pares (comunidad, pedido) distintos
     print("\n4. Creando matriz binaria...")
-    matriz = pd.DataFrame(0, index=todas_comunidades, columns=todos_pedidos)
-
-    # Rellenar con Archivo 1
-    print("   Rellenando con Archivo 1...")
-    for _, row in df1.iterrows():
-        comunidad = row['NOMBRE DE LA ORGANIZACIÓN']
-        pedido = row['PEDIDO_UNIFICADO']
-        if comunidad in matriz.index and pedido in matriz.columns:
-            matriz.loc[comunidad, pedido] = 1
-
-    # Rellenar con Archivo 2
-    print("   Rellenando con Archivo 2...")
-    for _, row in df2.iterrows():
-        comunidad = row['NOMBRE DE LA ORGANIZACIÓN']
-        pedido = row['PEDIDO_UNIFICADO']
-        if comunidad in matriz.index and pedido in matriz.columns:
-            matriz.loc[comunidad, pedido] = 1
+    with medir('llenado_matriz', registros=registros):
+        pares = registros[['NOMBRE DE LA ORGANIZACIÓN', 'PEDIDO_UNIFICADO']].drop_duplicates()
+        matriz = (pd.crosstab(pares['NOMBRE DE LA ORGANIZACIÓN'], pares['PEDIDO_UNIFICADO'])
+                  .clip(upper=1)
+                  .reindex(index=todas_comunidades, columns=todos_pedidos, fill_value=0))
+    matriz.index.name = None
+    matriz.columns.name = None
 
     print(f"   Matriz inicial: {matriz.shape[0]} comunidades x {matriz.shape[1]} pedidos")
 
@@ -102,24 +101,41 @@ def crear_matriz_clustering():
 
     # Guardar matriz completa
     matriz_path = os.path.join(results_dir, "matriz_clustering_final.csv")
-    matriz.to_csv(matriz_path, encoding='utf-8-sig')
+    escribir(escritor, matriz.to_csv, matriz_path, encoding='utf-8-sig')
 
     # Guardar estadísticas
     stats_path = os.path.join(results_dir, "estadisticas_matriz.txt")
-    with open(stats_path, 'w') as f:
-        f.write("ESTADÍSTICAS DE LA MATRIZ DE CLUSTERING\n")
-        f.write("=" * 50 + "\n\n")
-        f.write(f"Comunidades: {matriz.shape[0]}\n")
-        f.write(f"Pedidos únicos: {matriz.shape[1]}\n")
-        f.write(f"Densidad: {densidad:.4f}%\n")
-        f.write(f"Pedidos por comunidad (promedio): {pedidos_por_comunidad.mean():.2f}\n")
-        f.write(f"Comunidades por pedido (promedio): {comunidades_por_pedido.mean():.2f}\n\n")
-
-        f.write("TOP 5 PEDIDOS MÁS COMUNES:\n")
-        for pedido, count in comunidades_por_pedido.sort_values(ascending=False).head(5).items():
-            f.write(f"  {pedido[:50]}...: {count} comunidades\n")
+    lineas = ["ESTADÍSTICAS DE LA MATRIZ DE CLUSTERING\n",
+              "=" * 50 + "\n\n",
+              f"Comunidades: {matriz.shape[0]}\n",
+              f"Pedidos únicos: {matriz.shape[1]}\n",
+              f"Densidad: {densidad:.4f}%\n",
+              f"Pedidos por comunidad (promedio): {pedidos_por_comunidad.mean():.2f}\n",
+              f"Comunidades por pedido (promedio): {comunidades_por_pedido.mean():.2f}\n\n",
+              "TOP 5 PEDIDOS MÁS COMUNES:\n"]
+    for pedido, count in comunidades_por_pedido.sort_values(ascending=False).head(5).items():
+        lineas.append(f"  {pedido[:50]}...: {count} comunidades\n")
+    escribir(escritor, escribir_texto, stats_path, lineas)
+
+    # Las mismas estadísticas, estructuradas, en el almacén de resultados
+    estadisticas = tabla_valores({
+        'comunidades': matriz.shape[0],
+        'pedidos_unicos': matriz.shape[1],
+        'densidad_pct': densidad,
+        'pedidos_por_comunidad_promedio': pedidos_por_comunidad.mean(),
+        'comunidades_por_pedido_promedio': comunidades_por_pedido.mean()
+    }, 'estadistica')
+    escribir(escritor, guardar_tabla, 'estadisticas_matriz', estadisticas)
+    escribir(escritor, guardar_tabla, 'comunidades_por_pedido',
+             comunidades_por_pedido.sort_values(ascending=False).rename_axis('pedido')
+             .rename('n_comunidades').reset_index())
+
+    # Guardar tabla de consulta pedido -> tipo de trámite
+    tipos_path = os.path.join(results_dir, "tipos_pedido.csv")
+    escribir(escritor, tabla_tipos_pedido(matriz.columns).to_csv, tipos_path, index=False, encoding='utf-8-sig')
 
     print(f"   Matriz guardada en: {matriz_path}")
+    print(f"   Tipos de pedido guardados en: {tipos_path}")
     print(f"   Estadísticas guardadas en: {stats_path}")
 
     # 7. Mostrar resumen
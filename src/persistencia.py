@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def crear_escritor(persistir=True, asincrono=True, max_workers=2, siempre=()):
+    """Escritor de resultados para las funciones de cada etapa
+
+    Las etapas reciben un parámetro escritor: con None escriben en disco
+    como siempre; con un escritor asíncrono las escrituras se encolan en
+    hilos de fondo y la etapa sigue sin esperar; con persistir=False las
+    escrituras se omiten y los resultados sólo viven en memoria, salvo las
+    de las funciones de siempre, que se ejecutan en el momento (p. ej.
+    guardar_tabla con el almacén en un directorio temporal).
+    """
+
+    executor = ThreadPoolExecutor(max_workers=max_workers) if persistir and asincrono else None
+    return {'persistir': persistir, 'executor': executor, 'pendientes': [], 'siempre': tuple(siempre)}
+
+
+def escribir(escritor, funcion, *args, **kwargs):
+    """Ejecutar (o encolar u omitir) una escritura según el escritor"""
+
+    if escritor is None:
+        return funcion(*args, **kwargs)
+    if not escritor['persistir']:
+        return funcion(*args, **kwargs) if funcion in escritor.get('siempre', ()) else None
+    if escritor['executor'] is None:
+        return funcion(*args, **kwargs)
+
+    escritor['pendientes'].append(escritor['executor'].submit(funcion, *args, **kwargs))
+    return None
+
+
+def esperar_escrituras(escritor):
+    """Esperar a que terminen las escrituras encoladas; devuelve cuántas hubo"""
+
+    if escritor is None or escritor['executor'] is None:
+        return 0
+
+    pendientes, escritor['pendientes'] = escritor['pendientes'], []
+    for futuro in pendientes:
+        futuro.result()
+    return len(pendientes)
+
+
+def cerrar_escritor(escritor):
+    """Esperar las escrituras pendientes y liberar los hilos"""
+
+    n = esperar_escrituras(escritor)
+    if escritor is not None and escritor['executor'] is not None:
+        escritor['executor'].shutdown()
+    return n
+
+
+def escribir_texto(ruta, lineas):
+    """Guardar una lista de líneas como archivo de texto UTF-8"""
+
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.writelines(lineas)
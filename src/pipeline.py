@@ -0,0 +1,349 @@
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dependencias import modulos_locales
+
+# Etapas del flujo: script, entradas y salidas (rutas o patrones relativos al proyecto).
+# Las dependencias entre etapas se deducen de qué etapa produce cada entrada.
+ETAPAS = [
+    {
+        'nombre': 'diagnostico',
+        'script': 'diagnostico.py',
+        'entradas': ['data/datos_originles/*.xls', 'data/datos_originles/*.xlsx'],
+        'salidas': ['data/diagnostico_resultados.txt']
+    },
+    {
+        'nombre': 'preprocesamiento',
+        'script': 'preprocesamiento.py',
+        'entradas': ['data/datos_originles/*.xls', 'data/datos_originles/*.xlsx', 'data/fuentes.json'],
+        'salidas': ['data/processed/archivo1_preprocesado_final.csv',
+                    'data/processed/archivo2_preprocesado_final.csv',
+                    'data/processed/registros_preprocesados.csv',
+                    'data/results/auditoria_pedidos.csv']
+    },
+    {
+        'nombre': 'verificar',
+        'script': 'verificar_preprocesamiento.py',
+        'entradas': ['data/processed/archivo1_preprocesado_final.csv',
+                     'data/processed/archivo2_preprocesado_final.csv'],
+        'salidas': ['data/results/verificacion_preprocesamiento.txt']
+    },
+    {
+        'nombre': 'matriz_clustering',
+        'script': 'matriz_clustering.py',
+        'entradas': ['data/processed/registros_preprocesados.csv'],
+        'salidas': ['data/results/matriz_clustering_final.csv',
+                    'data/results/estadisticas_matriz.txt',
+                    'data/results/tipos_pedido.csv',
+                    'data/results/almacen/estadisticas_matriz.json',
+                    'data/results/almacen/comunidades_por_pedido.json']
+    },
+    {
+        'nombre': 'analizar_matriz',
+        'script': 'analizar_matriz.py',
+        'entradas': ['data/results/matriz_clustering_final.csv'],
+        'salidas': ['data/results/analisis_matriz_detallado.txt']
+    },
+    {
+        'nombre': 'clustering_comunidades',
+        'script': 'clustering_comunidades.py',
+        'entradas': ['data/results/matriz_clustering_final.csv'],
+        'salidas': ['data/results/comunidades_clusters.csv',
+                    'data/results/resumen_clusters.txt',
+                    'data/results/almacen/asignaciones_clusters.json',
+                    'data/results/almacen/metricas_clustering.json',
+                    'data/results/almacen/proyeccion_clusters.json',
+                    'data/results/almacen/varianza_proyeccion.json']
+    },
+    {
+        'nombre': 'comparar_algoritmos',
+        'script': 'comparar_algoritmos.py',
+        'entradas': ['data/results/matriz_clustering_final.csv'],
+        'salidas': ['data/results/comparacion_algoritmos.txt',
+                    'data/results/almacen/metricas_algoritmos.json',
+                    'data/results/almacen/linkage_jerarquico.json',
+                    'data/results/almacen/hojas_jerarquico.json']
+    },
+    {
+        'nombre': 'seleccion_modelos',
+        'script': 'seleccion_modelos.py',
+        'entradas': ['data/results/matriz_clustering_final.csv'],
+        'salidas': ['data/results/seleccion_modelos.csv',
+                    'data/results/seleccion_modelos.txt']
+    },
+    {
+        'nombre': 'analizar_clusters',
+        'script': 'analizar_clusters.py',
+        'entradas': ['data/results/comunidades_clusters.csv',
+                     'data/processed/registros_preprocesados.csv'],
+        'salidas': ['data/results/analisis_caracteristicas_clusters.csv',
+                    'data/results/perfil_tipos_clusters.csv',
+                    'data/results/resumen_analisis_clusters.txt',
+                    'data/results/almacen/perfiles_clusters.json',
+                    'data/results/almacen/perfil_tipos_clusters.json',
+                    'data/results/almacen/distribucion_tipos_tramite.json',
+                    'data/results/almacen/provincias_clusters.json',
+                    'data/results/almacen/metadatos_comunidades.json']
+    },
+    {
+        'nombre': 'visualizacion',
+        'script': 'visualización.py',
+        'entradas': ['data/results/comunidades_clusters.csv',
+                     'data/results/almacen/proyeccion_clusters.json',
+                     'data/results/almacen/varianza_proyeccion.json',
+                     'data/results/almacen/distribucion_tipos_tramite.json',
+                     'data/results/almacen/linkage_jerarquico.json',
+                     'data/results/almacen/hojas_jerarquico.json',
+                     'data/results/almacen/metricas_algoritmos.json'],
+        'salidas': ['data/results/visualizaciones/distribucion_clusters.png',
+                    'data/results/visualizaciones/tamano_clusters.png',
+                    'data/results/visualizaciones/pedidos_principales.png',
+                    'data/results/visualizaciones/resumen_tipos_tramite.png',
+                    'data/results/visualizaciones/dendrograma_jerarquico.png']
+    },
+    {
+        'nombre': 'visualizacion_compartidas',
+        'script': 'visualización_comunidades_compartidas.py',
+        'entradas': ['data/results/comunidades_clusters.csv'],
+        'salidas': ['data/results/visualizaciones/matriz_similitud_comunidades.png',
+                    'data/results/visualizaciones/red_comunidades_compartidas.png',
+                    'data/results/visualizaciones/comunidades_identicas.png']
+    },
+    {
+        'nombre': 'tablero_html',
+        'script': 'tablero_html.py',
+        'entradas': ['data/results/almacen/perfiles_clusters.json',
+                     'data/results/almacen/metadatos_comunidades.json',
+                     'data/results/almacen/proyeccion_clusters.json',
+                     'data/results/almacen/varianza_proyeccion.json',
+                     'data/results/almacen/perfil_tipos_clusters.json',
+                     'data/results/almacen/provincias_clusters.json',
+                     'data/results/almacen/distribucion_tipos_tramite.json',
+                     'data/results/almacen/metricas_clustering.json'],
+        'salidas': ['data/results/tablero_clusters.html']
+    }
+]
+
+
+def obtener_proyecto_dir():
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def expandir(patrones, proyecto_dir):
+    """Rutas absolutas de una lista de rutas o patrones glob, ordenadas"""
+
+    rutas = set()
+    for patron in patrones:
+        ruta = os.path.join(proyecto_dir, patron)
+        coincidencias = glob.glob(ruta)
+        rutas.update(coincidencias if coincidencias else [ruta])
+    return sorted(rutas)
+
+
+def hash_archivo(ruta, memo):
+    """sha1 del contenido, reutilizado si el tamaño y la fecha no cambiaron"""
+
+    if not os.path.exists(ruta):
+        return None
+
+    info = os.stat(ruta)
+    previo = memo.get(ruta)
+    if previo and previo['tamano'] == info.st_size and previo['mtime'] == info.st_mtime_ns:
+        return previo['sha1']
+
+    h = hashlib.sha1()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+
+    memo[ruta] = {'tamano': info.st_size, 'mtime': info.st_mtime_ns, 'sha1': h.hexdigest()}
+    return memo[ruta]['sha1']
+
+
+def firma_etapa(etapa, proyecto_dir, memo):
+    """Hash conjunto de las entradas y del código de una etapa"""
+
+    src_dir = os.path.join(proyecto_dir, "src")
+    rutas = expandir(etapa['entradas'], proyecto_dir) + sorted(modulos_locales(etapa['script'], src_dir))
+
+    h = hashlib.sha1()
+    for ruta in rutas:
+        h.update(os.path.relpath(ruta, proyecto_dir).encode())
+        h.update(str(hash_archivo(ruta, memo)).encode())
+    return h.hexdigest()
+
+
+def dependencias(etapas, proyecto_dir):
+    """Etapas de las que depende cada etapa (productoras de sus entradas)"""
+
+    productor = {}
+    for etapa in etapas:
+        for ruta in expandir(etapa['salidas'], proyecto_dir):
+            productor[ruta] = etapa['nombre']
+
+    return {etapa['nombre']: {productor[ruta] for ruta in expandir(etapa['entradas'], proyecto_dir)
+                              if ruta in productor and productor[ruta] != etapa['nombre']}
+            for etapa in etapas}
+
+
+def cargar_estado(ruta):
+    if os.path.exists(ruta):
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+    return {'etapas': {}, 'hashes': {}}
+
+
+def guardar_estado(estado, ruta):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def etapa_al_dia(etapa, firma, estado, proyecto_dir, memo):
+    """La etapa está al día si su firma coincide y sus salidas no cambiaron"""
+
+    registro = estado['etapas'].get(etapa['nombre'])
+    if not registro or registro['firma'] != firma:
+        return False
+
+    salidas = expandir(etapa['salidas'], proyecto_dir)
+    return all(hash_archivo(ruta, memo) == registro['salidas'].get(os.path.relpath(ruta, proyecto_dir))
+               for ruta in salidas)
+
+
+def ejecutar_script(etapa, proyecto_dir, logs_dir):
+    """Ejecutar el script de la etapa en un proceso aparte, sin ventanas de gráficos"""
+
+    entorno = dict(os.environ, MPLBACKEND='Agg', PYTHONIOENCODING='utf-8')
+    log_path = os.path.join(logs_dir, f"{etapa['nombre']}.log")
+
+    inicio = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log:
+        proceso = subprocess.run([sys.executable, os.path.join(proyecto_dir, "src", etapa['script'])],
+                                 cwd=proyecto_dir, env=entorno, stdout=log, stderr=subprocess.STDOUT)
+    return proceso.returncode, time.perf_counter() - inicio
+
+
+def ejecutar_pipeline(etapas=None, forzar=False, solo=None, max_workers=4):
+    """Ejecutar el flujo completo como un grafo de dependencias
+
+    Cada etapa se omite si el hash de sus entradas y de su código coincide
+    con el de la última ejecución y sus salidas siguen intactas. Las etapas
+    cuyas dependencias ya terminaron se lanzan en paralelo. La salida de
+    cada script queda en data/results/logs/<etapa>.log.
+    """
+
+    etapas = ETAPAS if etapas is None else etapas
+    proyecto_dir = obtener_proyecto_dir()
+    estado_path = os.path.join(proyecto_dir, "data", "results", "cache", "pipeline_estado.json")
+    logs_dir = os.path.join(proyecto_dir, "data", "results", "logs")
+    os.makedirs(logs_dir, exist_ok=True)
+
+    estado = cargar_estado(estado_path)
+    memo = estado['hashes']
+    por_nombre = {etapa['nombre']: etapa for etapa in etapas}
+    deps = dependencias(etapas, proyecto_dir)
+
+    if solo:
+        # Sólo las etapas pedidas y sus ancestros
+        seleccion, pendientes_sel = set(), list(solo)
+        while pendientes_sel:
+            nombre = pendientes_sel.pop()
+            if nombre not in seleccion:
+                seleccion.add(nombre)
+                pendientes_sel.extend(deps[nombre])
+        por_nombre = {n: e for n, e in por_nombre.items() if n in seleccion}
+
+    resultados = {}
+    pendientes = dict(por_nombre)
+    en_curso = {}
+    inicio_total = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pendientes or en_curso:
+            # Lanzar (u omitir) toda etapa cuyas dependencias ya terminaron
+            for nombre, etapa in list(pendientes.items()):
+                previas = [resultados.get(d) for d in deps[nombre] if d in por_nombre]
+                if any(r is None for r in previas):
+                    continue
+                del pendientes[nombre]
+
+                if any(r['estado'] in ('error', 'bloqueada') for r in previas):
+                    resultados[nombre] = {'estado': 'bloqueada', 'tiempo': 0.0}
+                    continue
+
+                t0 = time.perf_counter()
+                firma = firma_etapa(etapa, proyecto_dir, memo)
+                if not forzar and etapa_al_dia(etapa, firma, estado, proyecto_dir, memo):
+                    resultados[nombre] = {'estado': 'omitida', 'tiempo': time.perf_counter() - t0}
+                    continue
+
+                print(f"▶️  {nombre}...")
+                en_curso[executor.submit(ejecutar_script, etapa, proyecto_dir, logs_dir)] = (nombre, firma)
+
+            if not en_curso:
+                continue
+
+            terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                nombre, firma = en_curso.pop(futuro)
+                etapa = por_nombre[nombre]
+                codigo, tiempo = futuro.result()
+
+                salidas = expandir(etapa['salidas'], proyecto_dir)
+                faltantes = [ruta for ruta in salidas if not os.path.exists(ruta)]
+
+                if codigo != 0 or faltantes:
+                    resultados[nombre] = {'estado': 'error', 'tiempo': tiempo}
+                    estado['etapas'].pop(nombre, None)
+                    print(f"❌ {nombre} falló (ver data/results/logs/{nombre}.log)")
+                    continue
+
+                resultados[nombre] = {'estado': 'ejecutada', 'tiempo': tiempo}
+                estado['etapas'][nombre] = {
+                    'firma': firma,
+                    'salidas': {os.path.relpath(ruta, proyecto_dir): hash_archivo(ruta, memo) for ruta in salidas}
+                }
+                guardar_estado(estado, estado_path)
+                print(f"✅ {nombre} ({tiempo:.1f}s)")
+
+    guardar_estado(estado, estado_path)
+    tiempo_total = time.perf_counter() - inicio_total
+
+    # Tabla de tiempos
+    print("\n" + "=" * 60)
+    print(f"{'ETAPA':<28} {'ESTADO':<12} {'TIEMPO':>10}")
+    print("-" * 60)
+    for etapa in etapas:
+        if etapa['nombre'] in resultados:
+            r = resultados[etapa['nombre']]
+            print(f"{etapa['nombre']:<28} {r['estado']:<12} {r['tiempo']:>9.2f}s")
+    print("-" * 60)
+    print(f"{'TOTAL':<41} {tiempo_total:>9.2f}s")
+
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ejecutar el flujo de análisis omitiendo etapas al día")
+    parser.add_argument('--forzar', action='store_true', help="ejecutar todas las etapas aunque estén al día")
+    parser.add_argument('--solo', nargs='+', choices=[e['nombre'] for e in ETAPAS],
+                        help="ejecutar sólo estas etapas (y las que necesitan)")
+    parser.add_argument('--workers', type=int, default=4, help="etapas simultáneas como máximo")
+    parser.add_argument('--perfilar', nargs='+', default=[],
+                        help="secciones a perfilar con cProfile y tracemalloc (ver instrumentacion.py)")
+    args = parser.parse_args()
+
+    if args.perfilar:
+        os.environ['SGDPN_PERFILAR'] = ','.join(args.perfilar)
+
+    resultados = ejecutar_pipeline(forzar=args.forzar, solo=args.solo, max_workers=args.workers)
+    sys.exit(1 if any(r['estado'] == 'error' for r in resultados.values()) else 0)
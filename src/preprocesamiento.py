@@ -1,10 +1,38 @@
 import pandas as pd
 import os
-import re
-
-
-def preprocesamiento_completo():
-    """Preprocesamiento completo de los datos"""
+import argparse
+from canonicalizacion import (canonicalizar_pedido, crear_canonicalizador, canonicalizar_serie,
+                              auditoria_canonicalizacion)
+from deduplicacion_nombres import deduplicar_nombres
+from limpieza_texto import limpiar_columnas
+from fuentes import cargar_registro_fuentes, ingerir_fuentes, construir_pedido, unir_fuentes
+from persistencia import escribir
+from instrumentacion import instrumentar, medir
+
+
+@instrumentar('preprocesamiento')
+def preprocesamiento_completo(canonicalizar=True, sinonimos=None, deduplicar=False, umbral_dedup=0.95,
+                              registro_fuentes=None, max_workers=None, escritor=None):
+    """Preprocesamiento completo de los datos
+
+    Las fuentes se leen según el registro data/fuentes.json (patrón de
+    archivo, fila de encabezado, renombrado de columnas, cómo se forma
+    PEDIDO_UNIFICADO y valores por defecto); todas las hojas se analizan en
+    paralelo. Añadir un libro nuevo sólo requiere declararlo en el registro.
+
+    Con canonicalizar=True, PEDIDO_UNIFICADO se normaliza (acentos,
+    espacios, puntuación y tabla de sinónimos, por defecto
+    SINONIMOS_PEDIDOS) y se guarda una auditoría de las variantes fusionadas.
+
+    Con deduplicar=True, las variantes de un mismo nombre de organización
+    (comillas, tildes, siglas, erratas) se unifican bajo un nombre canónico
+    y un ID_ORGANIZACION estable; las fusiones se guardan para revisión.
+    Está desactivado por defecto: fusionar nombres cambia las comunidades
+    del clustering, así que conviene revisar antes la lista de fusiones.
+
+    Devuelve el almacén combinado de registros, con la columna FUENTE.
+    escritor controla cómo se guardan los CSV (ver persistencia.crear_escritor).
+    """
 
     # Rutas
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,89 +41,107 @@ def preprocesamiento_completo():
     processed_dir = os.path.join(proyecto_dir, "data", "processed")
     os.makedirs(processed_dir, exist_ok=True)
 
-    # Archivos originales
-    archivo1 = os.path.join(data_dir, "matriz_datos_abiertos_septiembre_final.xls")
-    archivo2 = os.path.join(data_dir,
-                            "2022-2025_RESOLUCIONES COMUNAS, COMUNIDADES, ORGANIZACIONES DE PUEBLOS Y NACIONALIDADES (1).xlsx")
+    # Registro de fuentes
+    fuentes = cargar_registro_fuentes(registro_fuentes)
 
     print("1. CARGANDO DATOS...")
-    df1 = pd.read_excel(archivo1, header=4, engine='xlrd')
-    df2 = pd.read_excel(archivo2)
-    print(f"   Archivo 1: {df1.shape}")
-    print(f"   Archivo 2: {df2.shape}")
+    with medir('lectura_fuentes', fuentes=fuentes):
+        tablas = ingerir_fuentes(fuentes, data_dir, max_workers=max_workers)
+    if not tablas:
+        print("❌ Ningún archivo coincide con los patrones de data/fuentes.json")
+        return None
 
-    # Limpiar nombres de columnas
+    for fuente, df in tablas:
+        print(f"   {fuente['nombre']}: {df.shape}")
+
+    # Los nombres de columnas ya se normalizan al leer cada hoja
     print("\n2. NORMALIZANDO NOMBRES DE COLUMNAS...")
-    df1.columns = [str(col).strip().upper() for col in df1.columns]
-    df2.columns = [str(col).strip().upper() for col in df2.columns]
+    print(f"   {len(tablas)} fuentes con esquema común")
 
     # 1. DEPURACIÓN
     print("\n3. DEPURACIÓN...")
 
-    # Eliminar registros sin organización
-    inicial1 = len(df1)
-    inicial2 = len(df2)
-
-    df1 = df1.dropna(subset=['NOMBRE DE LA ORGANIZACIÓN'])
-    df2 = df2.dropna(subset=['NOMBRE DE LA ORGANIZACIÓN'])
-
+    # Eliminar registros sin organización y duplicados de resolución
     print(f"   Registros eliminados (sin organización):")
-    print(f"   Archivo 1: {inicial1 - len(df1)}")
-    print(f"   Archivo 2: {inicial2 - len(df2)}")
+    for i, (fuente, df) in enumerate(tablas):
+        inicial = len(df)
+        df = df.dropna(subset=['NOMBRE DE LA ORGANIZACIÓN'])
+        print(f"   {fuente['nombre']}: {inicial - len(df)}")
 
-    # Eliminar duplicados de resolución
-    df1 = df1.drop_duplicates(subset=['NRO. RESOLUCIÓN'], keep='first')
-    df2 = df2.drop_duplicates(subset=['NRO. RESOLUCIÓN'], keep='first')
+        df = df.drop_duplicates(subset=['NRO. RESOLUCIÓN'], keep='first')
+        tablas[i] = (fuente, df)
 
     print(f"   Duplicados de resolución eliminados")
 
     # 2. NORMALIZACIÓN
     print("\n4. NORMALIZACIÓN...")
 
-    # Normalizar nombres de organizaciones
-    def normalizar_nombre(nombre):
-        if pd.isna(nombre):
-            return nombre
-        nombre = str(nombre).upper().strip()
-        nombre = re.sub(r'\s+', ' ', nombre)
-        return nombre
+    # Normalizar nombres de organizaciones y demás texto libre (una vez por valor distinto)
+    for fuente, df in tablas:
+        limpiadas = limpiar_columnas(df)
+        print(f"   {fuente['nombre']}: {', '.join(limpiadas)}")
 
-    df1['NOMBRE DE LA ORGANIZACIÓN'] = df1['NOMBRE DE LA ORGANIZACIÓN'].apply(normalizar_nombre)
-    df2['NOMBRE DE LA ORGANIZACIÓN'] = df2['NOMBRE DE LA ORGANIZACIÓN'].apply(normalizar_nombre)
-    print("   Nombres de organizaciones normalizados")
+    print("   Textos normalizados (mayúsculas y espacios)")
 
-    # 3. TRATAMIENTO DE VALORES FALTANTES
-    print("\n5. TRATAMIENTO DE VALORES FALTANTES...")
+    # Unificar variantes de un mismo nombre (bloqueo + similitud difusa)
+    if deduplicar:
+        nombres = pd.concat([df['NOMBRE DE LA ORGANIZACIÓN'] for _, df in tablas], ignore_index=True)
+        with medir('deduplicacion_nombres', nombres=nombres):
+            mapa_nombres, fusiones = deduplicar_nombres(nombres, umbral=umbral_dedup)
 
-    # Archivo 1
-    columnas1 = ['ASUNTO', 'TIPO DE SERVICIO', 'TIPO DE SERVICIO ESPECIFÍCO', 'APROBADO POR']
-    for col in columnas1:
-        if col in df1.columns:
-            df1[col] = df1[col].fillna('NO ESPECIFICADO')
+        for _, df in tablas:
+            originales = df['NOMBRE DE LA ORGANIZACIÓN']
+            df['ID_ORGANIZACION'] = originales.map(mapa_nombres['ID_ORGANIZACION'])
+            df['NOMBRE DE LA ORGANIZACIÓN'] = originales.map(mapa_nombres['NOMBRE_CANONICO'])
 
-    # Archivo 2
-    if 'SOLICITUD' in df2.columns:
-        df2['SOLICITUD'] = df2['SOLICITUD'].fillna('NO ESPECIFICADO')
+        results_dir = os.path.join(proyecto_dir, "data", "results")
+        os.makedirs(results_dir, exist_ok=True)
+        fusiones_path = os.path.join(results_dir, "fusiones_organizaciones.csv")
+        escribir(escritor, fusiones.to_csv, fusiones_path, index=False, encoding='utf-8-sig')
 
-    if 'FECHA SOLICITUD' in df2.columns:
-        df2['FECHA SOLICITUD'] = df2['FECHA SOLICITUD'].fillna('FECHA NO ESPECIFICADA')
+        print(f"   Variantes unificadas: {fusiones['NOMBRE_ORIGINAL'].nunique()} nombres en "
+              f"{fusiones['ID_ORGANIZACION'].nunique()} organizaciones")
+        print(f"   Fusiones para revisión guardadas en: {fusiones_path}")
+
+    # 3. TRATAMIENTO DE VALORES FALTANTES
+    print("\n5. TRATAMIENTO DE VALORES FALTANTES...")
+
+    for fuente, df in tablas:
+        for col, valor in fuente['rellenar'].items():
+            if col in df.columns:
+                df[col] = df[col].fillna(valor)
 
     print("   Valores faltantes tratados")
 
     # 4. CODIFICACIÓN DE VARIABLES
     print("\n6. CODIFICACIÓN DE VARIABLES...")
 
-    # Crear columna PEDIDO_UNIFICADO
-    # Para Archivo 1
-    if all(col in df1.columns for col in ['ASUNTO', 'TIPO DE SERVICIO', 'TIPO DE SERVICIO ESPECIFÍCO']):
-        df1['PEDIDO_UNIFICADO'] = df1['ASUNTO'].astype(str) + " | " + \
-                                  df1['TIPO DE SERVICIO'].astype(str)
-        print("   Archivo 1: PEDIDO_UNIFICADO creado (ASUNTO + TIPO DE SERVICIO)")
-
-    # Para Archivo 2
-    if 'SOLICITUD' in df2.columns:
-        df2['PEDIDO_UNIFICADO'] = df2['SOLICITUD'].astype(str)
-        print("   Archivo 2: PEDIDO_UNIFICADO creado (SOLICITUD)")
+    # Crear columna PEDIDO_UNIFICADO según las columnas declaradas por cada fuente
+    for fuente, df in tablas:
+        if construir_pedido(df, fuente):
+            print(f"   {fuente['nombre']}: PEDIDO_UNIFICADO creado ({' + '.join(fuente['pedido'])})")
+        else:
+            print(f"   ⚠️  {fuente['nombre']}: faltan columnas para PEDIDO_UNIFICADO ({', '.join(fuente['pedido'])})")
+
+    # Canonicalizar variantes de PEDIDO_UNIFICADO (una vez por texto distinto)
+    if canonicalizar:
+        canonicalizador = canonicalizar_pedido if sinonimos is None else crear_canonicalizador(sinonimos)
+        dfs_pedido = [df for _, df in tablas if 'PEDIDO_UNIFICADO' in df.columns]
+
+        crudos = pd.concat([df['PEDIDO_UNIFICADO'] for df in dfs_pedido], ignore_index=True)
+        with medir('canonicalizacion', pedidos=crudos):
+            for df in dfs_pedido:
+                df['PEDIDO_UNIFICADO'] = canonicalizar_serie(df['PEDIDO_UNIFICADO'], canonicalizador)
+        canonicos = pd.concat([df['PEDIDO_UNIFICADO'] for df in dfs_pedido], ignore_index=True)
+
+        auditoria = auditoria_canonicalizacion(crudos, canonicos)
+        results_dir = os.path.join(proyecto_dir, "data", "results")
+        os.makedirs(results_dir, exist_ok=True)
+        auditoria_path = os.path.join(results_dir, "auditoria_pedidos.csv")
+        escribir(escritor, auditoria.to_csv, auditoria_path, index=False, encoding='utf-8-sig')
+
+        print(f"   PEDIDO_UNIFICADO canonicalizado: {crudos.nunique()} → {canonicos.nunique()} pedidos distintos")
+        print(f"   Auditoría de variantes guardada en: {auditoria_path}")
 
     # 7. VERIFICACIÓN FINAL
     print("\n7. VERIFICACIÓN FINAL...")
@@ -104,8 +150,8 @@ def preprocesamiento_completo():
     columnas_criticas = ['NOMBRE DE LA ORGANIZACIÓN', 'NRO. RESOLUCIÓN', 'PEDIDO_UNIFICADO']
 
     print("\n   Nulos en columnas críticas:")
-    for df, nombre in [(df1, "Archivo 1"), (df2, "Archivo 2")]:
-        print(f"\n   {nombre}:")
+    for fuente, df in tablas:
+        print(f"\n   {fuente['nombre']}:")
         for col in columnas_criticas:
             if col in df.columns:
                 nulos = df[col].isnull().sum()
@@ -117,26 +163,31 @@ def preprocesamiento_completo():
     # 8. GUARDAR DATOS PREPROCESADOS
     print("\n8. GUARDANDO DATOS PREPROCESADOS...")
 
-    archivo1_proc = os.path.join(processed_dir, "archivo1_preprocesado_final.csv")
-    archivo2_proc = os.path.join(processed_dir, "archivo2_preprocesado_final.csv")
-
-    df1.to_csv(archivo1_proc, index=False, encoding='utf-8-sig')
-    df2.to_csv(archivo2_proc, index=False, encoding='utf-8-sig')
+    # Archivos individuales declarados en el registro
+    for fuente, df in tablas:
+        if fuente['salida']:
+            salida_path = os.path.join(processed_dir, fuente['salida'])
+            escribir(escritor, df.to_csv, salida_path, index=False, encoding='utf-8-sig')
+            print(f"   {fuente['nombre']} guardado: {salida_path}")
 
-    print(f"   Archivo 1 guardado: {archivo1_proc}")
-    print(f"   Archivo 2 guardado: {archivo2_proc}")
+    # Almacén combinado con la fuente de cada registro
+    registros = unir_fuentes(tablas)
+    registros_path = os.path.join(processed_dir, "registros_preprocesados.csv")
+    escribir(escritor, registros.to_csv, registros_path, index=False, encoding='utf-8-sig')
+    print(f"   Registros combinados guardados: {registros_path}")
 
     # 9. RESUMEN
     print("\n" + "=" * 60)
     print("RESUMEN DEL PREPROCESAMIENTO")
     print("=" * 60)
 
-    print(f"\nArchivo 1 final: {df1.shape}")
-    print(f"Archivo 2 final: {df2.shape}")
+    for fuente, df in tablas:
+        print(f"\n{fuente['nombre']} final: {df.shape}")
+    print(f"\nRegistros combinados: {registros.shape}")
 
     # Verificar que no haya nulos en columnas críticas
     nulos_criticos = 0
-    for df in [df1, df2]:
+    for _, df in tablas:
         for col in columnas_criticas:
             if col in df.columns:
                 nulos_criticos += df[col].isnull().sum()
@@ -148,7 +199,7 @@ def preprocesamiento_completo():
     else:
         print(f"\n⚠️  Aún hay {nulos_criticos} nulos en columnas críticas")
 
-    return df1, df2
+    return registros
 
 
 if __name__ == "__main__":
@@ -158,4 +209,11 @@ if __name__ == "__main__":
     print("          valores faltantes y Codificación de variables")
     print("=" * 60)
 
-    df1_final, df2_final = preprocesamiento_completo()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Preprocesamiento completo de los datos")
+    parser.add_argument('--deduplicar', action='store_true',
+                        help="unificar variantes de nombres de organización (ver fusiones_organizaciones.csv)")
+    parser.add_argument('--umbral-dedup', type=float, default=0.95,
+                        help="similitud mínima frente al nombre canónico para fusionar (por defecto 0.95)")
+    args = parser.parse_args()
+
+    registros_final = preprocesamiento_completo(deduplicar=args.deduplicar, umbral_dedup=args.umbral_dedup)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from reduccion_dimensional import a_matriz_dispersa, reducir_svd
+from resultados import guardar_tabla, cargar_tabla_si_existe
+from persistencia import escribir
+
+
+def calcular_proyeccion(clusters_df):
+    """Proyección 2D (TruncatedSVD aleatorizado sobre la matriz dispersa) junto a los clusters
+
+    El embedding queda además en la caché de reduccion_dimensional, así
+    que recalcularlo para la misma matriz sólo cuesta leerlo de disco.
+    Devuelve (tabla, varianza) con tabla = comunidad, cluster, x, y.
+    """
+
+    X = a_matriz_dispersa(clusters_df.drop('CLUSTER', axis=1))
+    X_2d, varianza = reducir_svd(X, n_componentes=2)
+
+    tabla = pd.DataFrame({
+        'comunidad': clusters_df.index,
+        'cluster': clusters_df['CLUSTER'].to_numpy(),
+        'x': X_2d[:, 0],
+        'y': X_2d[:, 1] if X_2d.shape[1] > 1 else 0.0
+    })
+    return tabla, np.resize(varianza, 2)
+
+
+def guardar_proyeccion(tabla, varianza, escritor=None):
+    """Guardar la proyección y su varianza explicada en el almacén de resultados"""
+
+    escribir(escritor, guardar_tabla, 'proyeccion_clusters', tabla)
+    escribir(escritor, guardar_tabla, 'varianza_proyeccion',
+             pd.DataFrame({'componente': [1, 2], 'varianza': varianza}))
+
+
+def cargar_proyeccion(clusters_df):
+    """Proyección guardada si corresponde exactamente a estas comunidades y clusters (si no, None)"""
+
+    tabla = cargar_tabla_si_existe('proyeccion_clusters')
+    varianza = cargar_tabla_si_existe('varianza_proyeccion')
+    if tabla is None or varianza is None or len(tabla) != len(clusters_df):
+        return None
+
+    mismas = (np.array_equal(tabla['comunidad'].to_numpy(dtype=object), clusters_df.index.to_numpy(dtype=object))
+              and np.array_equal(tabla['cluster'].to_numpy(), clusters_df['CLUSTER'].to_numpy()))
+    if not mismas:
+        return None
+    return tabla, varianza['varianza'].to_numpy()
+
+
+def obtener_proyeccion(clusters_df):
+    """Proyección 2D de los clusters: la del almacén si sigue vigente, si no se calcula
+
+    No escribe en el almacén (las figuras pueden dibujarse sobre clusters
+    que no son los del flujo, p. ej. en el benchmark); la guarda
+    clustering_comunidades.py al asignar los clusters.
+    """
+
+    guardada = cargar_proyeccion(clusters_df)
+    if guardada is not None:
+        return guardada
+    return calcular_proyeccion(clusters_df)
@@ -0,0 +1,91 @@
+import os
+import numpy as np
+import networkx as nx
+from matplotlib.collections import LineCollection
+from reduccion_dimensional import huella_matriz, obtener_cache_dir
+from comunidades_grafo import grafo_pedidos_compartidos
+
+# Por encima de este número de nodos el layout de fuerzas (O(n²) por iteración) pasa a ser espectral
+MAX_NODOS_FUERZAS = 3000
+
+
+def grafo_red(matriz, top_k=10, min_compartidos=1):
+    """Grafo disperso de pedidos compartidos con a lo sumo top_k vecinos por comunidad"""
+
+    return grafo_pedidos_compartidos(matriz, min_compartidos=min_compartidos, top_k=top_k)
+
+
+def layout_red(grafo, metodo='auto', random_state=42, usar_cache=True):
+    """Posiciones 2D de los nodos (array n × 2), cacheadas en disco
+
+    metodo 'fuerzas' usa spring_layout (Fruchterman-Reingold) con semilla
+    fija; 'espectral' usa los vectores propios del laplaciano disperso;
+    'auto' elige fuerzas hasta MAX_NODOS_FUERZAS nodos. La clave del caché
+    es el hash del grafo, el método y la semilla.
+    """
+
+    n = grafo.shape[0]
+    if metodo == 'auto':
+        metodo = 'fuerzas' if n <= MAX_NODOS_FUERZAS else 'espectral'
+
+    cache_path = None
+    if usar_cache:
+        clave = f"{huella_matriz(grafo)[:16]}_{metodo}_{random_state}"
+        cache_path = os.path.join(obtener_cache_dir(), f"layout_{clave}.npy")
+        if os.path.exists(cache_path):
+            return np.load(cache_path)
+
+    G = nx.from_scipy_sparse_array(grafo, edge_attribute='weight')
+    if n < 3:
+        posiciones = nx.circular_layout(G)
+    elif metodo == 'fuerzas':
+        posiciones = nx.spring_layout(G, weight='weight', seed=random_state)
+    elif metodo == 'espectral':
+        posiciones = nx.spectral_layout(G, weight='weight')
+    else:
+        raise ValueError(f"Layout desconocido: {metodo} (use 'auto', 'fuerzas' o 'espectral')")
+
+    posiciones = np.array([posiciones[i] for i in range(n)], dtype=np.float64).reshape(n, 2)
+
+    if cache_path is not None:
+        np.save(cache_path, posiciones)
+
+    return posiciones
+
+
+def dibujar_red(ax, grafo, posiciones, colores_nodo, tamanos_nodo, rasterizar_desde=5000):
+    """Dibujar todas las aristas con una sola LineCollection y todos los nodos con un scatter
+
+    El grosor de cada arista crece con los pedidos compartidos (más finas
+    cuando hay miles de aristas) y su color es el del nodo de origen. Con muchos nodos las capas se rasterizan
+    para que el archivo no crezca con el número de elementos.
+    """
+
+    triangular = grafo.tocoo()
+    mascara = triangular.row < triangular.col
+    origen, destino, pesos = triangular.row[mascara], triangular.col[mascara], triangular.data[mascara]
+
+    segmentos = np.stack([posiciones[origen], posiciones[destino]], axis=1)
+    colores_nodo = np.asarray(colores_nodo, dtype=object)
+    rasterizar = grafo.shape[0] > rasterizar_desde
+    escala = 1.0 if len(pesos) <= 500 else 0.3
+
+    lineas = LineCollection(segmentos,
+                            colors=list(colores_nodo[origen]),
+                            linewidths=(0.5 + pesos * 0.5) * escala,
+                            alpha=0.6,
+                            zorder=1,
+                            rasterized=rasterizar)
+    ax.add_collection(lineas)
+
+    ax.scatter(posiciones[:, 0], posiciones[:, 1],
+               s=tamanos_nodo,
+               c=list(colores_nodo),
+               edgecolors='gray',
+               linewidth=1 if not rasterizar else 0.2,
+               alpha=0.8,
+               zorder=5,
+               rasterized=rasterizar)
+
+    ax.autoscale_view()
+    return len(pesos)
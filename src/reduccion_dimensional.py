@@ -0,0 +1,76 @@
+import os
+import hashlib
+import numpy as np
+from scipy import sparse
+from sklearn.decomposition import TruncatedSVD
+
+
+def a_matriz_dispersa(matriz):
+    """Convertir la matriz binaria (DataFrame, array o dispersa) a formato CSR"""
+
+    if sparse.issparse(matriz):
+        return sparse.csr_matrix(matriz, dtype=np.float32)
+
+    valores = matriz.values if hasattr(matriz, 'values') else np.asarray(matriz)
+    return sparse.csr_matrix(valores, dtype=np.float32)
+
+
+def huella_matriz(X):
+    """Calcular un hash estable del contenido de una matriz dispersa"""
+
+    X = a_matriz_dispersa(X)
+    X.sort_indices()
+
+    h = hashlib.sha1()
+    h.update(np.asarray(X.shape, dtype=np.int64).tobytes())
+    h.update(X.indptr.astype(np.int64).tobytes())
+    h.update(X.indices.astype(np.int64).tobytes())
+    h.update(X.data.astype(np.float32).tobytes())
+    return h.hexdigest()
+
+
+def obtener_cache_dir():
+    """Directorio donde se guardan los resultados intermedios reutilizables
+
+    Por defecto data/results/cache/; la variable de entorno SGDPN_CACHE_DIR
+    lo cambia (el benchmark usa un directorio vacío en cada medición).
+    """
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    proyecto_dir = os.path.dirname(script_dir)
+    cache_dir = os.environ.get('SGDPN_CACHE_DIR') or os.path.join(proyecto_dir, "data", "results", "cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def reducir_svd(matriz, n_componentes=50, random_state=42, usar_cache=True):
+    """Embedding TruncatedSVD aleatorizado de la matriz dispersa, cacheado en disco
+
+    Devuelve (embedding, varianza_explicada). El embedding tiene forma
+    (n_comunidades, n_componentes) y nunca requiere una copia densa de la matriz.
+    """
+
+    X = a_matriz_dispersa(matriz)
+
+    # TruncatedSVD exige n_componentes < n_pedidos
+    n_componentes = max(1, min(n_componentes, X.shape[1] - 1))
+
+    cache_path = None
+    if usar_cache:
+        clave = f"{huella_matriz(X)[:16]}_{n_componentes}_{random_state}"
+        cache_path = os.path.join(obtener_cache_dir(), f"svd_{clave}.npz")
+
+        if os.path.exists(cache_path):
+            datos = np.load(cache_path)
+            return datos['embedding'], datos['varianza']
+
+    svd = TruncatedSVD(n_components=n_componentes,
+                       algorithm='randomized',
+                       random_state=random_state)
+    embedding = svd.fit_transform(X)
+    varianza = svd.explained_variance_ratio_
+
+    if cache_path is not None:
+        np.savez_compressed(cache_path, embedding=embedding, varianza=varianza)
+
+    return embedding, varianza
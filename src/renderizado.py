@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import hashlib
+import inspect
+from datetime import datetime
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import matplotlib
+
+# Modo sin pantalla por defecto: backend Agg, sin plt.show(). SGDPN_MOSTRAR=1 abre las ventanas.
+MOSTRAR = os.environ.get('SGDPN_MOSTRAR') == '1'
+if not MOSTRAR:
+    matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+from instrumentacion import medir, mediciones_desde, incorporar_mediciones
+from dependencias import modulos_locales
+
+# Paleta de colores pastel profesional
+PASTEL_COLORS = [
+    '#FFB6C1', '#87CEEB', '#98FB98', '#DDA0DD', '#FFD700',
+    '#FFA07A', '#20B2AA', '#F0E68C', '#CD853F', '#B0E0E6'
+]
+
+DPI = 300
+
+# Manifiesto de la caché de figuras (uno por directorio de salida)
+MANIFIESTO_FIGURAS = "manifiesto_figuras.json"
+
+
+def colores_clusters(n_clusters):
+    """Un color por cluster: la paleta pastel hasta 10 clusters, tab20/hsv por encima"""
+
+    if n_clusters <= len(PASTEL_COLORS):
+        return PASTEL_COLORS[:n_clusters]
+    if n_clusters <= 20:
+        return [matplotlib.colors.to_hex(plt.cm.tab20(i)) for i in range(n_clusters)]
+    return [matplotlib.colors.to_hex(plt.cm.hsv(i / n_clusters)) for i in range(n_clusters)]
+
+
+def configurar_estilo():
+    """Estilo y fuentes comunes a todas las figuras"""
+
+    plt.style.use('seaborn-v0_8-whitegrid')
+    plt.rcParams.update({
+        'font.size': 11,
+        'font.family': 'DejaVu Sans',
+        'axes.titlesize': 14,
+        'axes.labelsize': 12,
+        'xtick.labelsize': 10,
+        'ytick.labelsize': 10,
+        'legend.fontsize': 10,
+        'figure.titlesize': 16
+    })
+
+
+def guardar_figura(fig, ruta, dpi=DPI):
+    """Guardar la figura, mostrarla sólo en modo interactivo y liberar su memoria"""
+
+    with medir('guardar_figura', figura=os.path.basename(ruta)):
+        fig.savefig(ruta, dpi=dpi, bbox_inches='tight')
+    if MOSTRAR:
+        plt.show()
+    plt.close(fig)
+    return ruta
+
+
+def _actualizar_huella(h, valor):
+    """Añadir al hash el contenido de un argumento de figura"""
+
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        columnas = valor.columns.tolist() if isinstance(valor, pd.DataFrame) else [valor.name]
+        h.update(repr(columnas).encode('utf-8'))
+        h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    elif isinstance(valor, np.ndarray):
+        h.update(f"{valor.dtype}{valor.shape}".encode('utf-8'))
+        h.update(np.ascontiguousarray(valor).tobytes())
+    elif isinstance(valor, str) and os.path.isfile(valor):
+        # Rutas de entrada: cuenta su contenido, no su nombre
+        with open(valor, 'rb') as f:
+            h.update(hashlib.sha1(f.read()).digest())
+    else:
+        h.update(repr(valor).encode('utf-8'))
+
+
+@lru_cache(maxsize=None)
+def fuentes_figura(fuente):
+    """Archivo que define una figura y los módulos de src/ que importa, recursivamente"""
+
+    return tuple(sorted(modulos_locales(os.path.basename(fuente), os.path.dirname(fuente)) | {__file__}))
+
+
+def clave_figura(funcion, argumentos, dpi=DPI):
+    """Hash de todo lo que determina una figura
+
+    Entra el contenido de los argumentos (DataFrames y archivos de entrada),
+    los parámetros de dibujo y el código del módulo que define la figura y
+    de todos los módulos locales que importa (proyección, heatmap, red,
+    árbol jerárquico, este módulo con su estilo y paleta...). Los datos del
+    almacén deben llegar como argumentos, no leerse dentro de la figura.
+    La ruta de salida no cuenta.
+    """
+
+    # El módulo se identifica por su archivo: vale igual ejecutado como script (__main__) o importado
+    fuente = inspect.getsourcefile(funcion)
+    h = hashlib.sha1()
+    h.update(f"{os.path.basename(fuente)}.{funcion.__qualname__}|{dpi}|{matplotlib.__version__}".encode('utf-8'))
+    for archivo in fuentes_figura(os.path.abspath(fuente)):
+        h.update(os.path.basename(archivo).encode('utf-8'))
+        with open(archivo, 'rb') as f:
+            h.update(hashlib.sha1(f.read()).digest())
+    for nombre in sorted(argumentos):
+        if nombre != 'ruta':
+            h.update(nombre.encode('utf-8'))
+            _actualizar_huella(h, argumentos[nombre])
+    return h.hexdigest()
+
+
+def leer_manifiesto(directorio):
+    """Entradas del manifiesto de figuras de un directorio ({} si no existe o está dañado)"""
+
+    ruta = os.path.join(directorio, MANIFIESTO_FIGURAS)
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f).get('figuras', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def guardar_manifiesto(directorio, entradas):
+    """Escribir el manifiesto de forma atómica (archivo temporal + reemplazo)"""
+
+    ruta = os.path.join(directorio, MANIFIESTO_FIGURAS)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'figuras': entradas}, f, indent=2, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def figura_vigente(entrada, clave, ruta):
+    """¿La figura guardada corresponde a esta clave y sigue en disco?"""
+
+    if not entrada or entrada.get('clave') != clave:
+        return False
+    return not entrada.get('generada') or os.path.exists(ruta)
+
+
+def _renderizar_tarea(nombre, funcion, argumentos):
+    """Dibujar una figura (en un proceso de trabajo) y devolver sus mediciones"""
+
+    configurar_estilo()
+    inicio = time.perf_counter()
+    with medir(f"figura_{nombre}") as registro:
+        ruta = funcion(**argumentos)
+    plt.close('all')
+    return ruta, time.perf_counter() - inicio, mediciones_desde(registro['orden'])
+
+
+def renderizar_figuras(tareas, max_workers=None, usar_cache=True, forzar=False):
+    """Dibujar figuras independientes en paralelo, una por proceso de trabajo
+
+    tareas es una lista de (nombre, función, argumentos); cada función
+    dibuja y guarda una figura en argumentos['ruta'] y devuelve esa ruta
+    (o None si no hay datos para ella). Las mediciones de cada proceso se
+    incorporan al reporte de este. En modo interactivo (SGDPN_MOSTRAR=1) o
+    con max_workers=1 se dibujan en secuencia en este proceso.
+
+    Con usar_cache, cada figura se identifica por clave_figura y el
+    manifiesto de su directorio recuerda la clave con la que se dibujó:
+    sólo se vuelven a dibujar las figuras cuyos datos o parámetros
+    cambiaron (o cuyo archivo falta). forzar=True las dibuja todas.
+
+    Devuelve un dict nombre -> {'ruta', 'tiempo_s', 'en_cache'} en el orden de tareas.
+    """
+
+    claves, manifiestos, pendientes, resultado = {}, {}, [], {}
+    for nombre, funcion, argumentos in tareas:
+        resultado[nombre] = None
+        if not usar_cache:
+            pendientes.append((nombre, funcion, argumentos))
+            continue
+
+        ruta = argumentos['ruta']
+        directorio = os.path.dirname(ruta)
+        if directorio not in manifiestos:
+            manifiestos[directorio] = leer_manifiesto(directorio)
+        claves[nombre] = clave_figura(funcion, argumentos)
+        entrada = manifiestos[directorio].get(os.path.basename(ruta))
+
+        if not forzar and not MOSTRAR and figura_vigente(entrada, claves[nombre], ruta):
+            resultado[nombre] = {'ruta': ruta if entrada['generada'] else None, 'tiempo_s': 0.0, 'en_cache': True}
+        else:
+            pendientes.append((nombre, funcion, argumentos))
+
+    if len(pendientes) < len(tareas):
+        print(f"   {len(tareas) - len(pendientes)} de {len(tareas)} figuras sin cambios (en caché); "
+              f"se dibujan {len(pendientes)}")
+
+    if MOSTRAR or max_workers == 1 or len(pendientes) <= 1:
+        salidas = [_renderizar_tarea(*tarea) for tarea in pendientes]
+    else:
+        max_workers = max_workers or min(len(pendientes), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futuros = [executor.submit(_renderizar_tarea, *tarea) for tarea in pendientes]
+            salidas = [futuro.result() for futuro in futuros]
+        for _, _, registros in salidas:
+            incorporar_mediciones(registros)
+
+    for (nombre, _, argumentos), (ruta, tiempo, _) in zip(pendientes, salidas):
+        resultado[nombre] = {'ruta': ruta, 'tiempo_s': tiempo, 'en_cache': False}
+        if usar_cache:
+            manifiestos[os.path.dirname(argumentos['ruta'])][os.path.basename(argumentos['ruta'])] = {
+                'figura': nombre,
+                'clave': claves[nombre],
+                'generada': ruta is not None,
+                'tiempo_s': round(tiempo, 3),
+                'fecha': datetime.now().isoformat(timespec='seconds')
+            }
+
+    if pendientes:
+        for directorio, entradas in manifiestos.items():
+            guardar_manifiesto(directorio, entradas)
+
+    return resultado
@@ -0,0 +1,400 @@
+import os
+import sys
+import json
+import math
+import argparse
+import platform
+import tempfile
+import contextlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+VERSION_BENCHMARK = 1
+
+# Etapas medidas, en orden de ejecución. Las que no se piden pero son
+# necesarias para las siguientes se ejecutan igualmente, sin medirse.
+ETAPAS_BENCHMARK = ['preprocesamiento', 'matriz', 'analisis_matriz', 'clustering_kmeans',
+                    'comparacion_algoritmos', 'perfil_clusters', 'figuras']
+
+# Sub-pasos de instrumentacion.py que se suman dentro de cada etapa
+SUBETAPAS = ['lectura_fuentes', 'deduplicacion_nombres', 'canonicalizacion', 'llenado_matriz',
+             'kmeans_fit', 'silhouette', 'dbscan_fit', 'jerarquico_fit', 'grafo_pedidos', 'louvain_fit',
+             'espectral_fit', 'guardar_figura']
+
+TAMANOS_POR_DEFECTO = [1_000, 3_000, 10_000]
+
+
+def obtener_benchmarks_dir():
+    """Directorio data/results/benchmarks/ para resultados y línea base"""
+
+    proyecto_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    benchmarks_dir = os.path.join(proyecto_dir, "data", "results", "benchmarks")
+    os.makedirs(benchmarks_dir, exist_ok=True)
+    return benchmarks_dir
+
+
+def guardar_json(ruta, datos):
+    """Escribir JSON de forma atómica (archivo temporal + reemplazo)"""
+
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False, default=str)
+    os.replace(temporal, ruta)
+
+
+@contextlib.contextmanager
+def directorio_temporal(variable):
+    """Apuntar una variable de entorno (SGDPN_CACHE_DIR...) a un directorio vacío mientras dure el bloque
+
+    Los procesos de trabajo que se lancen dentro (figuras) heredan la variable.
+    """
+
+    anterior = os.environ.get(variable)
+    with tempfile.TemporaryDirectory() as directorio:
+        os.environ[variable] = directorio
+        try:
+            yield directorio
+        finally:
+            if anterior is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = anterior
+
+
+def _ejecutar_medido(resultados, etapa, n_filas, etapas, repeticiones, funcion, *args, **kwargs):
+    """Ejecutar una etapa (repetida si se mide) y anotar su latencia, CPU y memoria
+
+    Cada repetición medida usa una caché en disco vacía (SVD, árbol Ward,
+    autovectores, layout de la red): si no, a partir de la segunda
+    repetición, y en cada ejecución frente a la línea base, se mediría una
+    lectura de caché en lugar del cálculo. Las etapas que no se miden
+    tampoco escriben en la caché del proyecto.
+    """
+
+    from instrumentacion import medir
+
+    if etapa not in etapas:
+        with directorio_temporal('SGDPN_CACHE_DIR'), open(os.devnull, 'w') as nulo, \
+                contextlib.redirect_stdout(nulo):
+            return funcion(*args, **kwargs)
+
+    tiempos, cpus = [], []
+    for repeticion in range(repeticiones):
+        with directorio_temporal('SGDPN_CACHE_DIR'), open(os.devnull, 'w') as nulo, \
+                contextlib.redirect_stdout(nulo):
+            with medir(f"benchmark_{etapa}", filas=n_filas, repeticion=repeticion) as registro:
+                salida = funcion(*args, **kwargs)
+        tiempos.append(registro['tiempo_s'])
+        cpus.append(registro['cpu_s'])
+        if repeticion == 0:
+            memoria = {'rss_pico_mb': registro.get('rss_pico_mb'),
+                       'rss_incremento_mb': registro.get('rss_incremento_mb')}
+
+    tiempo = float(np.median(tiempos))
+    resultados.append({
+        'etapa': etapa,
+        'filas': n_filas,
+        'tiempo_s': round(tiempo, 6),
+        'tiempos_s': tiempos,
+        'cpu_s': round(float(np.median(cpus)), 6),
+        'filas_por_s': round(n_filas / tiempo, 1) if tiempo > 0 else None,
+        **memoria,
+        'forma_salida': getattr(salida, 'shape', None)
+    })
+    return salida
+
+
+def medir_tamano(n_filas, etapas=None, repeticiones=1, random_state=42):
+    """Ejecutar el flujo completo sobre n_filas sintéticas y medir cada etapa
+
+    Los datos se generan con datos_sinteticos.py; las etapas reciben sus
+    entradas en memoria y un escritor que sólo persiste las tablas del
+    almacén de resultados, en un almacén temporal: así las figuras se
+    dibujan con la proyección, la distribución y el árbol de estos datos
+    sintéticos, no con los del proyecto. Las figuras se guardan en un
+    directorio temporal. Devuelve una lista de resultados (uno por etapa
+    medida) con latencia mediana, CPU, filas por segundo y memoria residente.
+    """
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from datos_sinteticos import generar_datos_sinteticos, guardar_datos_sinteticos, registros_sinteticos
+    from preprocesamiento import preprocesamiento_completo
+    from matriz_clustering import crear_matriz_clustering
+    from analizar_matriz import analizar_matriz_detalladamente
+    from clustering_comunidades import clustering_comunidades
+    from comparar_algoritmos import comparar_algoritmos_clustering
+    from analizar_clusters import analizar_caracteristicas_clusters
+    from visualización import visualizacion_profesional
+    from persistencia import crear_escritor
+    from resultados import guardar_tabla
+    from instrumentacion import guardar_reporte
+
+    etapas = etapas or ETAPAS_BENCHMARK
+    escritor = crear_escritor(persistir=False, siempre=[guardar_tabla])
+    resultados = []
+
+    def ejecutar(etapa, funcion, *args, **kwargs):
+        return _ejecutar_medido(resultados, etapa, n_filas, etapas, repeticiones, funcion, *args, **kwargs)
+
+    with directorio_temporal('SGDPN_ALMACEN_DIR'):
+        if 'preprocesamiento' in etapas:
+            df1, df2 = generar_datos_sinteticos(n_filas, random_state=random_state)
+            registro_path = guardar_datos_sinteticos(df1, df2, etiqueta=f"benchmark_n{n_filas}", formato='csv')
+            registros = ejecutar('preprocesamiento', preprocesamiento_completo,
+                                 registro_fuentes=registro_path, escritor=escritor)
+        else:
+            registros = registros_sinteticos(n_filas, random_state=random_state)
+
+        matriz = ejecutar('matriz', crear_matriz_clustering, registros=registros, escritor=escritor)
+
+        if 'analisis_matriz' in etapas:
+            ejecutar('analisis_matriz', analizar_matriz_detalladamente, matriz=matriz, escritor=escritor)
+
+        clusters = ejecutar('clustering_kmeans', clustering_comunidades, matriz=matriz, escritor=escritor)
+
+        # Las figuras necesitan el árbol jerárquico y la distribución por tipo de estos datos
+        if 'comparacion_algoritmos' in etapas or 'figuras' in etapas:
+            ejecutar('comparacion_algoritmos', comparar_algoritmos_clustering, matriz=matriz, escritor=escritor)
+
+        if 'perfil_clusters' in etapas or 'figuras' in etapas:
+            ejecutar('perfil_clusters', analizar_caracteristicas_clusters,
+                     clusters_df=clusters, registros=registros, escritor=escritor)
+
+        if 'figuras' in etapas:
+            with tempfile.TemporaryDirectory() as figuras_dir:
+                ejecutar('figuras', visualizacion_profesional, clusters_df=clusters,
+                         visualizaciones_dir=figuras_dir, forzar=True)
+                plt.close('all')
+
+    # Detalle de sub-pasos (ajustes, Silhouette, figuras...) desde el reporte de instrumentación
+    ruta_reporte = guardar_reporte(f"benchmark_n{n_filas}")
+    with open(ruta_reporte, encoding='utf-8') as f:
+        reporte = json.load(f)
+    for resultado in resultados:
+        resultado['subetapas'] = sumar_subetapas(reporte, f"benchmark_{resultado['etapa']}")
+
+    return resultados
+
+
+def sumar_subetapas(reporte, etapa):
+    """Tiempo total de cada sub-paso instrumentado dentro de una etapa (primera repetición)"""
+
+    raiz = next((m for m in reporte['mediciones'] if m['nombre'] == etapa), None)
+    if raiz is None:
+        return {}
+
+    # Las mediciones están en orden de inicio; los descendientes siguen a la raíz con nivel mayor
+    totales = {}
+    posicion = reporte['mediciones'].index(raiz)
+    for m in reporte['mediciones'][posicion + 1:]:
+        if m['nivel'] <= raiz['nivel']:
+            break
+        if m['nombre'] in SUBETAPAS:
+            totales[m['nombre']] = round(totales.get(m['nombre'], 0) + m['tiempo_s'], 6)
+    return totales
+
+
+def ejecutar_benchmark(tamanos=None, etapas=None, repeticiones=1, random_state=42):
+    """Medir todas las etapas a tamaños crecientes y guardar los resultados
+
+    Cada tamaño se ejecuta en un proceso nuevo, de modo que la memoria
+    pico de un tamaño no contamina la del siguiente. Devuelve el dict de
+    resultados guardado en data/results/benchmarks/.
+    """
+
+    tamanos = sorted(tamanos or TAMANOS_POR_DEFECTO)
+    etapas = etapas or ETAPAS_BENCHMARK
+
+    resultados = []
+    for n_filas in tamanos:
+        print(f"\n⏳ Midiendo {n_filas:,} filas...")
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            medidos = executor.submit(medir_tamano, n_filas, etapas, repeticiones, random_state).result()
+        for r in medidos:
+            print(f"   {r['etapa']:<24} {r['tiempo_s']:>9.2f}s  {r['filas_por_s'] or 0:>12,.0f} filas/s")
+        resultados.extend(medidos)
+
+    benchmark = {
+        'version': VERSION_BENCHMARK,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'tamanos': tamanos,
+        'etapas': etapas,
+        'repeticiones': repeticiones,
+        'resultados': resultados
+    }
+
+    benchmarks_dir = obtener_benchmarks_dir()
+    ruta = os.path.join(benchmarks_dir, f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json")
+    guardar_json(ruta, benchmark)
+    guardar_json(os.path.join(benchmarks_dir, "benchmark_ultimo.json"), benchmark)
+    benchmark['ruta'] = ruta
+
+    return benchmark
+
+
+def comparar_con_base(benchmark, base, tolerancia=0.25, minimo_s=0.05, minimo_mb=10):
+    """Comparar cada (etapa, filas) con la línea base
+
+    Una etapa es regresión si su latencia supera la de la base en más de
+    tolerancia (fracción) y en más de minimo_s segundos (para no marcar
+    ruido en etapas muy rápidas), o si la memoria que añade crece más de
+    tolerancia y más de minimo_mb. La memoria añadida es rss_incremento_mb,
+    lo que la etapa sube el pico del proceso: rss_pico_mb es del proceso
+    entero y sólo crece, así que cada etapa heredaría el de las anteriores.
+    Devuelve una lista de comparaciones con su estado.
+    """
+
+    previos = {(r['etapa'], r['filas']): r for r in base['resultados']}
+
+    comparaciones = []
+    for r in benchmark['resultados']:
+        previo = previos.get((r['etapa'], r['filas']))
+        if previo is None:
+            continue
+
+        razon_tiempo = r['tiempo_s'] / previo['tiempo_s'] if previo['tiempo_s'] > 0 else math.inf
+        incremento, incremento_base = r.get('rss_incremento_mb'), previo.get('rss_incremento_mb')
+        crecimiento_mb = None
+        if incremento is not None and incremento_base is not None:
+            crecimiento_mb = incremento - incremento_base
+
+        lento = razon_tiempo > 1 + tolerancia and r['tiempo_s'] - previo['tiempo_s'] > minimo_s
+        pesado = crecimiento_mb is not None and crecimiento_mb > max(minimo_mb, tolerancia * incremento_base)
+        if lento or pesado:
+            estado = 'regresion'
+        elif razon_tiempo < 1 - tolerancia and previo['tiempo_s'] - r['tiempo_s'] > minimo_s:
+            estado = 'mejora'
+        else:
+            estado = 'igual'
+
+        comparaciones.append({
+            'etapa': r['etapa'],
+            'filas': r['filas'],
+            'tiempo_base_s': previo['tiempo_s'],
+            'tiempo_s': r['tiempo_s'],
+            'razon_tiempo': round(razon_tiempo, 3),
+            'incremento_base_mb': incremento_base,
+            'incremento_mb': incremento,
+            'estado': estado
+        })
+
+    return comparaciones
+
+
+def exponentes_escalado(resultados):
+    """Exponente empírico t ∝ n^b de cada etapa entre tamaños consecutivos"""
+
+    por_etapa = {}
+    for r in resultados:
+        por_etapa.setdefault(r['etapa'], []).append(r)
+
+    exponentes = {}
+    for etapa, filas in por_etapa.items():
+        filas = sorted(filas, key=lambda r: r['filas'])
+        exponentes[etapa] = [
+            {'desde': a['filas'], 'hasta': b['filas'],
+             'exponente': round(math.log(b['tiempo_s'] / a['tiempo_s']) / math.log(b['filas'] / a['filas']), 2)}
+            for a, b in zip(filas, filas[1:]) if a['tiempo_s'] > 0 and b['tiempo_s'] > 0
+        ]
+    return exponentes
+
+
+def graficar_curvas(benchmark, ruta=None):
+    """Curvas de escalado log-log (latencia y memoria) de cada etapa"""
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    ruta = ruta or os.path.join(obtener_benchmarks_dir(), "curvas_escalado.png")
+    resultados = benchmark['resultados']
+
+    fig, (ax_tiempo, ax_memoria) = plt.subplots(1, 2, figsize=(15, 6))
+    for etapa in benchmark['etapas']:
+        puntos = sorted((r for r in resultados if r['etapa'] == etapa), key=lambda r: r['filas'])
+        if not puntos:
+            continue
+        filas = [r['filas'] for r in puntos]
+        ax_tiempo.plot(filas, [r['tiempo_s'] for r in puntos], marker='o', label=etapa)
+        if all(r.get('rss_incremento_mb') is not None for r in puntos):
+            ax_memoria.plot(filas, [r['rss_incremento_mb'] for r in puntos], marker='o', label=etapa)
+
+    # Referencias O(n) y O(n²) desde el tamaño más pequeño
+    tamanos = np.array(benchmark['tamanos'], dtype=float)
+    tiempos = [r['tiempo_s'] for r in resultados if r['filas'] == tamanos[0] and r['tiempo_s'] > 0]
+    if len(tamanos) > 1 and tiempos:
+        t0 = np.median(tiempos)
+        ax_tiempo.plot(tamanos, t0 * tamanos / tamanos[0], 'k--', alpha=0.4, label='O(n)')
+        ax_tiempo.plot(tamanos, t0 * (tamanos / tamanos[0]) ** 2, 'k:', alpha=0.4, label='O(n²)')
+
+    # La memoria añadida puede ser 0 (la etapa no supera el pico anterior): escala logarítmica simétrica
+    for ax, titulo, etiqueta, escala in [(ax_tiempo, 'Latencia por etapa', 'Tiempo (s)', 'log'),
+                                         (ax_memoria, 'Memoria añadida por etapa', 'Incremento de RSS pico (MB)',
+                                          'symlog')]:
+        ax.set_xscale('log')
+        ax.set_yscale(escala)
+        ax.set_title(titulo, fontweight='bold')
+        ax.set_xlabel('Filas sintéticas', fontweight='bold')
+        ax.set_ylabel(etiqueta, fontweight='bold')
+        ax.grid(True, which='both', alpha=0.3, linestyle='--')
+        ax.legend(fontsize=9)
+
+    plt.tight_layout()
+    plt.savefig(ruta, dpi=150, bbox_inches='tight')
+    plt.close(fig)
+    return ruta
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Medir el rendimiento de cada etapa con datos sintéticos")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=TAMANOS_POR_DEFECTO,
+                        help="números de filas sintéticas a medir")
+    parser.add_argument('--etapas', nargs='+', choices=ETAPAS_BENCHMARK, default=None)
+    parser.add_argument('--repeticiones', type=int, default=1, help="repeticiones por etapa (se usa la mediana)")
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help="aumento relativo permitido frente a la línea base")
+    parser.add_argument('--guardar-base', action='store_true', help="guardar estos resultados como línea base")
+    args = parser.parse_args()
+
+    print("BENCHMARK DE ETAPAS CON DATOS SINTÉTICOS")
+    print("=" * 70)
+
+    benchmark = ejecutar_benchmark(args.tamanos, args.etapas, args.repeticiones)
+    print(f"\n📄 Resultados guardados en: {benchmark['ruta']}")
+
+    print("\n📈 Exponente de escalado (t ∝ n^b):")
+    for etapa, tramos in exponentes_escalado(benchmark['resultados']).items():
+        texto = ', '.join(f"{t['desde']:,}→{t['hasta']:,}: {t['exponente']:.2f}" for t in tramos)
+        aviso = ' ⚠️  superlineal' if any(t['exponente'] > 1.15 for t in tramos) else ''
+        print(f"   {etapa:<24} {texto}{aviso}")
+
+    print(f"\n📊 Curvas de escalado: {graficar_curvas(benchmark)}")
+
+    base_path = os.path.join(obtener_benchmarks_dir(), "linea_base.json")
+    regresiones = []
+    if os.path.exists(base_path):
+        with open(base_path, encoding='utf-8') as f:
+            base = json.load(f)
+        comparaciones = comparar_con_base(benchmark, base, tolerancia=args.tolerancia)
+        regresiones = [c for c in comparaciones if c['estado'] == 'regresion']
+
+        print(f"\n🔍 Comparación con la línea base ({base['fecha']}, tolerancia {args.tolerancia:.0%}):")
+        for c in comparaciones:
+            marca = {'regresion': '❌', 'mejora': '✅', 'igual': '  '}[c['estado']]
+            print(f"   {marca} {c['etapa']:<24} {c['filas']:>10,} filas  "
+                  f"{c['tiempo_base_s']:>8.2f}s → {c['tiempo_s']:>8.2f}s (x{c['razon_tiempo']:.2f})")
+    else:
+        print("\nℹ️  No hay línea base; use --guardar-base para crearla")
+
+    if args.guardar_base:
+        benchmark.pop('ruta')
+        guardar_json(base_path, benchmark)
+        print(f"\n💾 Línea base guardada en: {base_path}")
+
+    sys.exit(1 if regresiones else 0)
@@ -0,0 +1,234 @@
+import os
+import json
+import hashlib
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (sólo para saber si se puede escribir Parquet)
+except ImportError:
+    pyarrow = None
+
+VERSION_RESULTADOS = 1
+
+# Esquema de cada tabla del almacén: columna -> dtype de pandas
+ESQUEMAS = {
+    'asignaciones_clusters': {
+        'comunidad': 'string',
+        'cluster': 'int64'
+    },
+    'metricas_clustering': {
+        'metrica': 'string',
+        'valor': 'float64'
+    },
+    'proyeccion_clusters': {
+        'comunidad': 'string',
+        'cluster': 'int64',
+        'x': 'float64',
+        'y': 'float64'
+    },
+    'varianza_proyeccion': {
+        'componente': 'int64',
+        'varianza': 'float64'
+    },
+    'perfiles_clusters': {
+        'cluster': 'int64',
+        'n_comunidades': 'int64',
+        'pedido_principal': 'string',
+        'frecuencia_principal': 'int64',
+        'n_resoluciones': 'float64',
+        'provincia_comun': 'string',
+        'n_provincias': 'float64',
+        'tipo_tramite': 'string'
+    },
+    'provincias_clusters': {
+        'cluster': 'int64',
+        'provincia': 'string',
+        'n_comunidades': 'int64'
+    },
+    'metadatos_comunidades': {
+        'comunidad': 'string',
+        'cluster': 'int64',
+        'archivo': 'string',
+        'provincia': 'string',
+        'n_resoluciones': 'float64',
+        'n_pedidos': 'int64'
+    },
+    'perfil_tipos_clusters': {
+        'cluster': 'int64',
+        'tipo_tramite': 'string',
+        'proporcion': 'float64'
+    },
+    'distribucion_tipos_tramite': {
+        'tipo_tramite': 'string',
+        'n_comunidades': 'int64',
+        'porcentaje': 'float64'
+    },
+    'metricas_algoritmos': {
+        'algoritmo': 'string',
+        'n_clusters': 'Int64',
+        'silhouette': 'float64',
+        'ventajas': 'string',
+        'desventajas': 'string'
+    },
+    'linkage_jerarquico': {
+        'hijo_1': 'int64',
+        'hijo_2': 'int64',
+        'distancia': 'float64',
+        'n_hojas': 'int64'
+    },
+    'hojas_jerarquico': {
+        'hoja': 'int64',
+        'n_comunidades': 'int64'
+    },
+    'estadisticas_matriz': {
+        'estadistica': 'string',
+        'valor': 'float64'
+    },
+    'comunidades_por_pedido': {
+        'pedido': 'string',
+        'n_comunidades': 'int64'
+    }
+}
+
+
+def obtener_almacen_dir():
+    """Directorio del almacén de resultados estructurados
+
+    Por defecto data/results/almacen/; la variable de entorno
+    SGDPN_ALMACEN_DIR lo cambia (el benchmark usa uno temporal).
+    """
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    proyecto_dir = os.path.dirname(script_dir)
+    return os.environ.get('SGDPN_ALMACEN_DIR') or os.path.join(proyecto_dir, "data", "results", "almacen")
+
+
+def aplicar_esquema(nombre, tabla):
+    """Columnas del esquema de la tabla, en su orden y con sus tipos
+
+    Las columnas que falten o que no puedan convertirse levantan
+    ValueError; las que sobren se descartan.
+    """
+
+    if nombre not in ESQUEMAS:
+        raise ValueError(f"Tabla desconocida en el almacén de resultados: {nombre}")
+
+    esquema = ESQUEMAS[nombre]
+    faltantes = [columna for columna in esquema if columna not in tabla.columns]
+    if faltantes:
+        raise ValueError(f"A la tabla {nombre} le faltan columnas: {', '.join(faltantes)}")
+
+    try:
+        return tabla[list(esquema)].astype(esquema).reset_index(drop=True)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"La tabla {nombre} no cumple su esquema: {e}") from e
+
+
+def _escribir_atomico(ruta, escribir_en):
+    """Escribir en un archivo temporal y reemplazar el destino de una vez"""
+
+    temporal = ruta + '.tmp'
+    escribir_en(temporal)
+    os.replace(temporal, ruta)
+
+
+def _sha1_archivo(ruta):
+    """sha1 del contenido de un archivo"""
+
+    with open(ruta, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def guardar_tabla(nombre, tabla, directorio=None, formato='auto'):
+    """Guardar una tabla del almacén de forma atómica
+
+    Cada tabla tiene un <nombre>.json con la versión, el esquema y el
+    número de filas. Con formato='json' los datos van en ese mismo archivo,
+    por columnas; con 'parquet' van en <nombre>.parquet (requiere pyarrow).
+    'auto' usa Parquet si pyarrow está instalado. Devuelve la ruta del .json.
+
+    El contenido depende sólo de los datos (sin fecha de escritura): el
+    pipeline y la caché de figuras comparan los .json por su hash, así que
+    en modo Parquet el .json lleva también el sha1 del .parquet.
+    """
+
+    directorio = directorio or obtener_almacen_dir()
+    os.makedirs(directorio, exist_ok=True)
+
+    tabla = aplicar_esquema(nombre, tabla)
+    if formato == 'auto':
+        formato = 'parquet' if pyarrow is not None else 'json'
+    if formato not in ('json', 'parquet'):
+        raise ValueError(f"Formato desconocido: {formato} (use 'json', 'parquet' o 'auto')")
+
+    contenido = {
+        'tabla': nombre,
+        'version': VERSION_RESULTADOS,
+        'esquema': ESQUEMAS[nombre],
+        'n_filas': len(tabla),
+        'formato': formato
+    }
+
+    if formato == 'parquet':
+        # Primero los datos; el .json que los anuncia se reemplaza al final
+        archivo = f"{nombre}.parquet"
+        _escribir_atomico(os.path.join(directorio, archivo),
+                          lambda ruta: tabla.to_parquet(ruta, index=False))
+        contenido['archivo'] = archivo
+        contenido['sha1'] = _sha1_archivo(os.path.join(directorio, archivo))
+    else:
+        valores = tabla.astype(object).where(tabla.notna(), None)
+        contenido['datos'] = {columna: valores[columna].tolist() for columna in tabla.columns}
+
+    def escribir_json(ruta):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(contenido, f, ensure_ascii=False)
+
+    ruta = os.path.join(directorio, f"{nombre}.json")
+    _escribir_atomico(ruta, escribir_json)
+    return ruta
+
+
+def cargar_tabla(nombre, directorio=None):
+    """Leer una tabla del almacén con los tipos de su esquema
+
+    Levanta FileNotFoundError si la tabla no se ha generado y ValueError si
+    su versión o su esquema no coinciden con los de este código (o si el
+    .parquet no es el que anuncia su .json).
+    """
+
+    directorio = directorio or obtener_almacen_dir()
+    with open(os.path.join(directorio, f"{nombre}.json"), encoding='utf-8') as f:
+        contenido = json.load(f)
+
+    if contenido.get('version') != VERSION_RESULTADOS:
+        raise ValueError(f"La tabla {nombre} tiene la versión {contenido.get('version')} "
+                         f"y se esperaba la {VERSION_RESULTADOS}: vuelva a ejecutar la etapa que la genera")
+    if contenido.get('esquema') != ESQUEMAS.get(nombre):
+        raise ValueError(f"El esquema guardado de la tabla {nombre} no coincide con el actual")
+
+    if contenido['formato'] == 'parquet':
+        ruta_datos = os.path.join(directorio, contenido['archivo'])
+        if _sha1_archivo(ruta_datos) != contenido.get('sha1'):
+            raise ValueError(f"Los datos de la tabla {nombre} no coinciden con su .json: "
+                             f"vuelva a ejecutar la etapa que la genera")
+        tabla = pd.read_parquet(ruta_datos)
+    else:
+        tabla = pd.DataFrame(contenido['datos'], columns=list(contenido['esquema']))
+
+    return aplicar_esquema(nombre, tabla)
+
+
+def cargar_tabla_si_existe(nombre, directorio=None):
+    """Como cargar_tabla, pero devuelve None si la tabla aún no se ha generado"""
+
+    try:
+        return cargar_tabla(nombre, directorio)
+    except FileNotFoundError:
+        return None
+
+
+def tabla_valores(valores, clave, valor='valor'):
+    """Tabla de dos columnas a partir de un dict (estadísticas y métricas sueltas)"""
+
+    return pd.DataFrame({clave: list(valores.keys()), valor: list(valores.values())})
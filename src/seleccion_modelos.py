@@ -0,0 +1,243 @@
+import pandas as pd
+import numpy as np
+import os
+import time
+from sklearn.cluster import KMeans, DBSCAN, AgglomerativeClustering
+from sklearn.metrics import silhouette_score
+from busqueda_k import rango_k_por_defecto
+from instrumentacion import instrumentar, medir
+from persistencia import escribir, escribir_texto
+
+
+def generar_candidatos(k_max=10):
+    """Lista de candidatos (algoritmo, parámetros) para la selección de modelos"""
+
+    candidatos = []
+
+    for k in range(2, k_max + 1):
+        candidatos.append({'algoritmo': 'K-Means', 'params': {'n_clusters': k}})
+
+    for linkage, metrica in [('ward', 'euclidean'), ('average', 'jaccard'), ('complete', 'jaccard')]:
+        for k in range(2, k_max + 1):
+            candidatos.append({'algoritmo': 'Jerárquico',
+                               'params': {'n_clusters': k, 'linkage': linkage, 'metric': metrica}})
+
+    for eps in [0.3, 0.5, 0.7, 1.0, 1.5]:
+        for min_samples in [2, 3, 5]:
+            candidatos.append({'algoritmo': 'DBSCAN',
+                               'params': {'eps': eps, 'min_samples': min_samples}})
+
+    return candidatos
+
+
+def crear_modelo(algoritmo, params):
+    """Instanciar el estimador de sklearn de un candidato"""
+
+    if algoritmo == 'K-Means':
+        return KMeans(random_state=42, n_init=10, **params)
+    if algoritmo == 'Jerárquico':
+        return AgglomerativeClustering(**params)
+    if algoritmo == 'DBSCAN':
+        return DBSCAN(**params)
+    raise ValueError(f"Algoritmo desconocido: {algoritmo}")
+
+
+def describir_candidato(candidato):
+    """Texto corto 'Algoritmo(param=valor, ...)' para reportes"""
+
+    params = ", ".join(f"{k}={v}" for k, v in candidato['params'].items())
+    return f"{candidato['algoritmo']}({params})"
+
+
+def ordenes_estratificados(estratos, random_state=42):
+    """Permutación aleatoria dentro de cada estrato
+
+    Tomar los primeros `fraccion * n` elementos de cada estrato produce
+    submuestras estratificadas anidadas: cada ronda contiene a la anterior.
+    """
+
+    rng = np.random.default_rng(random_state)
+    estratos = pd.Series(estratos).reset_index(drop=True)
+    return {estrato: rng.permutation(indices.to_numpy())
+            for estrato, indices in estratos.groupby(estratos).groups.items()}
+
+
+def submuestra_estratificada(ordenes, fraccion):
+    """Índices de una submuestra con la misma proporción de cada estrato"""
+
+    indices = []
+    for orden in ordenes.values():
+        n = max(1, int(np.ceil(fraccion * len(orden))))
+        indices.append(orden[:n])
+    return np.sort(np.concatenate(indices))
+
+
+def estratos_por_pedido_principal(matriz, min_estrato=2):
+    """Estrato de cada comunidad: su pedido más popular a nivel global
+
+    Los estratos con menos de min_estrato comunidades se agrupan en 'OTROS'.
+    """
+
+    popularidad = matriz.sum(axis=0)
+    ponderada = matriz.values * popularidad.values
+    estratos = pd.Series(matriz.columns[ponderada.argmax(axis=1)], index=matriz.index)
+
+    tamanos = estratos.map(estratos.value_counts())
+    return estratos.where(tamanos >= min_estrato, 'OTROS')
+
+
+def puntuar(candidato, X):
+    """Ajustar un candidato y devolver su Silhouette (-1 si no es válido)"""
+
+    params = candidato['params']
+    if 'n_clusters' in params and params['n_clusters'] >= X.shape[0]:
+        return -1
+
+    datos = X.astype(bool) if params.get('metric') == 'jaccard' else X
+    with medir('ajuste_candidato', candidato=describir_candidato(candidato), datos=X):
+        labels = crear_modelo(candidato['algoritmo'], params).fit_predict(datos)
+
+    n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
+    if n_clusters < 2 or n_clusters >= X.shape[0]:
+        return -1
+
+    with medir('silhouette', k=n_clusters, datos=X):
+        return silhouette_score(X, labels)
+
+
+def halving_sucesivo(matriz, candidatos, eta=3, n_minimo=30, random_state=42):
+    """Selección de modelos por halving sucesivo sobre submuestras estratificadas
+
+    Todos los candidatos empiezan en una submuestra pequeña; en cada ronda
+    sólo el mejor 1/eta pasa a una submuestra eta veces mayor, hasta que los
+    finalistas se evalúan con todas las comunidades.
+
+    Devuelve (ranking, historial, costo): ranking son los índices de los
+    finalistas de mejor a peor, historial registra, para cada candidato, el
+    tamaño de muestra y score de cada ronda que alcanzó, y costo es el total
+    de comunidades-ajuste (candidatos vivos × tamaño de muestra, por ronda).
+    """
+
+    X = matriz.values
+    n = X.shape[0]
+
+    ordenes = ordenes_estratificados(estratos_por_pedido_principal(matriz), random_state)
+
+    # Número de rondas: hasta quedar con un candidato o llegar al total de datos
+    rondas_candidatos = int(np.ceil(np.log(max(len(candidatos), 1)) / np.log(eta)))
+    rondas_datos = int(np.floor(np.log(max(n / n_minimo, 1)) / np.log(eta)))
+    n_rondas = min(rondas_candidatos, rondas_datos) + 1
+
+    historial = {i: [] for i in range(len(candidatos))}
+    vivos = list(range(len(candidatos)))
+    costo = 0
+
+    for ronda in range(n_rondas):
+        fraccion = 1.0 if ronda == n_rondas - 1 else eta ** (ronda - (n_rondas - 1))
+        indices = submuestra_estratificada(ordenes, fraccion)
+        X_ronda = X[indices]
+
+        inicio = time.perf_counter()
+        scores = {}
+        for i in vivos:
+            scores[i] = puntuar(candidatos[i], X_ronda)
+            historial[i].append({'ronda': ronda, 'n_muestra': len(indices), 'silhouette': scores[i]})
+
+        costo += len(vivos) * len(indices)
+        print(f"   Ronda {ronda}: {len(vivos)} candidatos × {len(indices)} comunidades "
+              f"({time.perf_counter() - inicio:.1f}s)")
+
+        if ronda < n_rondas - 1:
+            n_promovidos = max(1, int(np.ceil(len(vivos) / eta)))
+            vivos = sorted(vivos, key=lambda i: scores[i], reverse=True)[:n_promovidos]
+
+    ranking = sorted(vivos, key=lambda i: historial[i][-1]['silhouette'], reverse=True)
+    return ranking, historial, costo
+
+
+@instrumentar('seleccion_modelos')
+def seleccionar_modelo(matriz=None, eta=3, n_minimo=30, k_max=None, escritor=None):
+    """Seleccionar algoritmo y parámetros por halving sucesivo
+
+    La matriz puede pasarse en memoria; si no, se lee de
+    matriz_clustering_final.csv. escritor controla cómo se guardan el
+    reporte y el resumen (ver persistencia.crear_escritor).
+    """
+
+    print("SELECCIÓN DE MODELOS POR HALVING SUCESIVO")
+    print("=" * 70)
+
+    # Cargar datos
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    proyecto_dir = os.path.dirname(script_dir)
+    matriz_path = os.path.join(proyecto_dir, "data", "results", "matriz_clustering_final.csv")
+
+    if matriz is None:
+        matriz = pd.read_csv(matriz_path, index_col=0, encoding='utf-8-sig')
+
+    # Filtrar comunidades con 2+ pedidos
+    pedidos_por_comunidad = matriz.sum(axis=1)
+    matriz_filtrada = matriz.loc[pedidos_por_comunidad[pedidos_por_comunidad >= 2].index]
+
+    if k_max is None:
+        _, k_max = rango_k_por_defecto(matriz_filtrada.shape[0])
+
+    candidatos = generar_candidatos(k_max)
+
+    print(f"\nDatos: {matriz_filtrada.shape[0]} comunidades, {matriz_filtrada.shape[1]} pedidos")
+    print(f"Candidatos: {len(candidatos)} (eta={eta}, muestra mínima={n_minimo})\n")
+
+    ranking, historial, costo = halving_sucesivo(matriz_filtrada, candidatos, eta=eta, n_minimo=n_minimo)
+
+    costo_exhaustivo = len(candidatos) * matriz_filtrada.shape[0]
+    ganador = candidatos[ranking[0]]
+    score_ganador = historial[ranking[0]][-1]['silhouette']
+
+    print(f"\n✅ MEJOR MODELO: {describir_candidato(ganador)} (Silhouette: {score_ganador:.3f})")
+    print(f"   Costo: {costo} comunidades-ajuste ({costo / costo_exhaustivo * 100:.0f}% de la búsqueda exhaustiva)")
+
+    # Reporte de trayectorias
+    filas = []
+    n_rondas = max(len(pasos) for pasos in historial.values())
+    for i, pasos in historial.items():
+        fila = {'candidato': describir_candidato(candidatos[i]),
+                'algoritmo': candidatos[i]['algoritmo'],
+                'rondas_alcanzadas': len(pasos),
+                'finalista': len(pasos) == n_rondas}
+        for paso in pasos:
+            fila[f"silhouette_r{paso['ronda']}"] = paso['silhouette']
+        filas.append(fila)
+
+    reporte = pd.DataFrame(filas).sort_values(['rondas_alcanzadas', 'candidato'], ascending=[False, True])
+
+    results_dir = os.path.join(proyecto_dir, "data", "results")
+    reporte_path = os.path.join(results_dir, "seleccion_modelos.csv")
+    escribir(escritor, reporte.to_csv, reporte_path, index=False, encoding='utf-8-sig')
+
+    resumen_path = os.path.join(results_dir, "seleccion_modelos.txt")
+    lineas = ["SELECCIÓN DE MODELOS POR HALVING SUCESIVO\n",
+              "=" * 50 + "\n\n",
+              f"Comunidades analizadas: {matriz_filtrada.shape[0]}\n",
+              f"Candidatos evaluados: {len(candidatos)}\n",
+              f"Mejor modelo: {describir_candidato(ganador)}\n",
+              f"Score Silhouette: {score_ganador:.3f}\n",
+              f"Costo: {costo} comunidades-ajuste (exhaustivo: {costo_exhaustivo})\n\n",
+              "TRAYECTORIA DE LOS FINALISTAS:\n"]
+    for i in ranking:
+        trayectoria = " → ".join(f"n={p['n_muestra']}: {p['silhouette']:.3f}" for p in historial[i])
+        lineas.append(f"  {describir_candidato(candidatos[i])}: {trayectoria}\n")
+
+    lineas.append("\nELIMINADOS POR RONDA:\n")
+    for ronda in range(n_rondas - 1):
+        eliminados = [i for i, pasos in historial.items() if len(pasos) == ronda + 1]
+        lineas.append(f"  Ronda {ronda}: {len(eliminados)} candidatos\n")
+    escribir(escritor, escribir_texto, resumen_path, lineas)
+
+    print(f"\n📄 Trayectorias guardadas en: {reporte_path}")
+    print(f"📄 Resumen guardado en: {resumen_path}")
+
+    return ganador, score_ganador
+
+
+if __name__ == "__main__":
+    ganador, score = seleccionar_modelo()
@@ -0,0 +1,106 @@
+import time
+from preprocesamiento import preprocesamiento_completo
+from matriz_clustering import crear_matriz_clustering
+from clustering_comunidades import clustering_comunidades
+from comparar_algoritmos import comparar_algoritmos_clustering
+from analizar_clusters import analizar_caracteristicas_clusters
+from reduccion_dimensional import a_matriz_dispersa
+from persistencia import crear_escritor, cerrar_escritor
+from instrumentacion import medir, guardar_reporte
+
+
+def crear_sesion(persistir=True, asincrono=True):
+    """Sesión en memoria: resultados de cada etapa, tiempos y escritor de disco"""
+
+    return {
+        'registros': None,
+        'matriz': None,
+        'matriz_dispersa': None,
+        'clusters': None,
+        'labels': None,
+        'analisis': None,
+        'metricas': {},
+        'tiempos': {},
+        'reporte': None,
+        'escritor': crear_escritor(persistir=persistir, asincrono=asincrono)
+    }
+
+
+def ejecutar_etapa(sesion, nombre, funcion, *args, **kwargs):
+    """Ejecutar una etapa registrando su tiempo en la sesión"""
+
+    inicio = time.perf_counter()
+    resultado = funcion(*args, escritor=sesion['escritor'], **kwargs)
+    sesion['tiempos'][nombre] = time.perf_counter() - inicio
+    return resultado
+
+
+def ejecutar_sesion(persistir=True, asincrono=True, comparar=False, **parametros_clustering):
+    """Flujo completo en un solo proceso, pasando los resultados en memoria
+
+    preprocesamiento → matriz → clustering (→ comparación) → análisis de
+    clusters. Ninguna etapa relee los CSV de la anterior; con persistir=True
+    los archivos habituales de data/ se escriben igualmente, en hilos de
+    fondo (asincrono=True) mientras avanza el cálculo.
+
+    Todas las etapas quedan medidas en un único reporte de ejecución
+    (data/results/reportes/sesion_*.json).
+    """
+
+    sesion = crear_sesion(persistir=persistir, asincrono=asincrono)
+    with medir('sesion'):
+        _ejecutar_etapas(sesion, comparar, parametros_clustering)
+    sesion['reporte'] = guardar_reporte('sesion')
+
+    return sesion
+
+
+def _ejecutar_etapas(sesion, comparar, parametros_clustering):
+    """Etapas de la sesión en orden, guardando cada resultado en el dict"""
+
+    sesion['registros'] = ejecutar_etapa(sesion, 'preprocesamiento', preprocesamiento_completo)
+    if sesion['registros'] is None:
+        cerrar_escritor(sesion['escritor'])
+        return
+
+    sesion['matriz'] = ejecutar_etapa(sesion, 'matriz_clustering', crear_matriz_clustering,
+                                      registros=sesion['registros'])
+    sesion['matriz_dispersa'] = a_matriz_dispersa(sesion['matriz'])
+
+    clusters = ejecutar_etapa(sesion, 'clustering_comunidades', clustering_comunidades,
+                              matriz=sesion['matriz'], **parametros_clustering)
+    sesion['clusters'] = clusters
+    sesion['labels'] = clusters['CLUSTER']
+    sesion['metricas']['clustering'] = dict(clusters.attrs)
+
+    if comparar:
+        mejor_algoritmo, mejor_score = ejecutar_etapa(sesion, 'comparar_algoritmos',
+                                                      comparar_algoritmos_clustering,
+                                                      matriz=sesion['matriz'], **parametros_clustering)
+        sesion['metricas']['comparacion'] = {'mejor_algoritmo': mejor_algoritmo, 'silhouette': mejor_score}
+
+    sesion['analisis'] = ejecutar_etapa(sesion, 'analizar_clusters', analizar_caracteristicas_clusters,
+                                        clusters_df=clusters, registros=sesion['registros'])
+
+    # Esperar a que terminen las escrituras en segundo plano
+    inicio = time.perf_counter()
+    with medir('escrituras_pendientes'):
+        n_escrituras = cerrar_escritor(sesion['escritor'])
+    sesion['tiempos']['escrituras_pendientes'] = time.perf_counter() - inicio
+    sesion['metricas']['escrituras_asincronas'] = n_escrituras
+
+
+if __name__ == "__main__":
+    sesion = ejecutar_sesion()
+
+    print("\n" + "=" * 60)
+    print("SESIÓN EN MEMORIA")
+    print("=" * 60)
+    for etapa, tiempo in sesion['tiempos'].items():
+        print(f"   {etapa:<28} {tiempo:>8.2f}s")
+    if sesion['matriz_dispersa'] is not None:
+        print(f"\n   Matriz: {sesion['matriz_dispersa'].shape[0]} x {sesion['matriz_dispersa'].shape[1]} "
+              f"({sesion['matriz_dispersa'].nnz} celdas no nulas)")
+        print(f"   Clusters: {sesion['metricas']['clustering'].get('mejor_k')} "
+              f"(Silhouette {sesion['metricas']['clustering'].get('silhouette', 0):.3f})")
+    print(f"\n⏱️  Reporte de ejecución guardado en: {sesion['reporte']}")
@@ -0,0 +1,385 @@
+import os
+import json
+import gzip
+import base64
+import argparse
+import numpy as np
+import pandas as pd
+from renderizado import colores_clusters
+from resultados import cargar_tabla_si_existe
+from instrumentacion import instrumentar
+
+# Tablas del almacén que entran en el tablero (las obligatorias primero)
+TABLAS_TABLERO = ['perfiles_clusters', 'metadatos_comunidades', 'proyeccion_clusters',
+                  'perfil_tipos_clusters', 'provincias_clusters', 'distribucion_tipos_tramite',
+                  'metricas_clustering']
+TABLAS_OBLIGATORIAS = {'perfiles_clusters', 'metadatos_comunidades'}
+
+# Decimales de las coordenadas de la proyección (suficiente para un lienzo de pantalla)
+DECIMALES_PROYECCION = 4
+
+
+def columnar(tabla):
+    """Tabla en formato columnar: {columna: valores}; el texto se codifica como diccionario
+
+    Las columnas de texto se guardan como {'categorias': [...], 'codigos': [...]}
+    (código -1 para nulos), que ocupa mucho menos que repetir cada cadena.
+    """
+
+    columnas = {}
+    for columna in tabla.columns:
+        serie = tabla[columna]
+        if pd.api.types.is_string_dtype(serie) or serie.dtype == object:
+            codigos, categorias = pd.factorize(serie, use_na_sentinel=True)
+            columnas[columna] = {'categorias': [str(c) for c in categorias], 'codigos': codigos.tolist()}
+        elif pd.api.types.is_float_dtype(serie):
+            valores = serie.astype('float64').round(DECIMALES_PROYECCION)
+            columnas[columna] = [None if pd.isna(v) else float(v) for v in valores]
+        else:
+            columnas[columna] = [None if pd.isna(v) else int(v) for v in serie]
+    return columnas
+
+
+def empaquetar(datos):
+    """JSON comprimido con gzip y codificado en base64, para incrustarlo en el HTML"""
+
+    texto = json.dumps(datos, ensure_ascii=False, separators=(',', ':'))
+    return base64.b64encode(gzip.compress(texto.encode('utf-8'), compresslevel=9, mtime=0)).decode('ascii')
+
+
+def datos_tablero(tablas):
+    """Carga útil del tablero: tablas columnares más colores
+
+    Sin fecha ni otros datos del momento: con las mismas tablas el HTML es
+    idéntico byte a byte.
+    """
+
+    clusters = np.unique(tablas['perfiles_clusters']['cluster'].to_numpy())
+    return {
+        'colores': dict(zip((str(c) for c in clusters), colores_clusters(len(clusters)))),
+        'tablas': {nombre: columnar(tabla) for nombre, tabla in tablas.items() if tabla is not None}
+    }
+
+
+def html_tablero(carga, titulo):
+    """Documento HTML autocontenido (sin servidor ni red) con la carga incrustada"""
+
+    return (PLANTILLA_HTML
+            .replace('__TITULO__', titulo)
+            .replace('__CARGA__', carga))
+
+
+@instrumentar('tablero_html')
+def generar_tablero_html(salida=None, titulo="Clusters de comunidades SGDPN"):
+    """Exportar un tablero HTML interactivo a partir del almacén de resultados
+
+    Reúne los perfiles de cluster, la distribución por tipo de trámite, el
+    cruce cluster × provincia y la proyección 2D en una carga columnar
+    comprimida (gzip + base64) dentro de un único archivo HTML. El filtrado
+    y la búsqueda se hacen en el navegador, sin volver a ejecutar scripts
+    ni dibujar figuras.
+    """
+
+    print("TABLERO HTML INTERACTIVO")
+    print("=" * 70)
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    proyecto_dir = os.path.dirname(script_dir)
+    salida = salida or os.path.join(proyecto_dir, "data", "results", "tablero_clusters.html")
+
+    # 1. Cargar tablas del almacén
+    print("\n1. Cargando tablas del almacén de resultados...")
+    tablas = {nombre: cargar_tabla_si_existe(nombre) for nombre in TABLAS_TABLERO}
+    faltantes = [nombre for nombre in TABLAS_OBLIGATORIAS if tablas[nombre] is None]
+    if faltantes:
+        print(f"❌ Faltan tablas ({', '.join(faltantes)}): primero ejecuta analizar_clusters.py")
+        return None
+
+    for nombre, tabla in tablas.items():
+        print(f"   {nombre:<28} {'no disponible' if tabla is None else f'{len(tabla)} filas'}")
+
+    # 2. Empaquetar datos
+    print("\n2. Empaquetando datos (columnar, gzip + base64)...")
+    datos = datos_tablero(tablas)
+    carga = empaquetar(datos)
+    print(f"   Carga comprimida: {len(carga) / 1024:.0f} KB")
+
+    # 3. Escribir HTML
+    print("\n3. Escribiendo HTML...")
+    temporal = salida + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        f.write(html_tablero(carga, titulo))
+    os.replace(temporal, salida)
+
+    print(f"\n✅ Tablero guardado en: {salida}")
+    print("   Se abre con cualquier navegador, sin servidor ni conexión a internet")
+    return salida
+
+
+PLANTILLA_HTML = r"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>__TITULO__</title>
+<style>
+  body { font-family: "DejaVu Sans", Arial, sans-serif; margin: 0; background: #f7f7f9; color: #222; }
+  header { background: #2f3e4e; color: white; padding: 14px 24px; }
+  header h1 { margin: 0; font-size: 20px; }
+  header small { opacity: 0.8; }
+  #filtros { display: flex; flex-wrap: wrap; gap: 16px; padding: 12px 24px; background: white;
+             border-bottom: 1px solid #ddd; align-items: flex-end; }
+  #filtros label { font-size: 12px; font-weight: bold; display: block; margin-bottom: 4px; }
+  #filtros select, #filtros input { font-size: 13px; padding: 4px; min-width: 180px; }
+  main { display: grid; grid-template-columns: 1fr 1fr; gap: 16px; padding: 16px 24px; }
+  section { background: white; border: 1px solid #ddd; border-radius: 6px; padding: 12px; overflow: auto; }
+  section h2 { font-size: 15px; margin: 0 0 8px 0; }
+  .ancho { grid-column: 1 / span 2; }
+  .tarjetas { display: flex; gap: 12px; }
+  .tarjeta { flex: 1; background: #eef3f8; border-radius: 6px; padding: 8px 12px; }
+  .tarjeta b { display: block; font-size: 20px; }
+  table { border-collapse: collapse; font-size: 12px; width: 100%; }
+  th, td { border-bottom: 1px solid #eee; padding: 3px 6px; text-align: left; white-space: nowrap; }
+  th { background: #fafafa; position: sticky; top: 0; }
+  td.num { text-align: right; }
+  .barra { height: 12px; background: #87CEEB; display: inline-block; vertical-align: middle; }
+  .punto { display: inline-block; width: 10px; height: 10px; border-radius: 50%; margin-right: 4px; }
+  canvas { width: 100%; height: 420px; border: 1px solid #eee; }
+  .desplazable { max-height: 420px; overflow: auto; }
+</style>
+</head>
+<body>
+<header>
+  <h1>__TITULO__</h1>
+</header>
+<div id="filtros">
+  <div><label for="f-cluster">Cluster</label><select id="f-cluster"><option value="">Todos</option></select></div>
+  <div><label for="f-tipo">Tipo de trámite principal</label><select id="f-tipo"><option value="">Todos</option></select></div>
+  <div><label for="f-provincia">Provincia</label><select id="f-provincia"><option value="">Todas</option></select></div>
+  <div><label for="f-busqueda">Buscar comunidad</label><input id="f-busqueda" type="search" placeholder="nombre..."></div>
+</div>
+<main>
+  <section class="ancho"><div class="tarjetas" id="tarjetas"></div></section>
+  <section><h2>Perfiles de cluster</h2><div class="desplazable"><table id="t-perfiles"></table></div></section>
+  <section><h2>Distribución por tipo de trámite</h2><table id="t-tipos"></table></section>
+  <section><h2>Proyección 2D (SVD)</h2><canvas id="proyeccion"></canvas></section>
+  <section><h2>Comunidades</h2><div class="desplazable"><table id="t-comunidades"></table></div></section>
+  <section class="ancho"><h2>Cluster × provincia</h2><div class="desplazable"><table id="t-provincias"></table></div></section>
+</main>
+<script id="carga" type="application/octet-stream">__CARGA__</script>
+<script>
+"use strict";
+const MAX_FILAS = 500;
+
+async function descomprimir(b64) {
+  const bytes = Uint8Array.from(atob(b64.trim()), c => c.charCodeAt(0));
+  const flujo = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+  return JSON.parse(await new Response(flujo).text());
+}
+
+// Columna codificada como diccionario -> valor de la fila i
+function valor(columna, i) {
+  if (columna && columna.codigos) {
+    const c = columna.codigos[i];
+    return c < 0 ? null : columna.categorias[c];
+  }
+  return columna ? columna[i] : null;
+}
+
+function nFilas(tabla) {
+  const primera = Object.values(tabla)[0];
+  return primera ? (primera.codigos || primera).length : 0;
+}
+
+function escapar(texto) {
+  return String(texto ?? "").replace(/[&<>"]/g, c => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}[c]));
+}
+
+function opciones(select, valores) {
+  for (const v of valores) {
+    const o = document.createElement("option");
+    o.value = v; o.textContent = v;
+    select.appendChild(o);
+  }
+}
+
+function tabla(elemento, cabecera, filas) {
+  const html = ["<tr>" + cabecera.map(c => `<th>${escapar(c)}</th>`).join("") + "</tr>"];
+  for (const fila of filas) html.push("<tr>" + fila.map(c => c instanceof Object ? `<td class="${c.clase || ""}">${c.html}</td>` : `<td>${escapar(c)}</td>`).join("") + "</tr>");
+  elemento.innerHTML = html.join("");
+}
+
+function num(v, decimales = 0) {
+  return {clase: "num", html: v === null || v === undefined || Number.isNaN(v) ? "" : Number(v).toFixed(decimales)};
+}
+
+async function iniciar() {
+  const datos = await descomprimir(document.getElementById("carga").textContent);
+  const T = datos.tablas;
+  const colores = datos.colores;
+
+  // Perfiles por cluster
+  const P = T.perfiles_clusters;
+  const perfiles = [];
+  for (let i = 0; i < nFilas(P); i++) {
+    perfiles.push({cluster: valor(P.cluster, i), n: valor(P.n_comunidades, i), pedido: valor(P.pedido_principal, i),
+                   frecuencia: valor(P.frecuencia_principal, i), resoluciones: valor(P.n_resoluciones, i),
+                   provincia: valor(P.provincia_comun, i), tipo: valor(P.tipo_tramite, i)});
+  }
+  const tipoDeCluster = Object.fromEntries(perfiles.map(p => [p.cluster, p.tipo]));
+
+  // Comunidades (metadatos + proyección, unidas por nombre)
+  const M = T.metadatos_comunidades;
+  const nComunidades = nFilas(M);
+  const xy = new Map();
+  if (T.proyeccion_clusters) {
+    const J = T.proyeccion_clusters;
+    for (let i = 0; i < nFilas(J); i++) xy.set(valor(J.comunidad, i), [valor(J.x, i), valor(J.y, i)]);
+  }
+  const comunidades = new Array(nComunidades);
+  for (let i = 0; i < nComunidades; i++) {
+    const nombre = valor(M.comunidad, i);
+    comunidades[i] = {nombre, clave: (nombre || "").toLowerCase(), cluster: valor(M.cluster, i),
+                      archivo: valor(M.archivo, i), provincia: valor(M.provincia, i),
+                      resoluciones: valor(M.n_resoluciones, i), pedidos: valor(M.n_pedidos, i),
+                      xy: xy.get(nombre) || null};
+  }
+
+  // Cruce cluster × provincia precalculado
+  const cruce = [];
+  if (T.provincias_clusters) {
+    const C = T.provincias_clusters;
+    for (let i = 0; i < nFilas(C); i++) cruce.push({cluster: valor(C.cluster, i), provincia: valor(C.provincia, i), n: valor(C.n_comunidades, i)});
+  }
+
+  // Proporción de cada tipo por cluster
+  const perfilTipos = {};
+  if (T.perfil_tipos_clusters) {
+    const Q = T.perfil_tipos_clusters;
+    for (let i = 0; i < nFilas(Q); i++) {
+      const c = valor(Q.cluster, i);
+      (perfilTipos[c] = perfilTipos[c] || {})[valor(Q.tipo_tramite, i)] = valor(Q.proporcion, i);
+    }
+  }
+
+  const fCluster = document.getElementById("f-cluster");
+  const fTipo = document.getElementById("f-tipo");
+  const fProvincia = document.getElementById("f-provincia");
+  const fBusqueda = document.getElementById("f-busqueda");
+  opciones(fCluster, perfiles.map(p => p.cluster));
+  opciones(fTipo, [...new Set(perfiles.map(p => p.tipo).filter(Boolean))].sort());
+  opciones(fProvincia, [...new Set(comunidades.map(c => c.provincia).filter(Boolean))].sort());
+
+  // Extensión de la proyección (fija, para que el filtrado no mueva los puntos)
+  let xmin = Infinity, xmax = -Infinity, ymin = Infinity, ymax = -Infinity;
+  for (const c of comunidades) if (c.xy) {
+    xmin = Math.min(xmin, c.xy[0]); xmax = Math.max(xmax, c.xy[0]);
+    ymin = Math.min(ymin, c.xy[1]); ymax = Math.max(ymax, c.xy[1]);
+  }
+
+  function dibujarProyeccion(visibles) {
+    const lienzo = document.getElementById("proyeccion");
+    const escala = window.devicePixelRatio || 1;
+    lienzo.width = lienzo.clientWidth * escala;
+    lienzo.height = lienzo.clientHeight * escala;
+    const ctx = lienzo.getContext("2d");
+    ctx.clearRect(0, 0, lienzo.width, lienzo.height);
+    if (!Number.isFinite(xmin)) return;
+    const margen = 10 * escala;
+    const px = x => margen + (x - xmin) / ((xmax - xmin) || 1) * (lienzo.width - 2 * margen);
+    const py = y => lienzo.height - margen - (y - ymin) / ((ymax - ymin) || 1) * (lienzo.height - 2 * margen);
+    const radio = Math.max(1, (comunidades.length > 5000 ? 1.5 : 4) * escala);
+    ctx.fillStyle = "#dddddd";
+    for (const c of comunidades) if (c.xy && !visibles.has(c)) ctx.fillRect(px(c.xy[0]) - radio / 2, py(c.xy[1]) - radio / 2, radio, radio);
+    for (const c of visibles) if (c.xy) {
+      ctx.fillStyle = colores[c.cluster] || "#888888";
+      ctx.fillRect(px(c.xy[0]) - radio, py(c.xy[1]) - radio, 2 * radio, 2 * radio);
+    }
+  }
+
+  function actualizar() {
+    const cluster = fCluster.value, tipo = fTipo.value, provincia = fProvincia.value;
+    const busqueda = fBusqueda.value.trim().toLowerCase();
+
+    const clustersVisibles = new Set(perfiles
+      .filter(p => (!cluster || String(p.cluster) === cluster) && (!tipo || p.tipo === tipo))
+      .map(p => p.cluster));
+    const visibles = comunidades.filter(c => clustersVisibles.has(c.cluster)
+      && (!provincia || c.provincia === provincia)
+      && (!busqueda || c.clave.includes(busqueda)));
+    const conjunto = new Set(visibles);
+
+    // Tarjetas
+    const resoluciones = visibles.reduce((s, c) => s + (c.resoluciones || 0), 0);
+    document.getElementById("tarjetas").innerHTML = [
+      ["Comunidades", visibles.length], ["Clusters", new Set(visibles.map(c => c.cluster)).size],
+      ["Resoluciones", resoluciones], ["Provincias", new Set(visibles.map(c => c.provincia).filter(Boolean)).size]
+    ].map(([t, v]) => `<div class="tarjeta">${t}<b>${v.toLocaleString("es")}</b></div>`).join("");
+
+    // Perfiles (con el número de comunidades que pasan el filtro)
+    const porCluster = {};
+    for (const c of visibles) porCluster[c.cluster] = (porCluster[c.cluster] || 0) + 1;
+    tabla(document.getElementById("t-perfiles"),
+      ["Cluster", "Comunidades", "Filtradas", "Tipo", "Pedido principal", "Frecuencia", "Resoluciones", "Provincia común"],
+      perfiles.filter(p => clustersVisibles.has(p.cluster)).map(p => [
+        {html: `<span class="punto" style="background:${colores[p.cluster]}"></span>C${p.cluster}`},
+        num(p.n), num(porCluster[p.cluster] || 0), p.tipo, p.pedido, num(p.frecuencia), num(p.resoluciones), p.provincia]));
+
+    // Tipos de trámite: comunidades filtradas por tipo principal de su cluster y proporción con al menos un trámite de cada tipo
+    const porTipo = {}, alguna = {};
+    for (const c of visibles) {
+      const t = tipoDeCluster[c.cluster];
+      porTipo[t] = (porTipo[t] || 0) + 1;
+      for (const [tt, proporcion] of Object.entries(perfilTipos[c.cluster] || {})) alguna[tt] = (alguna[tt] || 0) + proporcion;
+    }
+    const tipos = [...new Set([...Object.keys(porTipo), ...Object.keys(alguna)])].sort((a, b) => (porTipo[b] || 0) - (porTipo[a] || 0));
+    const total = visibles.length || 1;
+    tabla(document.getElementById("t-tipos"), ["Tipo", "Comunidades (tipo principal)", "", "% con algún trámite del tipo"],
+      tipos.map(t => [t, num(porTipo[t] || 0), {html: `<span class="barra" style="width:${(porTipo[t] || 0) / total * 200}px"></span> ${((porTipo[t] || 0) / total * 100).toFixed(0)}%`},
+                      num((alguna[t] || 0) / total * 100, 0)]));
+
+    // Cruce cluster × provincia (precalculado si sólo se filtra por cluster/tipo)
+    const filas = {};
+    if (!busqueda && !provincia) {
+      for (const r of cruce) if (clustersVisibles.has(r.cluster)) (filas[r.provincia] = filas[r.provincia] || {})[r.cluster] = r.n;
+    } else {
+      for (const c of visibles) if (c.provincia) {
+        const f = (filas[c.provincia] = filas[c.provincia] || {});
+        f[c.cluster] = (f[c.cluster] || 0) + 1;
+      }
+    }
+    const columnas = [...clustersVisibles].sort((a, b) => a - b);
+    tabla(document.getElementById("t-provincias"), ["Provincia", ...columnas.map(c => "C" + c), "Total"],
+      Object.entries(filas).map(([p, f]) => [p, ...columnas.map(c => num(f[c] || 0)),
+        num(Object.values(f).reduce((s, v) => s + v, 0))]).sort((a, b) => b[b.length - 1].html - a[a.length - 1].html));
+
+    // Comunidades (las primeras MAX_FILAS)
+    tabla(document.getElementById("t-comunidades"), ["Comunidad", "Cluster", "Provincia", "Pedidos", "Resoluciones", "Archivo"],
+      visibles.slice(0, MAX_FILAS).map(c => [c.nombre, "C" + c.cluster, c.provincia, num(c.pedidos), num(c.resoluciones), c.archivo]));
+    if (visibles.length > MAX_FILAS) {
+      document.getElementById("t-comunidades").insertAdjacentHTML("beforeend",
+        `<tr><td colspan="6">… y ${(visibles.length - MAX_FILAS).toLocaleString("es")} más (refine la búsqueda)</td></tr>`);
+    }
+
+    dibujarProyeccion(conjunto);
+  }
+
+  let espera = null;
+  for (const f of [fCluster, fTipo, fProvincia]) f.addEventListener("change", actualizar);
+  fBusqueda.addEventListener("input", () => { clearTimeout(espera); espera = setTimeout(actualizar, 150); });
+  window.addEventListener("resize", actualizar);
+  actualizar();
+}
+
+iniciar();
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exportar un tablero HTML interactivo de los clusters")
+    parser.add_argument('--salida', default=None, help="ruta del archivo HTML")
+    args = parser.parse_args()
+
+    generar_tablero_html(salida=args.salida)
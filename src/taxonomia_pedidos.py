@@ -0,0 +1,75 @@
+import re
+import os
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Reglas en orden de prioridad: si un pedido contiene varias palabras clave, gana la primera
+REGLAS_TAXONOMIA = [
+    ('PERSONERIA', 'Legalización'),
+    ('REGISTRO DE DIRECTIVA', 'Gestión interna'),
+    ('INCLUSIÓN', 'Membresía'),
+    ('INCLUSION', 'Membresía'),
+    ('REFORMA', 'Actualización'),
+    ('EXCLUSIÓN', 'Membresía'),
+    ('EXCLUSION', 'Membresía')
+]
+
+TIPO_POR_DEFECTO = 'Otros'
+
+# Un solo patrón con todas las reglas; la búsqueda anticipada (?=...) permite
+# detectar coincidencias solapadas en cualquier posición del texto
+_PATRON = re.compile('(?=(?:' + '|'.join(f'(?P<r{i}>{re.escape(clave)})'
+                                         for i, (clave, _) in enumerate(REGLAS_TAXONOMIA)) + '))')
+
+
+@lru_cache(maxsize=None)
+def clasificar_pedido(pedido):
+    """Tipo de trámite de un PEDIDO_UNIFICADO (memoizado por valor único)"""
+
+    reglas = [int(m.lastgroup[1:]) for m in _PATRON.finditer(str(pedido).upper()) if m.lastgroup]
+    if not reglas:
+        return TIPO_POR_DEFECTO
+    return REGLAS_TAXONOMIA[min(reglas)][1]
+
+
+def tabla_tipos_pedido(pedidos):
+    """Tabla de consulta pedido -> tipo de trámite para los pedidos únicos"""
+
+    unicos = pd.Index(pd.unique(pd.Series(list(pedidos), dtype=object)))
+    return pd.DataFrame({'PEDIDO_UNIFICADO': unicos,
+                         'TIPO_TRAMITE': [clasificar_pedido(p) for p in unicos]})
+
+
+def cargar_tabla_tipos(proyecto_dir=None):
+    """Cargar la tabla pedido -> tipo precalculada como Serie indexada por pedido"""
+
+    if proyecto_dir is None:
+        proyecto_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    ruta = os.path.join(proyecto_dir, "data", "results", "tipos_pedido.csv")
+    tabla = pd.read_csv(ruta, encoding='utf-8-sig')
+    return tabla.set_index('PEDIDO_UNIFICADO')['TIPO_TRAMITE']
+
+
+def matriz_por_tipo(matriz, binaria=True):
+    """Agregar las columnas pedido de la matriz a nivel de tipo de trámite
+
+    Devuelve un DataFrame comunidades × tipos con el número de pedidos de
+    cada tipo (o 0/1 si binaria=True). Se calcula como el producto con una
+    matriz indicadora dispersa pedido -> tipo.
+    """
+
+    tipos = pd.Series([clasificar_pedido(p) for p in matriz.columns])
+    codigos, categorias = pd.factorize(tipos)
+
+    indicadora = sparse.csr_matrix((np.ones(len(codigos)), (np.arange(len(codigos)), codigos)),
+                                   shape=(len(codigos), len(categorias)))
+    conteos = sparse.csr_matrix(matriz.values) @ indicadora
+    conteos = conteos.toarray()
+
+    if binaria:
+        conteos = (conteos > 0).astype(int)
+
+    return pd.DataFrame(conteos, index=matriz.index, columns=categorias)
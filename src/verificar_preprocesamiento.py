@@ -217,7 +217,7 @@ def verificar_preprocesamieto():
 
 if __name__ == "__main__":
     print("Iniciando verificación de objetivos...\n")
-    exito = verificar_objetivos()
+    exito = verificar_preprocesamieto()
 
     if exito:
         print("\n" + "=" * 70)
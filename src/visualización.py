@@ -1,88 +1,60 @@
 import pandas as pd
 import numpy as np
 import os
-import matplotlib.pyplot as plt
-from sklearn.decomposition import PCA
-import seaborn as sns
+import argparse
+from renderizado import plt, colores_clusters, configurar_estilo, guardar_figura, renderizar_figuras
+from proyeccion import obtener_proyeccion
+from dendrograma import figura_dendrograma, k_jerarquico
+from resultados import cargar_tabla_si_existe
+from instrumentacion import instrumentar
 
 
-def visualizacion_profesional():
-    """Visualización profesional de resultados del clustering"""
+def figura_distribucion(proyeccion, varianza, ruta, rasterizar_desde=5000):
+    """Gráfico 1: comunidades proyectadas en 2D (TruncatedSVD) coloreadas por cluster
 
-    print("VISUALIZACIÓN PROFESIONAL DE RESULTADOS")
-    print("=" * 70)
-
-    # Cargar resultados
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    proyecto_dir = os.path.dirname(script_dir)
-    clusters_path = os.path.join(proyecto_dir, "data", "results", "comunidades_clusters.csv")
-
-    clusters_df = pd.read_csv(clusters_path, index_col=0, encoding='utf-8-sig')
-
-    # Preparar datos
-    X = clusters_df.drop('CLUSTER', axis=1).values
-    labels = clusters_df['CLUSTER'].values
-
-    # 1. CONFIGURACIÓN DE ESTILO PROFESIONAL
-    print("\n1. Configurando estilo profesional...")
-
-    # Estilo personalizado
-    plt.style.use('seaborn-v0_8-whitegrid')
+    proyeccion es la tabla comunidad, cluster, x, y de proyeccion.py y
+    varianza, la explicada por cada componente. Con muchos puntos, la capa
+    de puntos se rasteriza y el resto de la figura sigue siendo vectorial.
+    """
 
-    # Paleta de colores pastel profesional
-    pastel_colors = [
-        '#FFB6C1', '#87CEEB', '#98FB98', '#DDA0DD', '#FFD700',
-        '#FFA07A', '#20B2AA', '#F0E68C', '#CD853F', '#B0E0E6'
-    ]
+    labels = proyeccion['cluster'].to_numpy()
+    n_comunidades = len(proyeccion)
 
-    # Configuración de fuentes
-    plt.rcParams.update({
-        'font.size': 11,
-        'font.family': 'DejaVu Sans',
-        'axes.titlesize': 14,
-        'axes.labelsize': 12,
-        'xtick.labelsize': 10,
-        'ytick.labelsize': 10,
-        'legend.fontsize': 10,
-        'figure.titlesize': 16
-    })
-
-    # 2. GRÁFICO 1: DISTRIBUCIÓN DE CLUSTERS
-    print("2. Creando gráfico de distribución...")
+    # Un color por cluster, sea cual sea el número de clusters
+    clusters, posicion_cluster = np.unique(labels, return_inverse=True)
+    paleta = colores_clusters(len(clusters))
+    colores = np.array(paleta)[posicion_cluster]
 
     fig1 = plt.figure(figsize=(12, 8))
 
-    # Reducción PCA
-    pca = PCA(n_components=2)
-    X_pca = pca.fit_transform(X)
-
-    # Scatter plot con colores pastel
-    scatter = plt.scatter(X_pca[:, 0], X_pca[:, 1],
-                          c=labels,
-                          cmap=plt.cm.Pastel1,
-                          s=120,
-                          alpha=0.85,
-                          edgecolors='gray',
-                          linewidth=0.8)
+    # Scatter plot con colores pastel (puntos más pequeños y sin borde si son muchos)
+    muchos = n_comunidades > 1000
+    plt.scatter(proyeccion['x'], proyeccion['y'],
+                c=colores,
+                s=max(1, 120000 / n_comunidades) if muchos else 120,
+                alpha=0.85,
+                edgecolors='none' if muchos else 'gray',
+                linewidth=0 if muchos else 0.8,
+                rasterized=n_comunidades >= rasterizar_desde)
 
     # Título y etiquetas
     plt.title('Distribución de Comunidades por Cluster',
               fontweight='bold',
               pad=20)
 
-    plt.xlabel(f'Componente Principal 1 ({pca.explained_variance_ratio_[0] * 100:.1f}% varianza)',
+    plt.xlabel(f'Componente SVD 1 ({varianza[0] * 100:.1f}% varianza)',
                fontweight='bold')
-    plt.ylabel(f'Componente Principal 2 ({pca.explained_variance_ratio_[1] * 100:.1f}% varianza)',
+    plt.ylabel(f'Componente SVD 2 ({varianza[1] * 100:.1f}% varianza)',
                fontweight='bold')
 
     # Leyenda
+    conteos = np.bincount(posicion_cluster, minlength=len(clusters))
     legend_elements = []
-    for cluster_id in sorted(np.unique(labels)):
-        count = (labels == cluster_id).sum()
+    for cluster_id, color, count in zip(clusters, paleta, conteos):
         legend_elements.append(plt.Line2D([0], [0],
                                           marker='o',
                                           color='w',
-                                          markerfacecolor=plt.cm.Pastel1(cluster_id / 9),
+                                          markerfacecolor=color,
                                           markersize=10,
                                           label=f'Cluster {cluster_id} ({count} comunidades)'))
 
@@ -90,23 +62,20 @@ def visualizacion_profesional():
                title="Clusters",
                loc='upper right',
                frameon=True,
-               framealpha=0.9)
+               framealpha=0.9,
+               ncol=1 if len(clusters) <= 20 else 2)
 
     # Grid y ajustes
     plt.grid(True, alpha=0.3, linestyle='--')
     plt.tight_layout()
 
-    # Guardar gráfico 1
-    results_dir = os.path.join(proyecto_dir, "data", "results", "visualizaciones")
-    os.makedirs(results_dir, exist_ok=True)
+    guardar_figura(fig1, ruta)
+    print(f"   Gráfico 1 guardado: {ruta}")
+    return ruta
 
-    fig1_path = os.path.join(results_dir, "distribucion_clusters.png")
-    plt.savefig(fig1_path, dpi=300, bbox_inches='tight')
-    print(f"   Gráfico 1 guardado: {fig1_path}")
-    plt.show()
 
-    # 3. GRÁFICO 2: TAMAÑO DE CLUSTERS
-    print("\n3. Creando gráfico de tamaño de clusters...")
+def figura_tamano(clusters_df, ruta):
+    """Gráfico 2: número de comunidades de cada cluster"""
 
     fig2, ax2 = plt.subplots(figsize=(10, 6))
 
@@ -116,7 +85,7 @@ def visualizacion_profesional():
     # Crear barras horizontales
     y_pos = np.arange(len(cluster_sizes))
     bars = ax2.barh(y_pos, cluster_sizes.values,
-                    color=pastel_colors[:len(cluster_sizes)],
+                    color=colores_clusters(len(cluster_sizes)),
                     edgecolor='gray',
                     height=0.7)
 
@@ -145,16 +114,13 @@ def visualizacion_profesional():
 
     plt.tight_layout()
 
-    # Guardar gráfico 2
-    fig2_path = os.path.join(results_dir, "tamano_clusters.png")
-    plt.savefig(fig2_path, dpi=300, bbox_inches='tight')
-    print(f"   Gráfico 2 guardado: {fig2_path}")
-    plt.show()
+    guardar_figura(fig2, ruta)
+    print(f"   Gráfico 2 guardado: {ruta}")
+    return ruta
 
-    # 4. GRÁFICO 3: PEDIDOS PRINCIPALES POR CLUSTER
-    print("\n4. Creando gráfico de pedidos principales...")
 
-    fig3 = plt.figure(figsize=(14, 8))
+def figura_pedidos_principales(clusters_df, ruta):
+    """Gráfico 3: pedido principal de cada cluster frente a su tamaño, con tabla"""
 
     # Preparar datos
     pedidos_por_cluster = []
@@ -186,17 +152,17 @@ def visualizacion_profesional():
     fig3, (ax3a, ax3b) = plt.subplots(2, 1, figsize=(14, 10))
 
     # Subgráfico A: Frecuencia del pedido principal
-    bars1 = ax3a.bar(x - width / 2, pedidos_df['frecuencia'],
-                     width,
-                     label='Comunidades con este pedido',
-                     color='#87CEEB',
-                     edgecolor='gray')
-
-    bars2 = ax3a.bar(x + width / 2, pedidos_df['total_comunidades'],
-                     width,
-                     label='Total comunidades en cluster',
-                     color='#FFB6C1',
-                     edgecolor='gray')
+    ax3a.bar(x - width / 2, pedidos_df['frecuencia'],
+             width,
+             label='Comunidades con este pedido',
+             color='#87CEEB',
+             edgecolor='gray')
+
+    ax3a.bar(x + width / 2, pedidos_df['total_comunidades'],
+             width,
+             label='Total comunidades en cluster',
+             color='#FFB6C1',
+             edgecolor='gray')
 
     ax3a.set_ylabel('Número de Comunidades', fontweight='bold')
     ax3a.set_title('Pedido Principal vs Total de Comunidades por Cluster',
@@ -248,71 +214,123 @@ def visualizacion_profesional():
 
     plt.tight_layout()
 
-    # Guardar gráfico 3
-    fig3_path = os.path.join(results_dir, "pedidos_principales.png")
-    plt.savefig(fig3_path, dpi=300, bbox_inches='tight')
-    print(f"   Gráfico 3 guardado: {fig3_path}")
-    plt.show()
-
-    # 5. GRÁFICO 4: RESUMEN EJECUTIVO
-    print("\n5. Creando resumen ejecutivo...")
-
-    # Cargar análisis previo
-    analisis_path = os.path.join(proyecto_dir, "data", "results", "resumen_analisis_clusters.txt")
-
-    if os.path.exists(analisis_path):
-        with open(analisis_path, 'r') as f:
-            lineas = f.readlines()
-
-        # Extraer distribución por tipo
-        distribucion = {}
-        for linea in lineas:
-            if '- Legalización:' in linea:
-                distribucion['Legalización'] = int(linea.split(':')[1].split()[0])
-            elif '- Membresía:' in linea:
-                distribucion['Membresía'] = int(linea.split(':')[1].split()[0])
-            elif '- Gestión interna:' in linea:
-                distribucion['Gestión interna'] = int(linea.split(':')[1].split()[0])
-            elif '- Actualización:' in linea:
-                distribucion['Actualización'] = int(linea.split(':')[1].split()[0])
-            elif '- Otros:' in linea:
-                distribucion['Otros'] = int(linea.split(':')[1].split()[0])
-
-        # Crear gráfico de torta
-        fig4 = plt.figure(figsize=(10, 8))
-
-        tipos = list(distribucion.keys())
-        valores = list(distribucion.values())
-        colores_torta = ['#FFD700', '#98FB98', '#87CEEB', '#FFA07A', '#DDA0DD']
-
-        # Gráfico de torta
-        wedges, texts, autotexts = plt.pie(valores,
-                                           labels=tipos,
-                                           colors=colores_torta,
-                                           autopct='%1.1f%%',
-                                           startangle=90,
-                                           shadow=False,
-                                           explode=[0.05] * len(tipos),
-                                           textprops={'fontsize': 11})
-
-        plt.title('Distribución de Comunidades por Tipo de Trámite',
-                  fontweight='bold',
-                  pad=30)
+    guardar_figura(fig3, ruta)
+    print(f"   Gráfico 3 guardado: {ruta}")
+    return ruta
+
+
+def figura_tipos_tramite(distribucion, ruta):
+    """Gráfico 4: resumen ejecutivo por tipo de trámite (None si no hay análisis previo)
+
+    distribucion es la tabla distribucion_tipos_tramite del almacén de
+    resultados (ver resultados.py), escrita por analizar_clusters.py.
+    """
+
+    if distribucion is None or distribucion.empty:
+        return None
+
+    # Crear gráfico de torta
+    fig4 = plt.figure(figsize=(10, 8))
+
+    tipos = distribucion['tipo_tramite'].tolist()
+    valores = distribucion['n_comunidades'].tolist()
+    colores_torta = ['#FFD700', '#98FB98', '#87CEEB', '#FFA07A', '#DDA0DD']
+
+    # Gráfico de torta
+    wedges, texts, autotexts = plt.pie(valores,
+                                       labels=tipos,
+                                       colors=colores_torta,
+                                       autopct='%1.1f%%',
+                                       startangle=90,
+                                       shadow=False,
+                                       explode=[0.05] * len(tipos),
+                                       textprops={'fontsize': 11})
+
+    plt.title('Distribución de Comunidades por Tipo de Trámite',
+              fontweight='bold',
+              pad=30)
+
+    # Mejorar aspecto de porcentajes
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+        autotext.set_fontsize(10)
 
-        # Mejorar aspecto de porcentajes
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-            autotext.set_fontsize(10)
+    plt.axis('equal')
+    plt.tight_layout()
+
+    guardar_figura(fig4, ruta)
+    print(f"   Gráfico 4 guardado: {ruta}")
+    return ruta
+
+
+def tareas_visualizacion(clusters_df, results_dir, distribucion, arbol=None, k_arbol=None, hojas_arbol=None):
+    """Figuras de este script como tareas independientes para renderizar_figuras
+
+    Los datos del almacén (proyección, distribución, árbol) se leen aquí y
+    se pasan como argumentos, para que cuenten en la clave de caché.
+    """
+
+    # La proyección guardada si corresponde a estos clusters (ver proyeccion.py); si no, se calcula
+    proyeccion, varianza = obtener_proyeccion(clusters_df)
+
+    tareas = [
+        ('distribucion', figura_distribucion,
+         {'proyeccion': proyeccion, 'varianza': varianza,
+          'ruta': os.path.join(results_dir, "distribucion_clusters.png")}),
+        ('tamano', figura_tamano,
+         {'clusters_df': clusters_df, 'ruta': os.path.join(results_dir, "tamano_clusters.png")}),
+        ('pedidos_principales', figura_pedidos_principales,
+         {'clusters_df': clusters_df, 'ruta': os.path.join(results_dir, "pedidos_principales.png")}),
+        ('tipos_tramite', figura_tipos_tramite,
+         {'distribucion': distribucion, 'ruta': os.path.join(results_dir, "resumen_tipos_tramite.png")})
+    ]
+
+    # Dendrograma del modelo jerárquico (sólo si comparar_algoritmos.py ya guardó su árbol)
+    if arbol is not None and k_arbol:
+        tareas.append(('dendrograma', figura_dendrograma,
+                       {'arbol': arbol, 'hojas': hojas_arbol, 'n_clusters': k_arbol,
+                        'ruta': os.path.join(results_dir, "dendrograma_jerarquico.png")}))
+    return tareas
+
+
+@instrumentar('visualizacion')
+def visualizacion_profesional(clusters_df=None, visualizaciones_dir=None, max_workers=None, forzar=False):
+    """Visualización profesional de resultados del clustering
+
+    Las cuatro figuras son independientes y se dibujan en paralelo, en
+    procesos de trabajo sin pantalla (ver renderizado.py). Los clusters
+    pueden pasarse en memoria y las figuras guardarse en otro directorio
+    (por ejemplo, al medir el rendimiento con datos sintéticos). Las
+    figuras cuyos datos no cambiaron se reutilizan salvo con forzar=True.
+    """
+
+    print("VISUALIZACIÓN PROFESIONAL DE RESULTADOS")
+    print("=" * 70)
+
+    # Cargar resultados
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    proyecto_dir = os.path.dirname(script_dir)
+    clusters_path = os.path.join(proyecto_dir, "data", "results", "comunidades_clusters.csv")
+
+    if clusters_df is None:
+        clusters_df = pd.read_csv(clusters_path, index_col=0, encoding='utf-8-sig')
 
-        plt.axis('equal')
-        plt.tight_layout()
+    distribucion = cargar_tabla_si_existe('distribucion_tipos_tramite')
+    arbol = cargar_tabla_si_existe('linkage_jerarquico')
+    hojas_arbol = cargar_tabla_si_existe('hojas_jerarquico')
 
-        # Guardar gráfico 4
-        fig4_path = os.path.join(results_dir, "resumen_tipos_tramite.png")
-        plt.savefig(fig4_path, dpi=300, bbox_inches='tight')
-        print(f"   Gráfico 4 guardado: {fig4_path}")
-        plt.show()
+    results_dir = visualizaciones_dir or os.path.join(proyecto_dir, "data", "results", "visualizaciones")
+    os.makedirs(results_dir, exist_ok=True)
+
+    # 1. CONFIGURACIÓN DE ESTILO PROFESIONAL
+    print("\n1. Configurando estilo profesional...")
+    configurar_estilo()
+
+    # 2. GRÁFICOS (distribución, tamaño, pedidos principales y resumen ejecutivo)
+    print("2. Creando gráficos en paralelo...")
+    tareas = tareas_visualizacion(clusters_df, results_dir, distribucion, arbol, k_jerarquico(), hojas_arbol)
+    figuras = renderizar_figuras(tareas, max_workers=max_workers, forzar=forzar)
 
     print("\n" + "=" * 70)
     print("✅ VISUALIZACIONES PROFESIONALES COMPLETADAS")
@@ -322,7 +340,15 @@ def visualizacion_profesional():
     print("2. tamano_clusters.png - Tamaño de cada cluster")
     print("3. pedidos_principales.png - Pedidos principales por cluster")
     print("4. resumen_tipos_tramite.png - Resumen por tipo de trámite")
+    if 'dendrograma' in figuras:
+        print("5. dendrograma_jerarquico.png - Dendrograma truncado del modelo jerárquico")
+
+    return figuras
 
 
 if __name__ == "__main__":
-    visualizacion_profesional()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Visualización profesional de resultados del clustering")
+    parser.add_argument('--force', action='store_true', help="dibujar todas las figuras aunque no hayan cambiado")
+    args = parser.parse_args()
+
+    visualizacion_profesional(forzar=args.force)
@@ -1,341 +1,321 @@
 import pandas as pd
 import numpy as np
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.patches import ConnectionPatch
+import argparse
+from renderizado import plt, colores_clusters, configurar_estilo, guardar_figura, renderizar_figuras
+from heatmap_similitud import heatmap_por_cluster, RESOLUCION_HEATMAP
+from red_comunidades import grafo_red, layout_red, dibujar_red
+from instrumentacion import instrumentar
 
 
-def visualizar_comunidades_compartidas():
-    """Visualizar comunidades que comparten los mismos pedidos"""
+def figura_similitud(clusters_df, ruta, resolucion=RESOLUCION_HEATMAP, agregacion='media'):
+    """Gráfico 1: heatmap de pedidos en común entre todas las comunidades
 
-    print("VISUALIZACIÓN DE COMUNIDADES QUE COMPARTEN PEDIDOS")
-    print("=" * 70)
-
-    # Cargar resultados
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    proyecto_dir = os.path.dirname(script_dir)
-    clusters_path = os.path.join(proyecto_dir, "data", "results", "comunidades_clusters.csv")
-
-    clusters_df = pd.read_csv(clusters_path, index_col=0, encoding='utf-8-sig')
-
-    # 1. CONFIGURACIÓN DE ESTILO
-    print("\n1. Configurando estilo...")
-
-    plt.style.use('seaborn-v0_8-whitegrid')
-
-    # Paleta de colores pastel
-    pastel_colors = ['#FFB6C1', '#87CEEB', '#98FB98', '#DDA0DD', '#FFD700',
-                     '#FFA07A', '#20B2AA', '#F0E68C', '#CD853F', '#B0E0E6']
-
-    # Configuración de fuentes
-    plt.rcParams.update({
-        'font.size': 11,
-        'font.family': 'DejaVu Sans',
-        'axes.titlesize': 14,
-        'axes.labelsize': 12,
-        'xtick.labelsize': 10,
-        'ytick.labelsize': 10,
-        'legend.fontsize': 10
-    })
-
-    # 2. GRÁFICO 1: MATRIZ DE SIMILITUD ENTRE COMUNIDADES
-    print("\n2. Creando matriz de similitud...")
-
-    # Calcular similitud (pedidos en común)
-    comunidades = clusters_df.index.tolist()
-    n_comunidades = len(comunidades)
-
-    # Crear matriz de similitud
-    similitud = np.zeros((n_comunidades, n_comunidades))
+    Las comunidades se ordenan por cluster y, dentro de cada cluster, por
+    el orden de su dendrograma; la similitud se agrega en bloques hasta
+    resolucion × resolucion (ver heatmap_similitud.py) y se dibuja con un
+    único imshow, así que el coste depende del tamaño de la imagen y no
+    del número de pares de comunidades.
+    """
 
-    # Para no demorar, usar solo las primeras 30 comunidades
-    muestra_comunidades = min(30, n_comunidades)
-    indices_muestra = range(muestra_comunidades)
-
-    print(f"   Calculando similitud entre {muestra_comunidades} comunidades...")
-
-    for i in indices_muestra:
-        for j in indices_muestra:
-            if i != j:
-                # Número de pedidos en común
-                comun_i = clusters_df.iloc[i].drop('CLUSTER')
-                comun_j = clusters_df.iloc[j].drop('CLUSTER')
-                similitud[i, j] = np.sum((comun_i == 1) & (comun_j == 1))
+    n_comunidades = len(clusters_df)
+    print(f"   Calculando similitud entre {n_comunidades} comunidades (agregación: {agregacion})...")
+    heatmap = heatmap_por_cluster(clusters_df, resolucion=resolucion, agregacion=agregacion)
+    limites = heatmap['limites']
 
     # Crear figura
     fig1, ax1 = plt.subplots(figsize=(12, 10))
 
-    # Heatmap de similitud
-    im = ax1.imshow(similitud[:muestra_comunidades, :muestra_comunidades],
+    # Heatmap de similitud, en coordenadas de comunidades
+    im = ax1.imshow(heatmap['imagen'],
                     cmap='YlOrRd',
-                    aspect='auto')
-
-    # Configurar etiquetas
-    comunidades_cortas = [com[:15] + "..." if len(com) > 15 else com
-                          for com in comunidades[:muestra_comunidades]]
-
-    ax1.set_xticks(range(muestra_comunidades))
-    ax1.set_yticks(range(muestra_comunidades))
-    ax1.set_xticklabels(comunidades_cortas, rotation=90, fontsize=9)
-    ax1.set_yticklabels(comunidades_cortas, fontsize=9)
+                    aspect='auto',
+                    interpolation='nearest',
+                    extent=(0, n_comunidades, n_comunidades, 0))
+
+    # Separadores y etiquetas de cluster
+    for limite in limites[1:-1]:
+        ax1.axhline(limite, color='gray', linewidth=0.6)
+        ax1.axvline(limite, color='gray', linewidth=0.6)
+
+    centros = (limites[:-1] + limites[1:]) / 2
+    etiquetas = [f'C{int(cluster_id)}' for cluster_id in heatmap['clusters']]
+    ax1.set_xticks(centros)
+    ax1.set_yticks(centros)
+    ax1.set_xticklabels(etiquetas, rotation=90, fontsize=9)
+    ax1.set_yticklabels(etiquetas, fontsize=9)
+    ax1.grid(False)
 
     # Título y barra de color
     ax1.set_title('Matriz de Similitud: Pedidos en Común entre Comunidades',
                   fontweight='bold',
                   pad=20)
-    ax1.set_xlabel('Comunidades', fontweight='bold')
-    ax1.set_ylabel('Comunidades', fontweight='bold')
+    ax1.set_xlabel(f'Comunidades ordenadas por cluster (n = {n_comunidades})', fontweight='bold')
+    ax1.set_ylabel('Comunidades ordenadas por cluster', fontweight='bold')
 
     # Barra de color
     cbar = plt.colorbar(im, ax=ax1, shrink=0.8)
-    cbar.set_label('Número de Pedidos en Común', fontweight='bold')
-
-    # Añadir anotaciones para valores altos
-    for i in range(muestra_comunidades):
-        for j in range(muestra_comunidades):
-            if similitud[i, j] >= 2:  # Solo mostrar si comparten 2+ pedidos
-                ax1.text(j, i, f'{int(similitud[i, j])}',
-                         ha='center', va='center',
-                         color='black', fontweight='bold', fontsize=8)
+    detalle = '' if len(heatmap['bordes']) - 1 == n_comunidades else f' ({agregacion} por bloque)'
+    cbar.set_label(f'Número de Pedidos en Común{detalle}', fontweight='bold')
 
     plt.tight_layout()
 
-    # Guardar gráfico 1
-    results_dir = os.path.join(proyecto_dir, "data", "results", "visualizaciones")
-    os.makedirs(results_dir, exist_ok=True)
-
-    fig1_path = os.path.join(results_dir, "matriz_similitud_comunidades.png")
-    plt.savefig(fig1_path, dpi=300, bbox_inches='tight')
-    print(f"   Gráfico 1 guardado: {fig1_path}")
-    plt.show()
-
-    # 3. GRÁFICO 2: RED DE COMUNIDADES QUE COMPARTEN PEDIDOS
-    print("\n3. Creando red de comunidades...")
-
-    fig2 = plt.figure(figsize=(14, 10))
-
-    # Seleccionar comunidades que comparten al menos 2 pedidos
-    comunidades_conexiones = []
-
-    for i in range(muestra_comunidades):
-        for j in range(i + 1, muestra_comunidades):
-            if similitud[i, j] >= 1:  # Comparten al menos 1 pedido
-                comunidades_conexiones.append({
-                    'comunidad1': comunidades[i],
-                    'comunidad2': comunidades[j],
-                    'pedidos_comunes': int(similitud[i, j])
-                })
-
-    # Limitar a las 20 conexiones más fuertes
-    comunidades_conexiones.sort(key=lambda x: x['pedidos_comunes'], reverse=True)
-    comunidades_conexiones = comunidades_conexiones[:20]
-
-    # Crear gráfico de red simplificado
-    ax2 = fig2.add_subplot(111)
-
-    # Posiciones circulares para las comunidades
-    angulos = np.linspace(0, 2 * np.pi, muestra_comunidades, endpoint=False)
-    radio = 5
-    x_pos = radio * np.cos(angulos)
-    y_pos = radio * np.sin(angulos)
-
-    # Dibujar conexiones
-    for conexion in comunidades_conexiones:
-        idx1 = comunidades.index(conexion['comunidad1'])
-        idx2 = comunidades.index(conexion['comunidad2'])
-
-        # Grosor según número de pedidos en común
-        grosor = 0.5 + conexion['pedidos_comunes'] * 0.5
-
-        # Color según cluster
-        cluster1 = clusters_df.iloc[idx1]['CLUSTER']
-        color = pastel_colors[int(cluster1) % len(pastel_colors)]
-
-        # Dibujar línea
-        ax2.plot([x_pos[idx1], x_pos[idx2]],
-                 [y_pos[idx1], y_pos[idx2]],
-                 color=color,
-                 linewidth=grosor,
-                 alpha=0.6)
-
-    # Dibujar nodos (comunidades)
-    for i in range(muestra_comunidades):
-        cluster_id = clusters_df.iloc[i]['CLUSTER']
-        color = pastel_colors[int(cluster_id) % len(pastel_colors)]
-
-        # Tamaño según número de pedidos
-        n_pedidos = clusters_df.iloc[i].drop('CLUSTER').sum()
-        tamaño = 100 + n_pedidos * 50
-
-        ax2.scatter(x_pos[i], y_pos[i],
-                    s=tamaño,
-                    color=color,
-                    edgecolors='gray',
-                    linewidth=1,
-                    alpha=0.8,
-                    zorder=5)
-
-        # Etiqueta
-        nombre_corto = comunidades[i][:10] + "..." if len(comunidades[i]) > 10 else comunidades[i]
-        ax2.text(x_pos[i], y_pos[i] + 0.3,
-                 f'C{int(cluster_id)}',
-                 ha='center',
-                 fontsize=8,
-                 fontweight='bold',
-                 bbox=dict(boxstyle="round,pad=0.2", facecolor="white", alpha=0.7))
+    guardar_figura(fig1, ruta)
+    print(f"   Gráfico 1 guardado: {ruta}")
+    return ruta
+
+
+def figura_red(clusters_df, ruta, top_k=10, min_compartidos=1, layout='auto'):
+    """Gráfico 2: red de todas las comunidades con múltiples pedidos
+
+    El grafo se construye disperso a partir de los pedidos compartidos,
+    con a lo sumo top_k vecinos por comunidad; el layout (fuerzas o
+    espectral, con semilla) se cachea en disco y todas las aristas se
+    dibujan con una sola LineCollection (ver red_comunidades.py).
+    """
+
+    matriz = clusters_df.drop('CLUSTER', axis=1)
+    labels = clusters_df['CLUSTER'].to_numpy()
+    n_comunidades = len(clusters_df)
+
+    grafo = grafo_red(matriz, top_k=top_k, min_compartidos=min_compartidos)
+    posiciones = layout_red(grafo, metodo=layout)
+
+    # Color según cluster y tamaño según número de pedidos
+    clusters = np.unique(labels)
+    paleta = dict(zip(clusters, colores_clusters(len(clusters))))
+    colores = [paleta[cluster_id] for cluster_id in labels]
+    tamaños = 100 + matriz.to_numpy().sum(axis=1) * 50
+    if n_comunidades > 500:
+        tamaños = tamaños / 10
+
+    fig2, ax2 = plt.subplots(figsize=(14, 10))
+    n_aristas = dibujar_red(ax2, grafo, posiciones, colores, tamaños)
+
+    # Etiquetas de cluster sólo cuando los nodos se distinguen
+    if n_comunidades <= 50:
+        margen = 0.03 * np.ptp(posiciones[:, 1])
+        for (x, y), cluster_id in zip(posiciones, labels):
+            ax2.text(x, y + margen,
+                     f'C{int(cluster_id)}',
+                     ha='center',
+                     fontsize=8,
+                     fontweight='bold',
+                     bbox=dict(boxstyle="round,pad=0.2", facecolor="white", alpha=0.7))
 
     # Configurar gráfico
     ax2.set_title('Red de Comunidades que Comparten Pedidos',
                   fontweight='bold',
                   pad=20)
-    ax2.set_xlabel('Posición X', fontweight='bold')
-    ax2.set_ylabel('Posición Y', fontweight='bold')
+    ax2.set_xlabel(f'{n_comunidades} comunidades, {n_aristas} conexiones (hasta {top_k} por comunidad)',
+                   fontweight='bold')
 
     # Eliminar ejes
     ax2.set_xticks([])
     ax2.set_yticks([])
-    ax2.set_xlim(-radio * 1.2, radio * 1.2)
-    ax2.set_ylim(-radio * 1.2, radio * 1.2)
+    ax2.margins(0.05)
 
     # Leyenda de clusters
     legend_elements = []
-    for cluster_id in sorted(clusters_df['CLUSTER'].unique()):
-        color = pastel_colors[int(cluster_id) % len(pastel_colors)]
+    for cluster_id in clusters:
         legend_elements.append(plt.Line2D([0], [0],
                                           marker='o',
                                           color='w',
-                                          markerfacecolor=color,
+                                          markerfacecolor=paleta[cluster_id],
                                           markersize=10,
                                           label=f'Cluster {cluster_id}'))
 
     ax2.legend(handles=legend_elements,
                title="Clusters",
                loc='upper left',
-               bbox_to_anchor=(1, 1))
+               bbox_to_anchor=(1, 1),
+               ncol=1 if len(clusters) <= 25 else 2)
 
     plt.tight_layout()
 
-    # Guardar gráfico 2
-    fig2_path = os.path.join(results_dir, "red_comunidades_compartidas.png")
-    plt.savefig(fig2_path, dpi=300, bbox_inches='tight')
-    print(f"   Gráfico 2 guardado: {fig2_path}")
-    plt.show()
-
-    # 4. GRÁFICO 3: EJEMPLOS CONCRETOS DE COMUNIDADES QUE COMPARTEN PEDIDOS
-    print("\n4. Creando ejemplos concretos...")
+    guardar_figura(fig2, ruta)
+    print(f"   Gráfico 2 guardado: {ruta}")
+    return ruta
+
+
+def pares_identicos(clusters_df, max_pares=5):
+    """Pares (i < j) de comunidades con exactamente los mismos pedidos
+
+    Las filas se agrupan por un hash de su patrón de pedidos, en lugar de
+    comparar todos los pares. Devuelve el número total de pares y los
+    max_pares primeros en el orden (i, j) de la matriz.
+    """
+
+    pedidos = clusters_df.drop('CLUSTER', axis=1)
+    huellas = pd.util.hash_pandas_object(pedidos, index=False).to_numpy()
+    grupos = pd.Series(np.arange(len(huellas))).groupby(huellas).indices
+    grupos = [np.sort(indices) for indices in grupos.values() if len(indices) > 1]
+    total = sum(len(g) * (len(g) - 1) // 2 for g in grupos)
+
+    # Los primeros pares en orden (i, j): se recorren los i de menor a mayor
+    siguientes = {}
+    for grupo in grupos:
+        for posicion, i in enumerate(grupo[:-1]):
+            siguientes[i] = grupo[posicion + 1:]
+
+    comunidades = clusters_df.index
+    pares = []
+    for i in sorted(siguientes):
+        for j in siguientes[i]:
+            if len(pares) == max_pares:
+                return total, pares
+            fila = pedidos.iloc[i]
+            pares.append({
+                'comunidad1': comunidades[i],
+                'comunidad2': comunidades[j],
+                'cluster1': clusters_df['CLUSTER'].iloc[i],
+                'cluster2': clusters_df['CLUSTER'].iloc[j],
+                'pedidos': list(fila[fila == 1].index)
+            })
+    return total, pares
+
+
+def figura_identicas(clusters_df, ruta):
+    """Gráfico 3: ejemplos de comunidades con pedidos idénticos (None si no hay)"""
 
     # Encontrar pares de comunidades que comparten exactamente los mismos pedidos
     print("   Buscando comunidades con pedidos idénticos...")
+    n_pares, pares_muestra = pares_identicos(clusters_df)
 
-    pares_identicos = []
-
-    for i in range(n_comunidades):
-        for j in range(i + 1, n_comunidades):
-            comun_i = clusters_df.iloc[i].drop('CLUSTER')
-            comun_j = clusters_df.iloc[j].drop('CLUSTER')
-
-            # Si tienen exactamente los mismos pedidos
-            if np.array_equal(comun_i.values, comun_j.values):
-                pares_identicos.append({
-                    'comunidad1': comunidades[i],
-                    'comunidad2': comunidades[j],
-                    'cluster1': clusters_df.iloc[i]['CLUSTER'],
-                    'cluster2': clusters_df.iloc[j]['CLUSTER'],
-                    'pedidos': list(comun_i[comun_i == 1].index)
-                })
-
-    if pares_identicos:
-        print(f"   Encontrados {len(pares_identicos)} pares idénticos")
-
-        # Tomar primeros 5 pares para visualizar
-        pares_muestra = pares_identicos[:5]
-
-        fig3, ax3 = plt.subplots(figsize=(14, 8))
-
-        y_pos = np.arange(len(pares_muestra))
-        bar_height = 0.35
-
-        # Preparar datos
-        comunidades1 = []
-        comunidades2 = []
-        n_pedidos = []
-
-        for par in pares_muestra:
-            comunidades1.append(par['comunidad1'][:15] + "...")
-            comunidades2.append(par['comunidad2'][:15] + "...")
-            n_pedidos.append(len(par['pedidos']))
-
-        # Gráfico de barras agrupadas
-        ax3.barh(y_pos - bar_height / 2, n_pedidos,
-                 height=bar_height,
-                 color='#87CEEB',
-                 edgecolor='gray',
-                 label='Número de pedidos en común')
-
-        # Configurar eje Y
-        ax3.set_yticks(y_pos)
-
-        # Crear etiquetas combinadas
-        y_labels = []
-        for i in range(len(pares_muestra)):
-            label = f"{comunidades1[i]}\n{comunidades2[i]}"
-            y_labels.append(label)
-
-        ax3.set_yticklabels(y_labels, fontsize=10)
-
-        # Títulos
-        ax3.set_title('Comunidades con Pedidos Idénticos',
-                      fontweight='bold',
-                      pad=20)
-        ax3.set_xlabel('Número de Pedidos Compartidos', fontweight='bold')
-
-        # Añadir valores en barras
-        for i, v in enumerate(n_pedidos):
-            ax3.text(v + 0.1, i,
-                     f'{v} pedidos',
-                     va='center',
-                     fontweight='bold')
-
-        # Grid
-        ax3.grid(axis='x', alpha=0.3, linestyle='--')
-        ax3.set_axisbelow(True)
-
-        # Añadir panel informativo
-        texto_info = "Estas comunidades tienen EXACTAMENTE los mismos pedidos,\n"
-        texto_info += "por lo que están en el MISMO cluster según nuestro objetivo."
-
-        props = dict(boxstyle='round', facecolor='wheat', alpha=0.3)
-        ax3.text(0.95, 0.05, texto_info,
-                 transform=ax3.transAxes,
-                 fontsize=10,
-                 verticalalignment='bottom',
-                 horizontalalignment='right',
-                 bbox=props)
-
-        plt.tight_layout()
-
-        # Guardar gráfico 3
-        fig3_path = os.path.join(results_dir, "comunidades_identicas.png")
-        plt.savefig(fig3_path, dpi=300, bbox_inches='tight')
-        print(f"   Gráfico 3 guardado: {fig3_path}")
-        plt.show()
-
-        # Mostrar detalles en consola
-        print("\n   DETALLES DE PARES IDÉNTICOS:")
-        for i, par in enumerate(pares_muestra, 1):
-            print(f"\n   Par {i}:")
-            print(f"   • {par['comunidad1'][:30]}...")
-            print(f"   • {par['comunidad2'][:30]}...")
-            print(f"   • Mismo cluster: {'Sí' if par['cluster1'] == par['cluster2'] else 'No'}")
-            print(f"   • Pedidos compartidos: {len(par['pedidos'])}")
-            if par['pedidos']:
-                print(f"   • Ejemplo: {par['pedidos'][0][:40]}...")
-    else:
+    if not pares_muestra:
         print("   No se encontraron comunidades con pedidos exactamente idénticos")
         print("   Esto indica que cada comunidad tiene combinaciones únicas de pedidos")
+        return None
+
+    print(f"   Encontrados {n_pares} pares idénticos")
+
+    fig3, ax3 = plt.subplots(figsize=(14, 8))
+
+    y_pos = np.arange(len(pares_muestra))
+    bar_height = 0.35
+
+    # Preparar datos
+    comunidades1 = []
+    comunidades2 = []
+    n_pedidos = []
+
+    for par in pares_muestra:
+        comunidades1.append(par['comunidad1'][:15] + "...")
+        comunidades2.append(par['comunidad2'][:15] + "...")
+        n_pedidos.append(len(par['pedidos']))
+
+    # Gráfico de barras agrupadas
+    ax3.barh(y_pos - bar_height / 2, n_pedidos,
+             height=bar_height,
+             color='#87CEEB',
+             edgecolor='gray',
+             label='Número de pedidos en común')
+
+    # Configurar eje Y
+    ax3.set_yticks(y_pos)
+
+    # Crear etiquetas combinadas
+    y_labels = []
+    for i in range(len(pares_muestra)):
+        label = f"{comunidades1[i]}\n{comunidades2[i]}"
+        y_labels.append(label)
 
-    # 5. RESUMEN FINAL
+    ax3.set_yticklabels(y_labels, fontsize=10)
+
+    # Títulos
+    ax3.set_title('Comunidades con Pedidos Idénticos',
+                  fontweight='bold',
+                  pad=20)
+    ax3.set_xlabel('Número de Pedidos Compartidos', fontweight='bold')
+
+    # Añadir valores en barras
+    for i, v in enumerate(n_pedidos):
+        ax3.text(v + 0.1, i,
+                 f'{v} pedidos',
+                 va='center',
+                 fontweight='bold')
+
+    # Grid
+    ax3.grid(axis='x', alpha=0.3, linestyle='--')
+    ax3.set_axisbelow(True)
+
+    # Añadir panel informativo
+    texto_info = "Estas comunidades tienen EXACTAMENTE los mismos pedidos,\n"
+    texto_info += "por lo que están en el MISMO cluster según nuestro objetivo."
+
+    props = dict(boxstyle='round', facecolor='wheat', alpha=0.3)
+    ax3.text(0.95, 0.05, texto_info,
+             transform=ax3.transAxes,
+             fontsize=10,
+             verticalalignment='bottom',
+             horizontalalignment='right',
+             bbox=props)
+
+    plt.tight_layout()
+
+    guardar_figura(fig3, ruta)
+    print(f"   Gráfico 3 guardado: {ruta}")
+
+    # Mostrar detalles en consola
+    print("\n   DETALLES DE PARES IDÉNTICOS:")
+    for i, par in enumerate(pares_muestra, 1):
+        print(f"\n   Par {i}:")
+        print(f"   • {par['comunidad1'][:30]}...")
+        print(f"   • {par['comunidad2'][:30]}...")
+        print(f"   • Mismo cluster: {'Sí' if par['cluster1'] == par['cluster2'] else 'No'}")
+        print(f"   • Pedidos compartidos: {len(par['pedidos'])}")
+        if par['pedidos']:
+            print(f"   • Ejemplo: {par['pedidos'][0][:40]}...")
+
+    return ruta
+
+
+def tareas_compartidas(clusters_df, results_dir):
+    """Figuras de este script como tareas independientes para renderizar_figuras"""
+
+    return [
+        ('similitud', figura_similitud,
+         {'clusters_df': clusters_df, 'ruta': os.path.join(results_dir, "matriz_similitud_comunidades.png")}),
+        ('red', figura_red,
+         {'clusters_df': clusters_df, 'ruta': os.path.join(results_dir, "red_comunidades_compartidas.png")}),
+        ('identicas', figura_identicas,
+         {'clusters_df': clusters_df, 'ruta': os.path.join(results_dir, "comunidades_identicas.png")})
+    ]
+
+
+@instrumentar('visualizacion_compartidas')
+def visualizar_comunidades_compartidas(clusters_df=None, visualizaciones_dir=None, max_workers=None, forzar=False):
+    """Visualizar comunidades que comparten los mismos pedidos
+
+    Las tres figuras se dibujan en paralelo, en procesos de trabajo sin
+    pantalla (ver renderizado.py); las que no cambiaron se reutilizan
+    salvo con forzar=True.
+    """
+
+    print("VISUALIZACIÓN DE COMUNIDADES QUE COMPARTEN PEDIDOS")
+    print("=" * 70)
+
+    # Cargar resultados
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    proyecto_dir = os.path.dirname(script_dir)
+    clusters_path = os.path.join(proyecto_dir, "data", "results", "comunidades_clusters.csv")
+
+    if clusters_df is None:
+        clusters_df = pd.read_csv(clusters_path, index_col=0, encoding='utf-8-sig')
+
+    results_dir = visualizaciones_dir or os.path.join(proyecto_dir, "data", "results", "visualizaciones")
+    os.makedirs(results_dir, exist_ok=True)
+
+    # 1. CONFIGURACIÓN DE ESTILO
+    print("\n1. Configurando estilo...")
+    configurar_estilo()
+
+    # 2. GRÁFICOS (similitud, red y pares idénticos)
+    print("\n2. Creando gráficos en paralelo...")
+    figuras = renderizar_figuras(tareas_compartidas(clusters_df, results_dir), max_workers=max_workers,
+                                 forzar=forzar)
+
+    # 3. RESUMEN FINAL
     print("\n" + "=" * 70)
     print("✅ VISUALIZACIÓN DE COMUNIDADES COMPARTIDAS COMPLETADA")
     print("=" * 70)
@@ -346,6 +326,12 @@ def visualizar_comunidades_compartidas():
     print("\n📈 RESULTADO CLAVE: El clustering agrupó correctamente")
     print("   comunidades con pedidos similares en los mismos clusters.")
 
+    return figuras
+
 
 if __name__ == "__main__":
-    visualizar_comunidades_compartidas()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Visualizar comunidades que comparten los mismos pedidos")
+    parser.add_argument('--force', action='store_true', help="dibujar todas las figuras aunque no hayan cambiado")
+    args = parser.parse_args()
+
+    visualizar_comunidades_compartidas(forzar=args.force)